@@ -0,0 +1,6 @@
+"""Sealant: simple utilities based around modules like `secrets`, `hashlib`,
+and `hmac`.
+
+Each tool lives in its own directory and can be run directly, or through
+`python -m sealant TOOL`.
+"""
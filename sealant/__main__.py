@@ -0,0 +1,43 @@
+"""Runs a sealant tool from the terminal:
+
+    python -m sealant hashchk generate -binary FILENAME
+    python -m sealant randstr 32
+
+Only the requested tool is imported, and each tool defers its heavier
+dependencies (clipboard access, colors, process pools, databases) until an
+option that needs them is used, so short commands start quickly.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+# -----------------------------------------------------------------------------
+
+import os
+import sys
+
+TOOLS = ('hashchk', 'randstr')
+
+
+def main(argv=None):
+    """Dispatches to the `main()` of a tool's terminal module.
+
+    Args:
+        argv (list[str], optional): Arguments; defaults to sys.argv[1:].
+    """
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in TOOLS:
+        print("usage: python -m sealant {{{}}} ...".format(','.join(TOOLS)),
+              file=sys.stderr)
+        sys.exit(0 if argv and argv[0] in ('-h', '--help') else 2)
+
+    tool = argv[0]
+    # Tool modules import each other by bare name
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(
+        __file__)), tool))
+    terminal = __import__(tool + '_terminal')
+    terminal.main(argv[1:], prog='python -m sealant {}'.format(tool))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,6 @@
 """Classes and functions for creating and comparing hash digests
 
 Todo:
-    * Implement SHAKE and BLAKE
-    * Resist urge to call it "SHAKE'N BLAKE"
     * Write better method for dealing with digest references that weren't
           correctly provided.
 """
@@ -13,14 +11,56 @@ from six.moves import range
 
 import sys
 import hashlib
-
-if sys.version_info < (3, 6):
-    # noinspection PyUnresolvedReferences
-    import sha3
 # -----------------------------------------------------------------------------
 
 import os
 import hmac
+import mmap
+import errno
+import stat
+import time
+
+# Bounds used when tuning the size of blocks read into memory
+MIN_BUFFER_SIZE = 65536
+MAX_BUFFER_SIZE = 1048576
+
+# Regular files at least this large are memory mapped instead of read.
+# Releasing memoryview slices of a memory map requires Python 3.
+MMAP_THRESHOLD = 67108864
+MMAP_SUPPORTED = hasattr(memoryview, 'release')
+
+# Sparse regular files are read one data extent at a time, with holes hashed
+# from a buffer of zeros instead of being read.  Requires SEEK_DATA and
+# SEEK_HOLE (Linux, BSD, macOS, Solaris).
+SPARSE_SUPPORTED = hasattr(os, 'SEEK_DATA') and hasattr(os, 'SEEK_HOLE')
+
+# Python 2 lacks perf_counter
+TIMER = getattr(time, 'perf_counter', time.time)
+
+# Hash methods keyed by the length of their hexadecimal digest
+STANDARD_HASH_METHODS = {
+    32: 'md5', 40: 'sha1', 56: 'sha224', 64: 'sha256', 96: 'sha384',
+    128: 'sha512'
+}
+
+SHA3_METHODS = {
+    56: 'sha3_224', 64: 'sha3_256', 96: 'sha3_384', 128: 'sha3_512'
+}
+
+BLAKE2_METHODS = {64: 'blake2s', 128: 'blake2b'}
+
+# SHAKE digests can be any length; these are the conventional lengths (twice
+# the security level in bits) that are produced when no length is requested
+SHAKE_METHODS = {64: 'shake_128', 128: 'shake_256'}
+SHAKE_LENGTHS = dict((method, length) for length, method in
+                     SHAKE_METHODS.items())
+
+HASH_FAMILIES = {'sha2': STANDARD_HASH_METHODS, 'sha3': SHA3_METHODS,
+                 'blake2': BLAKE2_METHODS, 'shake': SHAKE_METHODS}
+
+# Families considered during automatic detection, in order of preference.
+# SHAKE is excluded because any digest length is a valid SHAKE digest.
+DETECTED_FAMILIES = ['sha2', 'sha3', 'blake2']
 
 
 class Digest(object):
@@ -32,12 +72,16 @@ class Digest(object):
         reference_digest (str): Either a filename containing a generated hash
             digest, or the actual hash digest itself
         sha3 (bool): Designates whether SHA3 should be used over SHA2
+        family (str): Hash family preferred when several hash methods produce
+            digests of the same length; one of HASH_FAMILIES.  Defaults to
+            'sha3' if `sha3` is True, otherwise 'sha2'.
 
     """
 
-    def __init__(self, reference_digest, sha3=False):
+    def __init__(self, reference_digest, sha3=False, family=None):
         self.reference_digest = self.process_reference(reference_digest)
         self.sha3 = sha3
+        self.family = family or ('sha3' if sha3 else 'sha2')
 
     @staticmethod
     def process_reference(source):
@@ -53,7 +97,7 @@ class Digest(object):
 
         if os.path.isfile(source):
             with open(source, 'r') as f:
-                return f.read().split(' ')[0]
+                return f.read().strip().split(' ')[0]
         else:
             return source.strip()
 
@@ -61,16 +105,7 @@ class Digest(object):
     def hash_method(self):
         """str: Exact name of built-in hashlib method as a string."""
 
-        standard_hash_methods = {
-            32: 'md5', 40: 'sha1', 56: 'sha224', 64: 'sha256', 96: 'sha384',
-            128: 'sha512'
-        }
-
-        sha3_methods = {
-            56: 'sha3_224', 64: 'sha3_256', 96: 'sha3_384', 128: 'sha3_512'
-        }
-
-        family = standard_hash_methods if not self.sha3 else sha3_methods
+        family = HASH_FAMILIES[self.family]
         digest_length = len(self.reference_digest)
 
         try:
@@ -79,32 +114,572 @@ class Digest(object):
             deviations = [(abs(x - digest_length), x) for x in family]
             return family[min(deviations)[1]]
 
+    @property
+    def candidate_methods(self):
+        """list[str]: Every hash method whose digest length matches the
+        reference digest, starting with `hash_method`.  SHA-2, SHA-3, and
+        BLAKE2 share digest lengths, so a 64 character digest could have come
+        from sha256, sha3_256, or blake2s."""
+
+        candidates = [self.hash_method]
+        for family in DETECTED_FAMILIES:
+            method = HASH_FAMILIES[family].get(len(self.reference_digest))
+            if method and method not in candidates:
+                candidates.append(method)
+
+        return candidates
+
 
-def generate_digest(filename, hash_method):
+def generate_digest(filename, hash_method, buffer_size=None, use_mmap=None,
+                    cache=None, digest_length=None, progress=None):
     """
     Args:
         filename (str): Filename of binary file.
         hash_method (str): exact name of hashlib method used for digest
             generation.
+        buffer_size (int, optional): Size of blocks read into memory; tuned
+            by tune_buffer_size() if not provided.
+        use_mmap (bool, optional): Memory map the file instead of reading it;
+            defaults to True for regular files of at least MMAP_THRESHOLD
+            bytes.
+        cache (obj:`DigestCache`, optional): Cache consulted before reading
+            the file, and updated with any digest that had to be generated.
+        digest_length (int, optional): Length of the hexadecimal digest
+            produced by SHAKE methods; see hexdigest().
+        progress (obj:`ProgressMeter` or callable, optional): Observer
+            notified periodically while the file is read; see ProgressMeter.
 
     Returns:
         str: Hash digest generated from binary file.
     """
 
-    # Buffer used read file into memory in smaller blocks
-    buffer_size = 65536
-    blocks = (os.path.getsize(filename) // buffer_size) + 1
+    return generate_digests(
+        filename, [hash_method], buffer_size=buffer_size, use_mmap=use_mmap,
+        cache=cache, digest_length=digest_length,
+        progress=progress)[hash_method]
 
-    hash_digest = getattr(hashlib, hash_method)()
 
-    with open(filename, 'rb') as f:
-        generator = (f.read(buffer_size) for _ in range(blocks))
-        for data in generator:
-            hash_digest.update(data)
+def generate_digests(filename, hash_methods, buffer_size=None, use_mmap=None,
+                     cache=None, digest_length=None, progress=None):
+    """Generates a digest for each hash method while only reading the file
+    once; every block read is fed to all hash objects before the next block is
+    read.
+
+    Args:
+        filename (str): Filename of binary file.
+        hash_methods (list[str]): exact names of hashlib methods used for
+            digest generation.
+        buffer_size (int, optional): Size of blocks read into memory.
+        use_mmap (bool, optional): Memory map the file instead of reading it.
+        cache (obj:`DigestCache`, optional): Cache consulted before reading
+            the file.
+        digest_length (int, optional): Length of the hexadecimal digest
+            produced by SHAKE methods.
+        progress (obj:`ProgressMeter` or callable, optional): Observer
+            notified periodically while the file is read.
+
+    Returns:
+        dict: Hash digests generated from binary file keyed by hash method.
+    """
+
+    if cache is not None:
+        return cache.generate_digests(
+            filename, hash_methods, buffer_size=buffer_size,
+            use_mmap=use_mmap, digest_length=digest_length, progress=progress)
+
+    progress = ProgressMeter.wrap(progress)
+    if progress is not None and progress.total_bytes is None:
+        progress.total_bytes = os.path.getsize(filename)
+
+    # Unbuffered reads go straight into read_blocks()'s buffer
+    with open(filename, 'rb', buffering=0) as f:
+        return generate_stream_digests(
+            f, hash_methods, buffer_size=buffer_size, use_mmap=use_mmap,
+            digest_length=digest_length, progress=progress)
+
+
+def generate_stream_digests(stream, hash_methods, buffer_size=None,
+                            use_mmap=None, digest_length=None, progress=None):
+    """Generates a digest for each hash method from a stream that may only be
+    read once, such as stdin, a pipe, or a socket.  Memory use is bounded by
+    the buffer size regardless of how much data the stream produces.
+
+    Args:
+        stream (obj): Readable binary file object, or an iterable of
+            bytes-like buffers.
+        hash_methods (list[str]): exact names of hashlib methods used for
+            digest generation.
+        buffer_size (int, optional): Size of blocks read from file objects.
+        use_mmap (bool, optional): Memory map file objects backed by a
+            regular file instead of reading them.
+        digest_length (int, optional): Length of the hexadecimal digest
+            produced by SHAKE methods.
+        progress (obj:`ProgressMeter` or callable, optional): Observer
+            notified periodically while the stream is read.
+
+    Returns:
+        dict: Hash digests generated from stream keyed by hash method.
+    """
+
+    hash_digests = [(method, hash_constructor(method)())
+                    for method in hash_methods]
+
+    if hasattr(stream, 'read'):
+        stream = read_blocks(stream, buffer_size=buffer_size,
+                             use_mmap=use_mmap)
+
+    progress = ProgressMeter.wrap(progress)
+    if progress is None:
+        for data in stream:
+            for _, hash_digest in hash_digests:
+                hash_digest.update(data)
+    else:
+        # Same loop, timed so read and hash time can be told apart
+        blocks = iter(stream)
+        progress.start()
+        while True:
+            read_start = TIMER()
+            data = next(blocks, None)
+            if data is None:
+                break
+
+            hash_start = TIMER()
+            for _, hash_digest in hash_digests:
+                hash_digest.update(data)
+
+            progress.record(len(data), hash_start - read_start,
+                            TIMER() - hash_start)
+        progress.finish()
+
+    return dict((method, hexdigest(hash_digest, digest_length))
+                for method, hash_digest in hash_digests)
+
+
+def hash_constructor(hash_method):
+    """Looks up the hashlib constructor of a hash method.  Before Python 3.6,
+    SHA-3 and SHAKE come from the sha3 backport, which is only imported the
+    first time one of them is requested.
+
+    Args:
+        hash_method (str): exact name of hashlib method.
+
+    Returns:
+        callable: hashlib constructor.
+
+    Raises:
+        AttributeError: hashlib has no such method.
+    """
+
+    if (not hasattr(hashlib, hash_method) and sys.version_info < (3, 6) and
+            hash_method.startswith(('sha3_', 'shake_'))):
+        # noinspection PyUnresolvedReferences
+        import sha3  # Adds SHA-3 and SHAKE to hashlib
+
+    return getattr(hashlib, hash_method)
+
+
+def hexdigest(hash_digest, digest_length=None):
+    """Retrieves the hexadecimal digest of a hash object, including variable
+    length SHAKE hash objects.
+
+    Args:
+        hash_digest (obj): hashlib object.
+        digest_length (int, optional): Length of the hexadecimal digest
+            produced by SHAKE methods; defaults to SHAKE_LENGTHS.  Ignored by
+            fixed length methods.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+
+    if hash_digest.name in SHAKE_LENGTHS:
+        length = digest_length or SHAKE_LENGTHS[hash_digest.name]
+        return hash_digest.hexdigest(length // 2)
 
     return hash_digest.hexdigest()
 
 
+def read_blocks(f, buffer_size=None, use_mmap=None, sparse=None):
+    """Generator that reads an open binary file until EOF in blocks of at most
+    `buffer_size` bytes.
+
+    Blocks are memoryview slices of a single preallocated buffer (or of the
+    memory mapped file) and are released once the next block is requested, so
+    callers must copy any block they want to keep.  Files are read until EOF
+    rather than up to a precomputed size, so files that grow while being read
+    are read in full; memory mapped and sparse files are read from the
+    current position up to their size when opened.
+
+    Holes in sparse files are never read: each one is yielded as blocks of a
+    single reusable buffer of zeros, so digests are identical to those of a
+    full read while only the allocated data is read from disk.
+
+    Args:
+        f (obj): Binary file object opened for reading.  File objects without
+            a file descriptor (e.g. io.BytesIO) are always read.
+        buffer_size (int, optional): Size of blocks read into memory; tuned
+            by tune_buffer_size() if not provided.
+        use_mmap (bool, optional): Memory map the file instead of reading it;
+            defaults to True for regular files of at least MMAP_THRESHOLD
+            bytes.
+        sparse (bool, optional): Skip reading holes; defaults to True for
+            regular files with fewer allocated blocks than their size, when
+            the OS and file system support SEEK_DATA.  Takes precedence over
+            `use_mmap`.
+
+    Yields:
+        memoryview: Next block of file contents.
+    """
+
+    try:
+        file_stat = os.fstat(f.fileno())
+    except (AttributeError, OSError, ValueError):
+        file_stat = None
+
+    buffer_size = buffer_size or tune_buffer_size(file_stat)
+
+    if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
+        use_mmap = sparse = False
+    else:
+        if use_mmap is None:
+            use_mmap = MMAP_SUPPORTED and file_stat.st_size >= MMAP_THRESHOLD
+        if sparse is None:
+            sparse = is_sparse(file_stat)
+        sparse = sparse and _seek_data_supported(f.fileno())
+
+    if sparse:
+        blocks = _sparse_blocks(f, buffer_size, file_stat.st_size)
+    # Empty files can't be memory mapped
+    elif use_mmap and file_stat.st_size:
+        blocks = _mapped_blocks(f, buffer_size)
+    else:
+        blocks = _buffered_blocks(f, buffer_size)
+
+    for block in blocks:
+        try:
+            yield block
+        finally:
+            # Python 2 memoryviews can't be released
+            if hasattr(block, 'release'):
+                block.release()
+
+
+def read_range(f, offset, length, buffer_size=None):
+    """Generator that reads at most `length` bytes of an open binary file,
+    starting at `offset`, in blocks of at most `buffer_size` bytes.  Used to
+    hash one section of a file without reading the rest of it; blocks follow
+    the same reuse rules as read_blocks().
+
+    Args:
+        f (obj): Seekable binary file object opened for reading.
+        offset (int): Position of the first byte read.
+        length (int): Maximum number of bytes read; fewer are read if EOF is
+            reached first.
+        buffer_size (int, optional): Size of blocks read into memory
+            (default: MAX_BUFFER_SIZE).
+
+    Yields:
+        memoryview: Next block of file contents.
+    """
+
+    buffer_size = min(buffer_size or MAX_BUFFER_SIZE, max(length, 1))
+    view = memoryview(bytearray(buffer_size))
+
+    f.seek(offset)
+    remaining = length
+    while remaining:
+        read_size = f.readinto(view[:min(remaining, buffer_size)])
+        if not read_size:
+            break
+
+        remaining -= read_size
+        block = view[:read_size]
+        try:
+            yield block
+        finally:
+            if hasattr(block, 'release'):
+                block.release()
+
+
+def _buffered_blocks(f, buffer_size):
+    """Generator that reads blocks into one reusable buffer via readinto(),
+    falling back to read() for file objects that don't implement it."""
+
+    if not hasattr(f, 'readinto'):
+        block = f.read(buffer_size)
+        while block:
+            yield memoryview(block)
+            block = f.read(buffer_size)
+        return
+
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+
+    read_size = f.readinto(buffer)
+    while read_size:
+        yield view[:read_size]
+        read_size = f.readinto(buffer)
+
+
+def _mapped_blocks(f, buffer_size):
+    """Generator that slices blocks directly out of a read-only memory map of
+    the file, starting at the file's current position like a read would; no
+    data is copied into user space buffers.  The file is left positioned at
+    the end of the map."""
+
+    start = f.tell()
+    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mapped, 'madvise'):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+    view = memoryview(mapped)
+    try:
+        for offset in range(start, len(mapped), buffer_size):
+            yield view[offset:offset + buffer_size]
+        f.seek(max(start, len(mapped)))
+    finally:
+        view.release()
+        mapped.close()
+
+
+def is_sparse(file_stat):
+    """bool: True if a file has fewer blocks allocated than its size needs,
+    i.e. it has holes that don't have to be read."""
+
+    blocks = getattr(file_stat, 'st_blocks', None)
+    return (SPARSE_SUPPORTED and blocks is not None and
+            blocks * 512 < file_stat.st_size)
+
+
+def _seek_data_supported(fd):
+    """bool: True if the file system holding an open file can find data
+    extents with SEEK_DATA."""
+
+    if not SPARSE_SUPPORTED:
+        return False
+
+    offset = os.lseek(fd, 0, os.SEEK_CUR)
+    try:
+        os.lseek(fd, 0, os.SEEK_DATA)
+    except OSError as e:
+        # ENXIO: supported, but the file is one hole
+        return e.errno == errno.ENXIO
+    finally:
+        os.lseek(fd, offset, os.SEEK_SET)
+    return True
+
+
+def data_extents(fd, size, position=0):
+    """Generator that finds the data extents of a file with SEEK_DATA and
+    SEEK_HOLE; everything between them is a hole that reads as zeros.  The
+    file offset is restored after every lookup.
+
+    Args:
+        fd (int): File descriptor of a file on a file system that supports
+            SEEK_DATA.
+        size (int): Size of the file; extents are clipped to it.
+        position (int, optional): Offset the search starts from; an extent
+            containing it starts at `position`.
+
+    Yields:
+        tuple: (start, end) byte offsets of the next data extent, end
+            exclusive.
+    """
+
+    while position < size:
+        offset = os.lseek(fd, 0, os.SEEK_CUR)
+        try:
+            start = os.lseek(fd, position, os.SEEK_DATA)
+            end = os.lseek(fd, start, os.SEEK_HOLE)
+        except OSError as e:
+            # No data left after `position`
+            if e.errno == errno.ENXIO:
+                return
+            raise
+        finally:
+            os.lseek(fd, offset, os.SEEK_SET)
+
+        if start >= size:
+            return
+        yield start, min(end, size)
+        position = end
+
+
+def _sparse_blocks(f, buffer_size, size):
+    """Generator that reads the data extents of a sparse file into one
+    reusable buffer and yields its holes as slices of a buffer of zeros,
+    starting at the file's current position like a read would.  The file is
+    left positioned at `size`."""
+
+    view = memoryview(bytearray(buffer_size))
+    zeros = memoryview(bytearray(buffer_size))
+
+    def holes(length):
+        for offset in range(0, length, buffer_size):
+            yield zeros[:min(buffer_size, length - offset)]
+
+    position = f.tell()
+    for start, end in data_extents(f.fileno(), size, position):
+        for block in holes(start - position):
+            yield block
+
+        f.seek(start)
+        remaining = end - start
+        while remaining:
+            read_size = f.readinto(view[:min(remaining, buffer_size)])
+            # Truncated while being read
+            if not read_size:
+                return
+
+            remaining -= read_size
+            yield view[:read_size]
+        position = end
+
+    for block in holes(size - position):
+        yield block
+    f.seek(max(position, size))
+
+
+def tune_buffer_size(file_stat):
+    """Picks a buffer size for a file: roughly 1/16th of the file, rounded up
+    to a power of two and to a multiple of the file system's preferred block
+    size, then clamped between MIN_BUFFER_SIZE and MAX_BUFFER_SIZE.  Small
+    files are read in as few calls as possible while large files amortize
+    per-call overhead without holding more than MAX_BUFFER_SIZE in memory.
+
+    Args:
+        file_stat (obj:`stat_result`): Result of os.stat() for the file, or
+            None if the file can't be stat'd.
+
+    Returns:
+        int: Buffer size in bytes.
+    """
+
+    if file_stat is None:
+        return MIN_BUFFER_SIZE
+
+    buffer_size = MIN_BUFFER_SIZE
+    while buffer_size < file_stat.st_size // 16 and \
+            buffer_size < MAX_BUFFER_SIZE:
+        buffer_size *= 2
+
+    block_size = getattr(file_stat, 'st_blksize', 0) or 1
+    buffer_size = -(-buffer_size // block_size) * block_size
+
+    return min(buffer_size, max(MAX_BUFFER_SIZE, block_size))
+
+
+class ProgressMeter(object):
+    """Observer that tracks how much of a file has been hashed, and how long
+    was spent reading versus hashing it.  The callback is invoked at most
+    once per `interval` seconds (or `interval_bytes` bytes, if provided) and
+    once more when hashing finishes.
+
+    Read time much larger than hash time means digest generation is bound by
+    I/O; the opposite means it's bound by CPU.
+
+    Args:
+        callback (callable): Called with the ProgressMeter as its only
+            argument.
+        interval (float, optional): Minimum seconds between callbacks.
+        interval_bytes (int, optional): Bytes between callbacks; overrides
+            `interval`.
+        total_bytes (int, optional): Expected number of bytes, if known.
+
+    Attributes:
+        bytes_hashed (int): Bytes hashed so far.
+        total_bytes (int): Expected number of bytes, or None if unknown.
+        read_time (float): Seconds spent waiting on reads.
+        hash_time (float): Seconds spent updating hash objects.
+        rate (float): Bytes per second since the previous callback.
+        finished (bool): Hashing has completed.
+    """
+
+    def __init__(self, callback, interval=0.2, interval_bytes=None,
+                 total_bytes=None):
+        self.callback = callback
+        self.interval = interval
+        self.interval_bytes = interval_bytes
+        self.total_bytes = total_bytes
+
+        self.bytes_hashed = 0
+        self.read_time = self.hash_time = self.rate = 0.0
+        self.finished = False
+
+        self._start_time = self._last_time = None
+        self._last_bytes = 0
+
+    @classmethod
+    def wrap(cls, progress):
+        """ProgressMeter: `progress` itself, a ProgressMeter wrapping a bare
+        callback, or None."""
+
+        if progress is None or isinstance(progress, cls):
+            return progress
+        return cls(progress)
+
+    @property
+    def elapsed(self):
+        """float: Seconds since hashing started."""
+        return TIMER() - self._start_time if self._start_time else 0.0
+
+    @property
+    def eta(self):
+        """float: Estimated seconds remaining, or None if unknown."""
+
+        if not self.total_bytes or not self.rate:
+            return None
+        return max(self.total_bytes - self.bytes_hashed, 0) / self.rate
+
+    @property
+    def metrics(self):
+        """dict: Structured snapshot of the meter's counters."""
+        return {'bytes': self.bytes_hashed, 'total_bytes': self.total_bytes,
+                'elapsed': self.elapsed, 'read_seconds': self.read_time,
+                'hash_seconds': self.hash_time, 'bytes_per_second': self.rate}
+
+    def start(self):
+        """Marks the beginning of hashing."""
+        self._start_time = self._last_time = TIMER()
+
+    def record(self, size, read_time, hash_time):
+        """Records one block and notifies the callback if it's due.
+
+        Args:
+            size (int): Size of the block in bytes.
+            read_time (float): Seconds spent reading the block.
+            hash_time (float): Seconds spent hashing the block.
+        """
+
+        self.bytes_hashed += size
+        self.read_time += read_time
+        self.hash_time += hash_time
+
+        now = TIMER()
+        if self.interval_bytes:
+            due = self.bytes_hashed - self._last_bytes >= self.interval_bytes
+        else:
+            due = now - self._last_time >= self.interval
+
+        if due:
+            self._notify(now)
+
+    def finish(self):
+        """Marks the end of hashing and notifies the callback."""
+        self.finished = True
+        self._notify(TIMER())
+
+    def _notify(self, now):
+        """Updates the instantaneous rate and invokes the callback."""
+
+        if now > self._last_time:
+            self.rate = (self.bytes_hashed - self._last_bytes) / (
+                now - self._last_time)
+
+        self._last_time, self._last_bytes = now, self.bytes_hashed
+        self.callback(self)
+
+
 def compare_digests(digest_1, digest_2):
     """
     Args:
@@ -0,0 +1,162 @@
+"""Asyncio front end for generating hash digests without blocking the event
+loop.  Requires Python 3.6+.
+
+Digests are generated on an executor (the event loop's default thread pool
+unless one is provided); hashlib releases the GIL while hashing large blocks,
+so worker threads hash in parallel with each other and with the event loop.
+Cancelling a coroutine stops its worker at the next block boundary rather
+than letting it read the rest of the file in the background.
+"""
+
+import asyncio
+import functools
+import itertools
+import threading
+import collections
+
+import hashchk
+
+DigestResult = collections.namedtuple(
+    'DigestResult', ['filename', 'digests', 'error'])
+
+
+def _checked_blocks(blocks, cancelled):
+    """Generator that passes blocks through until `cancelled` is set."""
+
+    for block in blocks:
+        if cancelled.is_set():
+            raise asyncio.CancelledError()
+        yield block
+
+
+def _generate_digests(filename, hash_methods, cancelled, digest_length=None,
+                      buffer_size=None, use_mmap=None):
+    """Executor target equivalent to hashchk.generate_digests() that gives up
+    once `cancelled` is set."""
+
+    with open(filename, 'rb', buffering=0) as f:
+        blocks = hashchk.read_blocks(
+            f, buffer_size=buffer_size, use_mmap=use_mmap)
+        return hashchk.generate_stream_digests(
+            _checked_blocks(blocks, cancelled), hash_methods,
+            digest_length=digest_length)
+
+
+async def agenerate_digests(filename, hash_methods, executor=None,
+                            digest_length=None, **read_options):
+    """Asynchronous equivalent of hashchk.generate_digests().
+
+    Args:
+        filename (str): Filename of binary file.
+        hash_methods (list[str]): exact names of hashlib methods used for
+            digest generation.
+        executor (obj:`Executor`, optional): Executor digests are generated
+            on; defaults to the event loop's default executor.
+        digest_length (int, optional): Length of the hexadecimal digest
+            produced by SHAKE methods.
+        **read_options: buffer_size and use_mmap, see hashchk.read_blocks().
+
+    Returns:
+        dict: Hash digests generated from binary file keyed by hash method.
+    """
+
+    # get_event_loop() is deprecated inside coroutines from 3.7 on
+    loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)()
+    cancelled = threading.Event()
+
+    future = loop.run_in_executor(executor, functools.partial(
+        _generate_digests, filename, hash_methods, cancelled,
+        digest_length=digest_length, **read_options))
+    try:
+        return await future
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+
+
+async def agenerate_digest(filename, hash_method, executor=None,
+                           digest_length=None, **read_options):
+    """Asynchronous equivalent of hashchk.generate_digest().
+
+    Args:
+        filename (str): Filename of binary file.
+        hash_method (str): exact name of hashlib method used for digest
+            generation.
+        executor (obj:`Executor`, optional): Executor digest is generated on.
+        digest_length (int, optional): Length of the hexadecimal digest
+            produced by SHAKE methods.
+        **read_options: buffer_size and use_mmap, see hashchk.read_blocks().
+
+    Returns:
+        str: Hash digest generated from binary file.
+    """
+
+    digests = await agenerate_digests(
+        filename, [hash_method], executor=executor,
+        digest_length=digest_length, **read_options)
+    return digests[hash_method]
+
+
+async def _digest_result(filename, hash_methods, executor, read_options):
+    """DigestResult: digests of a file, or the IO error raised reading it."""
+
+    try:
+        digests = await agenerate_digests(
+            filename, hash_methods, executor=executor, **read_options)
+    except (IOError, OSError) as e:
+        return DigestResult(filename, None, e)
+
+    return DigestResult(filename, digests, None)
+
+
+async def agather_digests(filenames, hash_methods, limit=4, executor=None,
+                          **read_options):
+    """Asynchronous generator that hashes many files with at most `limit`
+    files in flight, yielding results in the order they finish.
+
+    Closing the generator, or cancelling the task iterating over it, cancels
+    every file still in flight.
+
+    Args:
+        filenames (iterable[str]): Filenames of binary files.
+        hash_methods (list[str]): exact names of hashlib methods used for
+            digest generation.
+        limit (int, optional): Maximum number of files hashed concurrently.
+        executor (obj:`Executor`, optional): Executor digests are generated
+            on.
+        **read_options: digest_length, buffer_size, and use_mmap; see
+            agenerate_digests().
+
+    Yields:
+        DigestResult: `digests` keyed by hash method, or `error` holding the
+            IO error raised while reading the file.
+    """
+
+    filenames = iter(filenames)
+    pending = set()
+
+    def submit():
+        """Starts hashing the next file, if any are left."""
+        for filename in itertools.islice(filenames, 1):
+            pending.add(asyncio.ensure_future(_digest_result(
+                filename, hash_methods, executor, read_options)))
+
+    try:
+        for _ in range(limit):
+            submit()
+
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                pending.discard(task)
+                submit()
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,235 @@
+"""Persistent cache of generated hash digests.
+
+Digests are keyed by the device, inode, size, and modification time of the
+file they were generated from, so an unchanged file is only read once no
+matter how many times it's verified.  Entries are stored in an SQLite database
+bounded to `max_entries` rows; the least recently used rows are evicted first.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+# -----------------------------------------------------------------------------
+
+import os
+import stat
+
+import hashchk
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'sealant', 'hashchk_cache.sqlite')
+DEFAULT_MAX_ENTRIES = 100000
+
+
+def file_key(filename):
+    """Builds the cache key for a file from its stat metadata.
+
+    Args:
+        filename (str): Filename of binary file.
+
+    Returns:
+        tuple: (device, inode, size, mtime_ns), or None if the file isn't a
+            regular file and can't be cached.
+    """
+
+    file_stat = os.stat(filename)
+    if not stat.S_ISREG(file_stat.st_mode):
+        return None
+
+    mtime_ns = getattr(file_stat, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(file_stat.st_mtime * 1e9)
+
+    return (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, mtime_ns)
+
+
+class DigestCache(object):
+    """LRU cache of hash digests persisted to an SQLite database.
+
+    Args:
+        path (str, optional): Filename of the SQLite database; created along
+            with any missing directories if it doesn't exist.
+        max_entries (int, optional): Maximum number of cached digests.
+
+    Attributes:
+        path (str): Filename of the SQLite database.
+        max_entries (int): Maximum number of cached digests.
+        hits (int): Number of digests served from the cache.
+        misses (int): Number of digests that had to be generated.
+        bytes_saved (int): Number of bytes that didn't have to be read because
+            every requested digest was cached.
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_entries = max_entries
+
+        self.hits = self.misses = self.bytes_saved = 0
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # Only imported once a cache is opened
+        import sqlite3
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS digests (
+                device INTEGER, inode INTEGER, size INTEGER,
+                mtime_ns INTEGER, hash_method TEXT, digest TEXT,
+                last_used INTEGER,
+                PRIMARY KEY (device, inode, size, mtime_ns, hash_method))""")
+        self.connection.execute(
+            """CREATE INDEX IF NOT EXISTS digests_last_used
+                ON digests (last_used)""")
+
+        # Monotonic counter used for LRU ordering; wall clock timestamps are
+        # too coarse to order lookups made in quick succession
+        self._clock = self.connection.execute(
+            "SELECT COALESCE(MAX(last_used), 0) FROM digests").fetchone()[0]
+
+        # Counted once; store() tracks the rows it adds and evicts, so a full
+        # table scan isn't needed per digest.  Rows stored through other
+        # connections are counted when the cache is next opened.
+        self._entries = self.connection.execute(
+            "SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Commits pending changes and closes the database connection."""
+        self.connection.commit()
+        self.connection.close()
+
+    @property
+    def stats(self):
+        """dict: Hit, miss, and saved byte counters."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'bytes_saved': self.bytes_saved}
+
+    def _tick(self):
+        """int: Next value of the LRU clock."""
+        self._clock += 1
+        return self._clock
+
+    def lookup(self, key, hash_method):
+        """Retrieves a cached digest and marks it as recently used.
+
+        Args:
+            key (tuple): Cache key built by file_key().
+            hash_method (str): exact name of hashlib method.
+
+        Returns:
+            str: Cached digest, or None if not cached.
+        """
+
+        where = """device = ? AND inode = ? AND size = ? AND mtime_ns = ?
+                   AND hash_method = ?"""
+        row = self.connection.execute(
+            "SELECT digest FROM digests WHERE " + where,
+            key + (hash_method,)).fetchone()
+
+        if row is None:
+            return None
+
+        self.connection.execute(
+            "UPDATE digests SET last_used = ? WHERE " + where,
+            (self._tick(),) + key + (hash_method,))
+        return row[0]
+
+    def store(self, key, hash_method, digest):
+        """Caches a digest, evicting the least recently used digests if the
+        cache is full.
+
+        Args:
+            key (tuple): Cache key built by file_key().
+            hash_method (str): exact name of hashlib method.
+            digest (str): Generated hash digest.
+        """
+
+        # Replacing a cached digest doesn't add a row, so the new row is
+        # only counted when nothing was replaced
+        replaced = self.connection.execute(
+            """UPDATE digests SET digest = ?, last_used = ?
+                WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ?
+                AND hash_method = ?""",
+            (digest, self._tick()) + key + (hash_method,)).rowcount
+        if replaced:
+            return
+
+        # OR REPLACE: another connection may have stored it in the meantime
+        self.connection.execute(
+            "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)",
+            key + (hash_method, digest, self._tick()))
+        self._entries += 1
+
+        if self._entries > self.max_entries:
+            self._entries -= self.connection.execute(
+                """DELETE FROM digests WHERE rowid IN (
+                    SELECT rowid FROM digests ORDER BY last_used LIMIT ?)""",
+                (self._entries - self.max_entries,)).rowcount
+
+    def generate_digests(self, filename, hash_methods, refresh=False,
+                         digest_length=None, **read_options):
+        """Cached equivalent of hashchk.generate_digests(); only hash methods
+        without a cached digest are generated, all in a single read.
+
+        Digests are only stored if the file's stat metadata is unchanged after
+        reading it, so a file modified mid-read is never cached.
+
+        Args:
+            filename (str): Filename of binary file.
+            hash_methods (list[str]): exact names of hashlib methods used for
+                digest generation.
+            refresh (bool, optional): Ignore cached digests and regenerate
+                (and re-cache) every digest.
+            digest_length (int, optional): Length of the hexadecimal digest
+                produced by SHAKE methods.
+            **read_options: Passed through to hashchk.generate_digests().
+
+        Returns:
+            dict: Hash digests generated from binary file keyed by hash method.
+        """
+
+        key = file_key(filename)
+
+        # SHAKE digests of different lengths are cached separately
+        def cached_name(method):
+            if method in hashchk.SHAKE_LENGTHS:
+                return '{}:{}'.format(method, digest_length or
+                                      hashchk.SHAKE_LENGTHS[method])
+            return method
+
+        digests = {}
+        if key is not None and not refresh:
+            for method in hash_methods:
+                digest = self.lookup(key, cached_name(method))
+                if digest is not None:
+                    digests[method] = digest
+
+        missing = [method for method in hash_methods if method not in digests]
+        self.hits += len(digests)
+        self.misses += len(missing)
+
+        if missing:
+            generated = hashchk.generate_digests(
+                filename, missing, digest_length=digest_length,
+                **read_options)
+            digests.update(generated)
+
+            if key is not None and key == file_key(filename):
+                for method, digest in generated.items():
+                    self.store(key, cached_name(method), digest)
+        elif key is not None:
+            self.bytes_saved += key[2]
+
+        self.connection.commit()
+        return digests
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,214 @@
+"""Thin client for the `hashchk serve` daemon (see hashchk_server).
+
+The daemon listens on a Unix domain socket and speaks JSON lines: every
+request is a JSON object on its own line, and every response is a JSON object
+on its own line carrying the `id` of the request it answers.  Requests may be
+pipelined; responses are written as soon as each one completes, so they can
+arrive out of order.
+
+    {"id": 1, "command": "generate", "binary": "/abs/file",
+     "hash_functions": ["sha256"]}
+    {"id": 1, "digests": {"sha256": "..."}}
+
+Only the modules needed to talk to the socket are imported here, so a client
+process starts quickly.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+# -----------------------------------------------------------------------------
+
+import os
+import json
+import socket
+import itertools
+
+DEFAULT_SOCKET_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'sealant', 'hashchk.sock')
+
+# Set to a socket path to send `hashchk verify` and `hashchk generate` to a
+# running daemon without changing the command line
+SOCKET_ENVIRONMENT_VARIABLE = 'HASHCHK_SOCKET'
+
+# Values of a response's `error_type`
+IO_ERROR, REQUEST_ERROR, SERVER_ERROR = 'io', 'request', 'server'
+
+# Requests a single connection may have in flight.  The daemon stops reading
+# a connection at this limit, so clients must read responses before sending
+# more requests.
+MAX_PENDING = 64
+
+# Seconds a client waits for the next response before giving up
+DEFAULT_TIMEOUT = 300
+
+
+def encode_message(message):
+    """bytes: JSON line holding `message`."""
+    return (json.dumps(message, sort_keys=True) + '\n').encode('utf-8')
+
+
+def decode_message(line):
+    """dict: Message held by a JSON line.
+
+    Raises:
+        ValueError: Line isn't a JSON object.
+    """
+
+    message = json.loads(line.decode('utf-8'))
+    if not isinstance(message, dict):
+        raise ValueError("Messages must be JSON objects")
+    return message
+
+
+class HashchkClient(object):
+    """Connection to a `hashchk serve` daemon.
+
+    Args:
+        path (str, optional): Filename of the daemon's Unix domain socket.
+        timeout (float, optional): Seconds to wait for a response before
+            socket.timeout is raised (default: DEFAULT_TIMEOUT); None waits
+            forever.
+
+    Attributes:
+        path (str): Filename of the daemon's Unix domain socket.
+
+    Raises:
+        socket.error: No daemon is listening on `path`.
+    """
+
+    def __init__(self, path=None, timeout=DEFAULT_TIMEOUT):
+        self.path = path or DEFAULT_SOCKET_PATH
+        self._ids = itertools.count()
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        try:
+            self.socket.connect(self.path)
+        except socket.error:
+            self.socket.close()
+            raise
+
+        self._responses = self.socket.makefile('rb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the connection."""
+        self._responses.close()
+        self.socket.close()
+
+    def request(self, requests):
+        """Pipelines requests, keeping up to MAX_PENDING of them in flight
+        and sending more as responses arrive.
+
+        Args:
+            requests (list[dict]): Requests without an `id`; ids are assigned
+                by the client.
+
+        Returns:
+            list[dict]: Responses, in the same order as `requests`.
+
+        Raises:
+            IOError: The daemon closed the connection early.
+        """
+
+        ids = []
+        messages = []
+        for request in requests:
+            request = dict(request, id=next(self._ids))
+            ids.append(request['id'])
+            messages.append(encode_message(request))
+
+        # Sending everything up front deadlocks once the daemon stops
+        # reading and blocks writing responses this client isn't reading
+        responses, sent = {}, 0
+        while len(responses) < len(ids):
+            window = min(len(ids), len(responses) + MAX_PENDING)
+            if sent < window:
+                self.socket.sendall(b''.join(messages[sent:window]))
+                sent = window
+
+            line = self._responses.readline()
+            if not line:
+                raise IOError("Connection closed by hashchk daemon")
+
+            response = decode_message(line)
+            responses[response.get('id')] = response
+
+        return [responses[request_id] for request_id in ids]
+
+    @staticmethod
+    def check_response(response):
+        """Raises the error held by a response, if any.
+
+        Args:
+            response (dict): Response returned by request().
+
+        Returns:
+            dict: `response`.
+
+        Raises:
+            IOError: The daemon couldn't read the binary, or failed while
+                processing the request.
+            ValueError: The daemon rejected the request.
+        """
+
+        if 'error' not in response:
+            return response
+        if response.get('error_type') in (IO_ERROR, SERVER_ERROR):
+            raise IOError(response['error'])
+        raise ValueError(response['error'])
+
+    def generate_digests(self, filename, hash_methods, digest_length=None,
+                         buffer_size=None):
+        """Daemon equivalent of hashchk.generate_digests().
+
+        Args:
+            filename (str): Filename of binary file; relative filenames are
+                resolved against this process's CWD, not the daemon's.
+            hash_methods (list[str]): exact names of hashlib methods used for
+                digest generation.
+            digest_length (int, optional): Length of SHAKE digests.
+            buffer_size (int, optional): Size of blocks read into memory.
+
+        Returns:
+            dict: Hash digests generated from binary file keyed by hash method.
+        """
+
+        response, = self.request([{
+            'command': 'generate', 'binary': os.path.abspath(filename),
+            'hash_functions': list(hash_methods),
+            'digest_length': digest_length, 'buffer_size': buffer_size}])
+        return self.check_response(response)['digests']
+
+    def verify_digest(self, filename, digest, hash_method=None, family=None):
+        """Verifies a binary against a reference digest on the daemon.
+
+        Args:
+            filename (str): Filename of binary file.
+            digest (str): Reference hash digest.
+            hash_method (str, optional): exact name of hashlib method; every
+                candidate method is tried if not provided.
+            family (str, optional): Hash family preferred during detection.
+
+        Returns:
+            dict: `match` (bool), `hash_method`, and `generated_digest`.
+        """
+
+        response, = self.request([{
+            'command': 'verify', 'binary': os.path.abspath(filename),
+            'digest': digest, 'hash_function': hash_method,
+            'family': family}])
+        return self.check_response(response)
+
+    def ping(self):
+        """bool: True once the daemon has answered."""
+        return 'error' not in self.request([{'command': 'ping'}])[0]
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,238 @@
+"""Functions for finding duplicate files without hashing every file in full.
+
+Candidates are narrowed in stages, and each stage only reads files that
+still have a potential duplicate:
+
+    1. Files are grouped by size from directory metadata alone; files with a
+       unique size can't have a duplicate and are never opened.
+    2. Files sharing a size are grouped by a digest of their first and last
+       PARTIAL_SIZE bytes.  Files of at most 2 * PARTIAL_SIZE bytes are read
+       whole at this stage, so their digest is already final.
+    3. The remaining candidates are grouped by the digest of their full
+       contents, generated in parallel.
+
+Hard links to an inode that was already found are skipped, since they don't
+take up any extra space.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+# -----------------------------------------------------------------------------
+
+import os
+import itertools
+import collections
+
+import hashchk
+import hashchk_snapshot
+
+PARTIAL_SIZE = 4096
+DEFAULT_HASH_METHOD = 'sha256'
+
+DuplicateGroup = collections.namedtuple(
+    'DuplicateGroup', ['size', 'digest', 'filenames'])
+
+DedupeReport = collections.namedtuple(
+    'DedupeReport', ['groups', 'scanned', 'partially_read', 'fully_read',
+                     'errors'])
+
+
+def bytes_saved(groups):
+    """int: Bytes reclaimed by keeping one file of every duplicate group."""
+    return sum(group.size * (len(group.filenames) - 1) for group in groups)
+
+
+def find_files(paths, min_size=1):
+    """Walks files and directory trees, collecting regular files by size.
+
+    Args:
+        paths (iterable[str]): Filenames and directories to search.
+        min_size (int, optional): Smallest file size considered, in bytes.
+
+    Returns:
+        tuple: (dict of filename lists keyed by size, number of files found,
+            list of (filename, message) errors).
+    """
+
+    sizes = collections.defaultdict(list)
+    inodes, errors, found = set(), [], 0
+
+    for path in paths:
+        if os.path.isdir(path):
+            results = ((os.path.join(path, hashchk_snapshot.fsdecode(name)),
+                        result) for name, result in
+                       hashchk_snapshot.walk_files(path))
+        else:
+            try:
+                results = [(path, os.stat(path))]
+            except (IOError, OSError) as e:
+                results = [(path, e)]
+
+        for filename, result in results:
+            if isinstance(result, (IOError, OSError)):
+                errors.append((filename, str(result)))
+                continue
+
+            inode = (result.st_dev, result.st_ino)
+            if inode in inodes or result.st_size < min_size:
+                continue
+            inodes.add(inode)
+
+            sizes[result.st_size].append(filename)
+            found += 1
+
+    return sizes, found, errors
+
+
+def partial_digest(filename, size, hash_method=DEFAULT_HASH_METHOD):
+    """Generates a digest of the first and last PARTIAL_SIZE bytes of a file,
+    or of the whole file if it's no larger than 2 * PARTIAL_SIZE bytes.
+
+    Args:
+        filename (str): Filename of binary file.
+        size (int): Size of the file in bytes.
+        hash_method (str, optional): exact name of hashlib method.
+
+    Returns:
+        str: Hexadecimal digest; equal to the full digest of files no larger
+            than 2 * PARTIAL_SIZE bytes.
+    """
+
+    digest = hashchk.hash_constructor(hash_method)()
+    with open(filename, 'rb', buffering=0) as f:
+        if size <= 2 * PARTIAL_SIZE:
+            for block in hashchk.read_range(f, 0, size):
+                digest.update(block)
+        else:
+            for offset in (0, size - PARTIAL_SIZE):
+                for block in hashchk.read_range(f, offset, PARTIAL_SIZE):
+                    digest.update(block)
+
+    return hashchk.hexdigest(digest)
+
+
+def _digest_or_error(function, filename, *args):
+    """tuple: (digest, None), or (None, error) if the file couldn't be
+    read."""
+
+    try:
+        return function(filename, *args), None
+    except (IOError, OSError) as e:
+        return None, e
+
+
+def _group_digests(function, candidates, workers):
+    """Generates digests of candidate files on a thread pool and groups
+    them, keeping at most `workers * 4` files in flight.
+
+    Args:
+        function (callable): Called as function(filename, size) to generate
+            a digest.
+        candidates (list[tuple]): (size, filename) of every candidate.
+        workers (int): Size of the thread pool.
+
+    Returns:
+        tuple: (dict of filename lists keyed by (size, digest), list of
+            (filename, message) errors).
+    """
+
+    # Only imported once candidates need to be read
+    import concurrent.futures
+
+    groups = collections.defaultdict(list)
+    errors = []
+
+    candidates = iter(candidates)
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        def submit(size, filename):
+            future = executor.submit(
+                _digest_or_error, function, filename, size)
+            pending[future] = (size, filename)
+
+        pending = {}
+        for size, filename in itertools.islice(candidates, workers * 4):
+            submit(size, filename)
+
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                size, filename = pending.pop(future)
+                digest, error = future.result()
+                if error is not None:
+                    errors.append((filename, str(error)))
+                else:
+                    groups[size, digest].append(filename)
+
+            for size, filename in itertools.islice(candidates, len(done)):
+                submit(size, filename)
+
+    return groups, errors
+
+
+def find_duplicates(paths, hash_method=DEFAULT_HASH_METHOD, min_size=1,
+                    workers=None, buffer_size=None):
+    """Finds groups of files with identical contents.
+
+    Args:
+        paths (iterable[str]): Filenames and directories to search.
+        hash_method (str, optional): exact name of hashlib method used for
+            both partial and full digests.
+        min_size (int, optional): Smallest file size considered, in bytes;
+            empty files are skipped by default.
+        workers (int, optional): Number of files read concurrently; defaults
+            to the number of CPUs.
+        buffer_size (int, optional): Size of blocks read into memory while
+            generating full digests.
+
+    Returns:
+        DedupeReport: Duplicate `groups` (largest reclaimable size first),
+            the number of files `scanned`, whose ends were read
+            (`partially_read`), and that were read in full (`fully_read`),
+            and (filename, message) `errors` for files that couldn't be
+            read.
+    """
+
+    # Only imported once files are searched
+    import multiprocessing
+    workers = workers or multiprocessing.cpu_count()
+
+    sizes, scanned, errors = find_files(paths, min_size=min_size)
+
+    # Stage 2: only files sharing a size are opened
+    candidates = [(size, filename) for size, filenames in sizes.items()
+                  if len(filenames) > 1 for filename in filenames]
+    read_whole = sum(1 for size, _ in candidates if size <= 2 * PARTIAL_SIZE)
+    partially_read = len(candidates) - read_whole
+    partial_groups, partial_errors = _group_digests(
+        lambda filename, size: partial_digest(filename, size, hash_method),
+        candidates, workers)
+    errors.extend(partial_errors)
+
+    groups, candidates = [], []
+    for (size, digest), filenames in partial_groups.items():
+        if len(filenames) < 2:
+            continue
+        if size <= 2 * PARTIAL_SIZE:
+            groups.append(DuplicateGroup(size, digest, sorted(filenames)))
+        else:
+            candidates.extend((size, filename) for filename in filenames)
+
+    # Stage 3: full digests of files whose ends match
+    full_groups, full_errors = _group_digests(
+        lambda filename, size: hashchk.generate_digest(
+            filename, hash_method, buffer_size=buffer_size),
+        candidates, workers)
+    errors.extend(full_errors)
+
+    groups.extend(DuplicateGroup(size, digest, sorted(filenames))
+                  for (size, digest), filenames in full_groups.items()
+                  if len(filenames) > 1)
+    groups.sort(key=lambda group: (-bytes_saved([group]), group.filenames))
+
+    return DedupeReport(groups, scanned, partially_read,
+                        read_whole + len(candidates), sorted(errors))
+
+
+if __name__ == '__main__':
+    pass
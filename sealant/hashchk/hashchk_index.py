@@ -0,0 +1,237 @@
+"""Classes and functions for chunk digest indexes, which record a digest for
+every fixed size chunk of a file alongside the digest of the whole file.
+
+An index is written as a JSON sidecar file next to the binary.  When the
+binary later fails verification, the index pinpoints which byte ranges are
+corrupt, and once those ranges have been repaired only the chunks covering
+them need to be read again.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+from six.moves import range
+# -----------------------------------------------------------------------------
+
+import json
+
+import hashchk
+
+DEFAULT_CHUNK_SIZE = 4194304
+INDEX_EXTENSION = '.hcidx'
+INDEX_VERSION = 1
+
+
+def index_filename(filename):
+    """str: Default filename of the sidecar index for a binary."""
+    return filename + INDEX_EXTENSION
+
+
+def _chunk_digests(f, hash_method, chunk_size, buffer_size=None):
+    """Reads a file once, generating the digest of the whole file and of each
+    chunk.
+
+    Args:
+        f (obj): Binary file object opened for reading.
+        hash_method (str): exact name of hashlib method.
+        chunk_size (int): Size of each chunk in bytes.
+        buffer_size (int, optional): Size of blocks read into memory.
+
+    Returns:
+        tuple: (file digest, list of chunk digests, file size)
+    """
+
+    new_hash = hashchk.hash_constructor(hash_method)
+    file_digest, chunk_digest = new_hash(), new_hash()
+    chunks, filled, size = [], 0, 0
+
+    for block in hashchk.read_blocks(f, buffer_size=buffer_size):
+        file_digest.update(block)
+        size += len(block)
+
+        # Slices are only used as temporaries so no reference to the block
+        # outlives its release by read_blocks()
+        offset = 0
+        while offset < len(block):
+            length = min(len(block) - offset, chunk_size - filled)
+            chunk_digest.update(block[offset:offset + length])
+            offset += length
+            filled += length
+
+            if filled == chunk_size:
+                chunks.append(hashchk.hexdigest(chunk_digest))
+                chunk_digest, filled = new_hash(), 0
+
+    if filled or not chunks:
+        chunks.append(hashchk.hexdigest(chunk_digest))
+
+    return hashchk.hexdigest(file_digest), chunks, size
+
+
+def build_index(filename, hash_method='sha256', chunk_size=DEFAULT_CHUNK_SIZE,
+                buffer_size=None):
+    """Builds the chunk digest index of a file in a single read.
+
+    Args:
+        filename (str): Filename of binary file.
+        hash_method (str, optional): exact name of hashlib method.
+        chunk_size (int, optional): Size of each chunk in bytes.
+        buffer_size (int, optional): Size of blocks read into memory.
+
+    Returns:
+        dict: Index holding the hash method, chunk size, file size, file
+            digest, and a list of chunk digests.
+
+    Raises:
+        ValueError: `chunk_size` isn't positive.
+    """
+
+    if chunk_size <= 0:
+        raise ValueError("Chunk size must be positive: {}".format(chunk_size))
+
+    with open(filename, 'rb', buffering=0) as f:
+        digest, chunks, size = _chunk_digests(
+            f, hash_method, chunk_size, buffer_size=buffer_size)
+
+    return {'version': INDEX_VERSION, 'hash_method': hash_method,
+            'chunk_size': chunk_size, 'size': size, 'digest': digest,
+            'chunks': chunks}
+
+
+def write_index(index, filename):
+    """Writes an index to a JSON sidecar file.
+
+    Args:
+        index (dict): Index built by build_index().
+        filename (str): Filename of sidecar file.
+    """
+
+    with open(filename, 'w') as f:
+        json.dump(index, f, indent=1)
+
+
+def load_index(filename):
+    """
+    Args:
+        filename (str): Filename of sidecar file.
+
+    Returns:
+        dict: Index previously written by write_index().
+
+    Raises:
+        ValueError: Index was written by an unsupported version.
+    """
+
+    with open(filename, 'r') as f:
+        index = json.load(f)
+
+    if index.get('version') != INDEX_VERSION:
+        raise ValueError("Unsupported index version: {!r}".format(
+            index.get('version')))
+    return index
+
+
+def _merge_chunks(chunks, chunk_size, size):
+    """Merges chunk indices into sorted, non-overlapping byte ranges.
+
+    Args:
+        chunks (iterable[int]): Indices of chunks.
+        chunk_size (int): Size of each chunk in bytes.
+        size (int): Size of the file; the last range is clipped to it.
+
+    Returns:
+        list[tuple]: (start, end) byte ranges, end exclusive.
+    """
+
+    ranges = []
+    for chunk in sorted(set(chunks)):
+        start, end = chunk * chunk_size, min((chunk + 1) * chunk_size, size)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+
+    return ranges
+
+
+def chunks_in_ranges(index, ranges):
+    """Finds every chunk overlapping a set of byte ranges.
+
+    Args:
+        index (dict): Index built by build_index().
+        ranges (iterable[tuple]): (start, end) byte ranges, end exclusive.
+
+    Returns:
+        list[int]: Sorted indices of overlapping chunks.
+    """
+
+    chunk_size = index['chunk_size']
+    chunks = set()
+    for start, end in ranges:
+        last_chunk = min(max(end - 1, start) // chunk_size,
+                         len(index['chunks']) - 1)
+        chunks.update(range(start // chunk_size, last_chunk + 1))
+
+    return sorted(chunks)
+
+
+def verify_index(filename, index, ranges=None, buffer_size=None):
+    """Finds the byte ranges of a file that no longer match its index.
+
+    Without `ranges`, the whole file is read once and every chunk is
+    checked.  With `ranges`, only the chunks overlapping those ranges are
+    read, e.g. to confirm a repair of previously reported corruption.
+
+    Args:
+        filename (str): Filename of binary file.
+        index (dict): Index built by build_index().
+        ranges (iterable[tuple], optional): (start, end) byte ranges to
+            re-check, end exclusive.
+        buffer_size (int, optional): Size of blocks read into memory.
+
+    Returns:
+        list[tuple]: Corrupt (start, end) byte ranges, end exclusive; empty
+            if the file matches its index.  Bytes added to or removed from
+            the end of the file are reported as corrupt.
+    """
+
+    hash_method, chunk_size = index['hash_method'], index['chunk_size']
+    expected = index['chunks']
+
+    with open(filename, 'rb', buffering=0) as f:
+        if ranges is None:
+            _, chunks, size = _chunk_digests(
+                f, hash_method, chunk_size, buffer_size=buffer_size)
+            corrupt = [chunk for chunk in range(len(expected))
+                       if chunk >= len(chunks) or
+                       not hashchk.compare_digests(chunks[chunk],
+                                                   expected[chunk])]
+        else:
+            corrupt = []
+            for chunk in chunks_in_ranges(index, ranges):
+                chunk_digest = hashchk.hash_constructor(hash_method)()
+                for block in hashchk.read_range(
+                        f, chunk * chunk_size, chunk_size,
+                        buffer_size=buffer_size):
+                    chunk_digest.update(block)
+
+                generated = hashchk.hexdigest(chunk_digest)
+                if not hashchk.compare_digests(generated, expected[chunk]):
+                    corrupt.append(chunk)
+
+            f.seek(0, 2)
+            size = f.tell()
+
+    corrupt_ranges = _merge_chunks(corrupt, chunk_size, index['size'])
+
+    # Truncated or extended files
+    if size != index['size']:
+        start, end = sorted([size, index['size']])
+        if corrupt_ranges and corrupt_ranges[-1][1] >= start:
+            start = corrupt_ranges.pop()[0]
+        corrupt_ranges.append((start, end))
+
+    return corrupt_ranges
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,214 @@
+"""Classes and functions for verifying checksum manifests, i.e. files produced
+by `sha256sum` (coreutils style) or `sha256 -r`/`shasum --tag` (BSD style).
+
+Entries are verified concurrently through a pool of worker processes or
+threads; hashlib releases the GIL while hashing large blocks, so threads are
+usually enough when verification is bound by disk throughput.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+# -----------------------------------------------------------------------------
+
+import os
+import re
+import itertools
+import collections
+
+import hashchk
+
+# SHA256 (filename) = digest
+BSD_PATTERN = re.compile(
+    r'^(?P<method>[A-Za-z0-9_-]+) ?\((?P<filename>.*)\) ?= ?'
+    r'(?P<digest>[0-9a-fA-F]+)$')
+
+# digest  filename (text mode) or digest *filename (binary mode)
+COREUTILS_PATTERN = re.compile(
+    r'^(?P<digest>[0-9a-fA-F]+) [ *](?P<filename>.*)$')
+
+# Backslash escapes used by coreutils for filenames containing newlines
+ESCAPE_PATTERN = re.compile(r'\\(.)')
+
+ManifestEntry = collections.namedtuple(
+    'ManifestEntry', ['filename', 'digest', 'hash_methods'])
+
+VerifyResult = collections.namedtuple(
+    'VerifyResult', ['entry', 'hash_method', 'generated_digest', 'error'])
+
+
+def _unescape(filename):
+    """Reverses coreutils filename escaping applied to lines starting with a
+    backslash."""
+    escapes = {'n': '\n', 'r': '\r', '\\': '\\'}
+    return ESCAPE_PATTERN.sub(
+        lambda match: escapes.get(match.group(1), match.group(0)), filename)
+
+
+def parse_line(line, sha3=False, hash_method=None):
+    """Parses a single manifest line.
+
+    Args:
+        line (str): Line taken from a coreutils or BSD style manifest.
+        sha3 (bool, optional): Prefer SHA-3 over SHA-2 for coreutils entries,
+            which don't name the hash method used.
+        hash_method (str, optional): exact name of the hashlib method used by
+            coreutils entries; every method producing digests of the entry's
+            length is tried if not provided.
+
+    Returns:
+        ManifestEntry: Parsed entry, or None if line is blank or a comment.
+
+    Raises:
+        ValueError: Line doesn't match either manifest format.
+    """
+
+    line = line.rstrip('\r\n')
+    if not line.strip() or line.startswith('#'):
+        return None
+
+    escaped = line.startswith('\\')
+    if escaped:
+        line = line[1:]
+
+    bsd_match = BSD_PATTERN.match(line)
+    if bsd_match:
+        method = bsd_match.group('method').lower().replace('-', '_')
+        digest = bsd_match.group('digest').lower()
+        filename = bsd_match.group('filename')
+        hash_methods = [method]
+    else:
+        coreutils_match = COREUTILS_PATTERN.match(line)
+        if not coreutils_match:
+            raise ValueError("Improperly formatted manifest line: {!r}".format(
+                line))
+
+        digest = coreutils_match.group('digest').lower()
+        filename = coreutils_match.group('filename')
+        hash_methods = ([hash_method] if hash_method else
+                        hashchk.Digest(digest, sha3=sha3).candidate_methods)
+
+    try:
+        hashchk.hash_constructor(hash_methods[0])
+    except AttributeError:
+        raise ValueError("Unsupported hash method: {!r}".format(
+            hash_methods[0]))
+
+    if escaped:
+        filename = _unescape(filename)
+
+    return ManifestEntry(filename, digest, hash_methods)
+
+
+def parse_manifest(manifest, sha3=False, root=None, hash_method=None,
+                   errors=None):
+    """Generator that parses every entry in a manifest file.
+
+    Args:
+        manifest (str): Filename of manifest.
+        sha3 (bool, optional): Prefer SHA-3 over SHA-2 for coreutils entries.
+        root (str, optional): Directory relative filenames are resolved
+            against; defaults to the CWD like `sha256sum -c`.
+        hash_method (str, optional): exact name of the hashlib method used by
+            coreutils entries; see parse_line().
+        errors (list, optional): If provided, malformed lines are skipped
+            like `sha256sum -c` does, and a (line number, message) tuple is
+            appended for each one.
+
+    Yields:
+        ManifestEntry: One entry per non-blank manifest line.
+
+    Raises:
+        ValueError: A line is malformed and `errors` wasn't provided.
+    """
+
+    with open(manifest, 'r') as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                entry = parse_line(line, sha3=sha3, hash_method=hash_method)
+            except ValueError as e:
+                if errors is None:
+                    raise
+                errors.append((line_number, str(e)))
+                continue
+
+            if entry is None:
+                continue
+
+            if root and not os.path.isabs(entry.filename):
+                entry = entry._replace(
+                    filename=os.path.join(root, entry.filename))
+            yield entry
+
+
+def verify_entry(entry):
+    """Generates digests for every candidate hash method of an entry in a
+    single read and compares them against the entry's digest.
+
+    Args:
+        entry (ManifestEntry): Entry to verify.
+
+    Returns:
+        VerifyResult: `hash_method` is the matching method, or None if no
+            candidate matched; `error` holds the message of any IO error
+            raised while reading the file.
+    """
+
+    try:
+        generated = hashchk.generate_digests(
+            entry.filename, entry.hash_methods,
+            digest_length=len(entry.digest))
+    except (IOError, OSError) as e:
+        return VerifyResult(entry, None, None, str(e))
+
+    for method in entry.hash_methods:
+        if hashchk.compare_digests(entry.digest, generated[method]):
+            return VerifyResult(entry, method, generated[method], None)
+
+    method = entry.hash_methods[0]
+    return VerifyResult(entry, None, generated[method], None)
+
+
+def verify_manifest(entries, workers=None, threads=False):
+    """Verifies manifest entries concurrently, yielding results as soon as
+    they complete rather than in manifest order.
+
+    Only a bounded number of entries are submitted to the pool at once, so
+    manifests with millions of entries don't queue millions of futures.
+
+    Args:
+        entries (iterable[ManifestEntry]): Entries to verify, usually provided
+            by parse_manifest().
+        workers (int, optional): Size of the worker pool; defaults to the
+            number of CPUs.
+        threads (bool, optional): Use a thread pool instead of a process pool.
+
+    Yields:
+        VerifyResult: Verification result for each entry.
+    """
+
+    # Only imported by the commands that verify manifests
+    import multiprocessing
+    import concurrent.futures
+
+    workers = workers or multiprocessing.cpu_count()
+    executor_class = (concurrent.futures.ThreadPoolExecutor if threads
+                      else concurrent.futures.ProcessPoolExecutor)
+
+    entries = iter(entries)
+    with executor_class(max_workers=workers) as executor:
+        pending = set(executor.submit(verify_entry, entry)
+                      for entry in itertools.islice(entries, workers * 4))
+
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+
+            for future in done:
+                yield future.result()
+
+            for entry in itertools.islice(entries, len(done)):
+                pending.add(executor.submit(verify_entry, entry))
+
+
+if __name__ == '__main__':
+    pass
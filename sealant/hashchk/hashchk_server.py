@@ -0,0 +1,274 @@
+"""Long running hashchk daemon serving digest requests over a Unix domain
+socket; see hashchk_client for the protocol and a thin client.
+
+Starting a Python process for every digest costs more than hashing a small
+file.  The daemon pays that cost once: modules stay imported, digest cache
+connections stay open, and every connection shares one pool of worker
+threads (hashlib releases the GIL while hashing large blocks, so threads hash
+in parallel).  Each connection may pipeline requests; responses are written
+as soon as each request completes.
+
+Supported commands:
+
+    generate: `binary`, `hash_functions` (default ["sha256"]), and
+        optionally `digest_length` and `buffer_size`; answered with
+        `digests` keyed by hash method.
+    verify: `binary`, `digest`, and optionally `hash_function` and
+        `family`; answered with `match`, `hash_method`, and
+        `generated_digest`.
+    ping: answered with an empty response.
+
+Failed requests are answered with `error` and `error_type`: 'io' if the
+binary couldn't be read, 'request' if the request was malformed, and 'server'
+for any other failure.  Clients must keep at most MAX_PENDING requests in
+flight per connection and read responses before sending more.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+from six.moves import socketserver
+# -----------------------------------------------------------------------------
+
+import os
+import errno
+import socket
+import threading
+
+import hashchk
+import hashchk_cache
+import hashchk_client
+
+# Requests a single connection may have in flight before the server stops
+# reading from it
+MAX_PENDING = hashchk_client.MAX_PENDING
+
+
+def handle_request(request, cache=None):
+    """Processes a single decoded request.
+
+    Args:
+        request (dict): Request sent by a client.
+        cache (obj:`DigestCache`, optional): Cache consulted before reading
+            the binary.
+
+    Returns:
+        dict: Response, without the request's `id`.
+
+    Raises:
+        IOError: The binary couldn't be read.
+        ValueError: The request is malformed.
+    """
+
+    command = request.get('command')
+    if command == 'ping':
+        return {}
+    if command not in ('generate', 'verify'):
+        raise ValueError("Unknown command: {!r}".format(command))
+
+    binary = request.get('binary')
+    if not binary or not os.path.isabs(binary):
+        raise ValueError("`binary` must be an absolute filename")
+
+    if command == 'generate':
+        hash_methods = request.get('hash_functions') or ['sha256']
+        digest_length = request.get('digest_length')
+    else:
+        digest = hashchk.Digest(request['digest'],
+                                family=request.get('family'))
+        hash_methods = ([request['hash_function']]
+                        if request.get('hash_function')
+                        else digest.candidate_methods)
+        digest_length = len(digest.reference_digest)
+
+    for method in hash_methods:
+        try:
+            hashchk.hash_constructor(method)
+        except (AttributeError, TypeError):
+            raise ValueError("Unsupported hash method: {!r}".format(method))
+
+    digests = hashchk.generate_digests(
+        binary, hash_methods, buffer_size=request.get('buffer_size'),
+        cache=cache, digest_length=digest_length)
+
+    if command == 'generate':
+        return {'digests': digests}
+
+    hash_method = next(
+        (method for method in hash_methods if hashchk.compare_digests(
+            digest.reference_digest, digests[method])), None)
+    generated = digests[hash_method or hash_methods[0]]
+    return {'match': hash_method is not None,
+            'hash_method': hash_method or hash_methods[0],
+            'generated_digest': generated}
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    """Reads pipelined requests from a connection and submits each one to the
+    server's worker pool."""
+
+    def handle(self):
+        write_lock = threading.Lock()
+        slots = threading.BoundedSemaphore(MAX_PENDING)
+
+        def respond(future):
+            try:
+                with write_lock:
+                    self.wfile.write(future.result())
+                    self.wfile.flush()
+            except (IOError, OSError, socket.error):
+                # The client hung up; nothing is left to answer
+                pass
+            finally:
+                slots.release()
+
+        for line in iter(self.rfile.readline, b''):
+            if not line.strip():
+                continue
+
+            slots.acquire()
+            self.server.submit(line).add_done_callback(respond)
+
+        # Wait for every response before the connection is closed
+        for _ in range(MAX_PENDING):
+            slots.acquire()
+
+
+class HashchkServer(socketserver.ThreadingMixIn,
+                    socketserver.UnixStreamServer):
+    """Daemon answering hashchk requests on a Unix domain socket.
+
+    Each connection is read by its own thread, while digests are generated
+    on a pool of `workers` threads shared by every connection.  With
+    `cache_path`, each worker keeps its own connection to the digest cache
+    open for the life of the server.
+
+    Args:
+        path (str, optional): Filename of the Unix domain socket; a stale
+            socket left by a server that's no longer running is replaced.
+        workers (int, optional): Number of worker threads; defaults to the
+            number of CPUs.
+        cache_path (str, optional): Filename of a digest cache database.
+        cache_size (int, optional): Maximum number of cached digests.
+
+    Attributes:
+        path (str): Filename of the Unix domain socket.
+        workers (int): Number of worker threads.
+
+    Raises:
+        IOError: Another server is already listening on `path`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=None, workers=None, cache_path=None,
+                 cache_size=hashchk_cache.DEFAULT_MAX_ENTRIES):
+        # Only imported by the daemon, never by its clients
+        import multiprocessing
+        import concurrent.futures
+
+        self.path = path or hashchk_client.DEFAULT_SOCKET_PATH
+        self.workers = workers or multiprocessing.cpu_count()
+        self.cache_path = cache_path
+        self.cache_size = cache_size
+
+        self._local = threading.local()
+        self._bound = False
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.workers)
+
+        socketserver.UnixStreamServer.__init__(
+            self, self.path, _ConnectionHandler)
+
+    def server_bind(self):
+        """Replaces stale sockets and binds a socket only the current user
+        can connect to."""
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        if os.path.exists(self.path):
+            try:
+                hashchk_client.HashchkClient(self.path).close()
+            except socket.error:
+                os.unlink(self.path)
+            else:
+                raise IOError(errno.EADDRINUSE, "hashchk daemon already "
+                              "listening", self.path)
+
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+            self._bound = True
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        """Stops the worker pool and removes the socket, unless it belongs to
+        another server."""
+
+        socketserver.UnixStreamServer.server_close(self)
+        self.executor.shutdown(wait=True)
+        if self._bound and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    @property
+    def cache(self):
+        """obj:`DigestCache`: Digest cache of the calling worker thread, or
+        None if the server wasn't given a cache.  SQLite connections can't be
+        shared between threads, so each worker opens its own."""
+
+        if self.cache_path is None:
+            return None
+
+        cache = getattr(self._local, 'cache', None)
+        if cache is None:
+            cache = self._local.cache = hashchk_cache.DigestCache(
+                self.cache_path, max_entries=self.cache_size)
+        return cache
+
+    def submit(self, line):
+        """Queues a request on the worker pool.
+
+        Args:
+            line (bytes): JSON line holding a request.
+
+        Returns:
+            obj:`Future`: Resolves to the encoded response.
+        """
+        return self.executor.submit(self.respond, line)
+
+    def respond(self, line):
+        """Processes a request on a worker thread.
+
+        Args:
+            line (bytes): JSON line holding a request.
+
+        Returns:
+            bytes: JSON line holding the response.
+        """
+
+        request_id = None
+        try:
+            request = hashchk_client.decode_message(line)
+            request_id = request.get('id')
+            response = handle_request(request, cache=self.cache)
+        except (IOError, OSError) as e:
+            response = {'error': str(e),
+                        'error_type': hashchk_client.IO_ERROR}
+        except (ValueError, KeyError, TypeError) as e:
+            response = {'error': str(e) if not isinstance(e, KeyError) else
+                        "Missing field: {}".format(e),
+                        'error_type': hashchk_client.REQUEST_ERROR}
+        except Exception as e:
+            # e.g. a locked cache database; every request is answered so
+            # clients never wait on a response that isn't coming
+            response = {'error': '{}: {}'.format(type(e).__name__, e),
+                        'error_type': hashchk_client.SERVER_ERROR}
+
+        response['id'] = request_id
+        return hashchk_client.encode_message(response)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,451 @@
+"""Integrity snapshots of whole directory trees.
+
+A snapshot records the path, size, modification time, inode, and digest of
+every regular file below a directory in a compact SQLite database, along with
+a Merkle root computed over the whole tree.  Rescanning only reads files
+whose stat metadata changed since the last scan, and reports which files were
+added, removed, or modified.  Two trees hold the same files with the same
+contents exactly when their roots match, so comparing trees, or a tree
+against a copy of itself on another host, doesn't require reading either one
+again.
+
+Directories are walked with os.scandir without following symbolic links;
+symbolic links and special files are not recorded.  Paths are stored
+relative to the scanned directory, '/' separated, as bytes in the file
+system's encoding.
+
+The root is a binary Merkle tree over every file in path order, with the
+same one byte node prefixes as hashchk_tree:
+
+    leaf = H(0x00 || len(path) || path || file digest)
+    node = H(0x01 || left || right)
+
+where len(path) is an 8 byte big-endian integer.  Each level pairs adjacent
+nodes and carries an odd node up unchanged; the root of an empty tree is
+H(0x01).
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+from six.moves import range
+# -----------------------------------------------------------------------------
+
+import os
+import struct
+import binascii
+import itertools
+import collections
+
+import hashchk
+import hashchk_tree
+
+try:
+    from os import scandir
+except ImportError:
+    # Python 2 needs the scandir backport
+    from scandir import scandir
+
+SNAPSHOT_VERSION = 1
+DEFAULT_HASH_METHOD = 'sha256'
+
+PATH_LENGTH = struct.Struct('>Q')
+
+SnapshotEntry = collections.namedtuple(
+    'SnapshotEntry', ['path', 'size', 'mtime_ns', 'inode', 'digest'])
+
+SnapshotReport = collections.namedtuple(
+    'SnapshotReport', ['added', 'removed', 'modified', 'unchanged', 'hashed',
+                       'errors', 'root'])
+
+# os.fsencode and os.fsdecode are Python 3 only; Python 2 paths are bytes
+fsencode = getattr(os, 'fsencode', lambda path: path)
+fsdecode = getattr(os, 'fsdecode', lambda path: path)
+
+
+def _mtime_ns(file_stat):
+    """int: Modification time of a stat result in nanoseconds."""
+
+    mtime_ns = getattr(file_stat, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(file_stat.st_mtime * 1e9)
+    return mtime_ns
+
+
+def walk_files(directory, exclude=()):
+    """Generator that walks a directory tree with os.scandir.
+
+    Args:
+        directory (str): Directory to walk.
+        exclude (iterable[str], optional): Absolute filenames to leave out,
+            e.g. the snapshot database itself.
+
+    Yields:
+        tuple: (path, stat) of every regular file, where path is relative to
+            `directory` and encoded by fsencode(), or (path, error) for every
+            directory or file that couldn't be read.
+    """
+
+    exclude = set(os.path.abspath(filename) for filename in exclude)
+    directories = [(os.path.abspath(directory), b'')]
+
+    while directories:
+        absolute, relative = directories.pop()
+        try:
+            entries = list(scandir(absolute))
+        except (IOError, OSError) as e:
+            yield relative or b'.', e
+            continue
+
+        for entry in entries:
+            path = (relative + b'/' if relative else b'') + fsencode(
+                entry.name)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append((entry.path, path))
+                elif (entry.is_file(follow_symlinks=False) and
+                      entry.path not in exclude):
+                    yield path, entry.stat(follow_symlinks=False)
+            except (IOError, OSError) as e:
+                yield path, e
+
+
+def leaf_digest(hash_method, path, digest):
+    """Hashes one file into a leaf of the snapshot's Merkle tree.
+
+    Args:
+        hash_method (str): exact name of hashlib method.
+        path (bytes): Relative path of the file.
+        digest (bytes): Raw digest of the file's contents.
+
+    Returns:
+        bytes: Raw leaf digest.
+    """
+
+    leaf = hashchk.hash_constructor(hash_method)(hashchk_tree.LEAF_PREFIX)
+    leaf.update(PATH_LENGTH.pack(len(path)))
+    leaf.update(path)
+    leaf.update(digest)
+    return binascii.unhexlify(hashchk.hexdigest(leaf))
+
+
+def merkle_root(hash_method, leaves):
+    """Combines leaf digests into the root of a binary Merkle tree.
+
+    Args:
+        hash_method (str): exact name of hashlib method.
+        leaves (list[bytes]): Raw leaf digests in path order.
+
+    Returns:
+        str: Hexadecimal root digest.
+    """
+
+    new_hash = hashchk.hash_constructor(hash_method)
+    if not leaves:
+        return hashchk.hexdigest(new_hash(hashchk_tree.ROOT_PREFIX))
+
+    level = list(leaves)
+    while len(level) > 1:
+        parents = []
+        for index in range(0, len(level) - 1, 2):
+            node = new_hash(hashchk_tree.ROOT_PREFIX)
+            node.update(level[index])
+            node.update(level[index + 1])
+            parents.append(binascii.unhexlify(hashchk.hexdigest(node)))
+
+        if len(level) % 2:
+            parents.append(level[-1])
+        level = parents
+
+    return binascii.hexlify(level[0]).decode('ascii')
+
+
+def _hash_file(filename, hash_method, buffer_size):
+    """tuple: (raw digest, None), or (None, error) if the file couldn't be
+    read."""
+
+    try:
+        digest = hashchk.generate_digest(filename, hash_method,
+                                         buffer_size=buffer_size)
+    except (IOError, OSError) as e:
+        return None, e
+    return binascii.unhexlify(digest), None
+
+
+class Snapshot(object):
+    """Snapshot of a directory tree persisted to an SQLite database.
+
+    Args:
+        path (str): Filename of the SQLite database; created if it doesn't
+            exist.
+
+    Attributes:
+        path (str): Filename of the SQLite database.
+        connection (obj): SQLite connection.
+
+    Raises:
+        ValueError: Database was written by an unsupported version.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        # Only imported once a snapshot is opened
+        import sqlite3
+
+        self.connection = sqlite3.connect(path)
+        # Python 2's sqlite3 stores plain strings as text rather than BLOBs
+        self._blob = sqlite3.Binary
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                path BLOB PRIMARY KEY, size INTEGER, mtime_ns INTEGER,
+                inode INTEGER, digest BLOB) WITHOUT ROWID""")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS metadata (
+                key TEXT PRIMARY KEY, value TEXT)""")
+
+        version = self._metadata('version')
+        if version is None:
+            self._set_metadata(version=SNAPSHOT_VERSION)
+            self.connection.commit()
+        elif int(version) != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot version: {!r}".format(
+                version))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Closes the database connection; changes are committed by scan()."""
+        self.connection.close()
+
+    def _metadata(self, key):
+        """str: Stored metadata value, or None if it isn't set."""
+
+        row = self.connection.execute(
+            "SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_metadata(self, **values):
+        """Stores metadata values."""
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()])
+
+    @property
+    def directory(self):
+        """str: Directory last scanned, or None for an empty snapshot."""
+        return self._metadata('directory')
+
+    @property
+    def hash_method(self):
+        """str: Hash method used for file digests, or None for an empty
+        snapshot."""
+        return self._metadata('hash_method')
+
+    @property
+    def root(self):
+        """str: Merkle root of the tree at the last scan, or None for an
+        empty snapshot."""
+        return self._metadata('root')
+
+    def entries(self):
+        """Generator of every recorded file in path order.
+
+        Yields:
+            SnapshotEntry: `digest` is hexadecimal.
+        """
+
+        for row in self.connection.execute(
+                "SELECT path, size, mtime_ns, inode, digest FROM files "
+                "ORDER BY path"):
+            path, size, mtime_ns, inode, digest = row
+            yield SnapshotEntry(bytes(path), size, mtime_ns, inode,
+                                binascii.hexlify(digest).decode('ascii'))
+
+    def scan(self, directory=None, hash_method=None, update=True, full=False,
+             workers=None, buffer_size=None):
+        """Scans a directory tree, reading only files that are new or whose
+        size, modification time, or inode changed since the last scan.
+
+        Args:
+            directory (str, optional): Directory to scan; defaults to the
+                directory of the last scan.
+            hash_method (str, optional): exact name of hashlib method; must
+                match the snapshot's method once one has been recorded.
+                Defaults to the snapshot's method, or DEFAULT_HASH_METHOD.
+            update (bool, optional): Record the scan in the database; pass
+                False to audit a tree against the snapshot without changing
+                it.
+            full (bool, optional): Read every file, rather than trusting
+                digests recorded for files whose stat metadata is unchanged.
+            workers (int, optional): Number of files hashed concurrently;
+                defaults to the number of CPUs.
+            buffer_size (int, optional): Size of blocks read into memory.
+
+        Returns:
+            SnapshotReport: Relative paths (decoded by fsdecode()) of the
+                files `added`, `removed`, and `modified`, the number of
+                `unchanged` and `hashed` files, (path, message) `errors` for
+                files and directories that couldn't be read, and the new
+                Merkle `root`.  Files recorded by an earlier scan that
+                couldn't be read keep their recorded entry and aren't
+                reported as removed.
+
+        Raises:
+            ValueError: No directory was provided or recorded, or the hash
+                method differs from the snapshot's.
+        """
+
+        # Only imported once a tree is scanned
+        import multiprocessing
+        import concurrent.futures
+
+        directory = directory or self.directory
+        if directory is None:
+            raise ValueError("No directory to scan")
+        directory = os.path.abspath(directory)
+
+        recorded_method = self.hash_method
+        hash_method = hash_method or recorded_method or DEFAULT_HASH_METHOD
+        if recorded_method and hash_method != recorded_method:
+            raise ValueError("Snapshot uses {}, not {}".format(
+                recorded_method, hash_method))
+
+        previous = dict(
+            (bytes(row[0]), tuple(row[1:])) for row in self.connection.execute(
+                "SELECT path, size, mtime_ns, inode, digest FROM files"))
+
+        current, errors, changed, failed = {}, [], [], []
+        exclude = [os.path.abspath(self.path) + suffix
+                   for suffix in ('', '-journal', '-wal', '-shm')]
+        for path, result in walk_files(directory, exclude=exclude):
+            if isinstance(result, (IOError, OSError)):
+                errors.append((fsdecode(path), str(result)))
+                failed.append(path)
+                continue
+
+            metadata = (result.st_size, _mtime_ns(result), result.st_ino)
+            recorded = previous.get(path)
+            if not full and recorded and recorded[:3] == metadata:
+                current[path] = recorded
+            else:
+                changed.append((path, metadata))
+
+        # hashlib releases the GIL while hashing, so threads read and hash
+        # files in parallel; submissions are bounded like verify_manifest()
+        workers = workers or multiprocessing.cpu_count()
+        changed_iter = iter(changed)
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            def submit(path, metadata):
+                filename = os.path.join(directory, fsdecode(path))
+                future = executor.submit(
+                    _hash_file, filename, hash_method, buffer_size)
+                pending[future] = (path, metadata)
+
+            pending = {}
+            for path, metadata in itertools.islice(changed_iter, workers * 4):
+                submit(path, metadata)
+
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    path, metadata = pending.pop(future)
+                    digest, error = future.result()
+                    if error is not None:
+                        errors.append((fsdecode(path), str(error)))
+                        failed.append(path)
+                    else:
+                        current[path] = metadata + (digest,)
+
+                for path, metadata in itertools.islice(
+                        changed_iter, len(done)):
+                    submit(path, metadata)
+
+        # A read error isn't a removal; unreadable files keep their recorded
+        # entry, and unreadable directories keep every file recorded below
+        kept = set()
+        for path in failed:
+            if path in previous:
+                kept.add(path)
+                continue
+            prefix = b'' if path == b'.' else path + b'/'
+            kept.update(recorded for recorded in previous
+                        if recorded.startswith(prefix))
+        kept.difference_update(current)
+        for path in kept:
+            current[path] = previous[path]
+
+        added, modified = [], []
+        for path, _ in changed:
+            if path not in current or path in kept:
+                continue
+            if path not in previous:
+                added.append(path)
+            elif bytes(previous[path][3]) != current[path][3]:
+                modified.append(path)
+        removed = [path for path in previous if path not in current]
+
+        paths = sorted(current)
+        root = merkle_root(hash_method, [
+            leaf_digest(hash_method, path, bytes(current[path][3]))
+            for path in paths])
+
+        if update:
+            self.connection.executemany(
+                "DELETE FROM files WHERE path = ?",
+                [(self._blob(path),) for path in removed])
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                [(self._blob(path),) + current[path][:3] +
+                 (self._blob(current[path][3]),)
+                 for path, _ in changed
+                 if path in current and path not in kept])
+            self._set_metadata(directory=directory, hash_method=hash_method,
+                               root=root)
+            self.connection.commit()
+
+        return SnapshotReport(
+            added=[fsdecode(path) for path in sorted(added)],
+            removed=[fsdecode(path) for path in sorted(removed)],
+            modified=[fsdecode(path) for path in sorted(modified)],
+            unchanged=len(current) - len(kept) - len(added) - len(modified),
+            hashed=len(changed), errors=sorted(errors), root=root)
+
+    def compare(self, other):
+        """Compares two snapshots without reading either tree.
+
+        Args:
+            other (obj:`Snapshot`): Snapshot to compare against.
+
+        Returns:
+            tuple: Relative paths of files only in this snapshot, only in
+                `other`, and in both with different digests; all empty if
+                the roots match.
+
+        Raises:
+            ValueError: The snapshots use different hash methods.
+        """
+
+        if self.hash_method != other.hash_method:
+            raise ValueError("Snapshots use different hash methods")
+        if self.root == other.root:
+            return [], [], []
+
+        ours = dict((entry.path, entry.digest) for entry in self.entries())
+        theirs = dict((entry.path, entry.digest) for entry in other.entries())
+
+        return ([fsdecode(path) for path in sorted(ours)
+                 if path not in theirs],
+                [fsdecode(path) for path in sorted(theirs)
+                 if path not in ours],
+                [fsdecode(path) for path in sorted(ours)
+                 if path in theirs and ours[path] != theirs[path]])
+
+
+if __name__ == '__main__':
+    pass
@@ -1,9 +1,7 @@
 """Classes and functions for hashchk.py terminal use
 
 Todo:
-    * Re-implement SHAKE and BLAKE arguments
     * More tests on what arguments common argument groups return
-    * Generate command
     * Compare command
         * Add command for checking that digest contents match known hash method
           signature?
@@ -17,16 +15,32 @@ from __future__ import print_function
 from six.moves import range
 # -----------------------------------------------------------------------------
 
+import os
 import sys
 import argparse
-import difflib
 
-import colorama
 import hashchk
 
-# ANSI escape sequences provided by colorama
-RED, GREEN, CYAN = colorama.Fore.RED, colorama.Fore.GREEN, colorama.Fore.CYAN
-BRIGHT, RESET_COLOR = colorama.Style.BRIGHT, colorama.Style.RESET_ALL
+# ANSI escape sequences; see init_colors()
+RED, GREEN, CYAN = '\033[31m', '\033[32m', '\033[36m'
+BRIGHT, RESET_COLOR = '\033[1m', '\033[0m'
+
+HASH_FUNCTIONS = ['md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512',
+                  'sha3_224', 'sha3_256', 'sha3_384', 'sha3_512', 'blake2s',
+                  'blake2b', 'shake_128', 'shake_256']
+
+# Defaults of the modules imported by the subcommands using them, repeated
+# here so building the parser doesn't import every subcommand's module
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'sealant', 'hashchk_cache.sqlite')
+DEFAULT_CACHE_ENTRIES = 100000
+DEFAULT_SOCKET_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'sealant', 'hashchk.sock')
+SOCKET_ENVIRONMENT_VARIABLE = 'HASHCHK_SOCKET'
+INDEX_EXTENSION = '.hcidx'
+DEFAULT_CHUNK_SIZE = 4194304
+DEFAULT_LEAF_SIZE = 8388608
+DEFAULT_HASH_METHOD = 'sha256'
 
 
 class HashchkParser(object):
@@ -37,14 +51,20 @@ class HashchkParser(object):
         subparser (obj): Parent subparser object
     """
 
-    def __init__(self):
+    def __init__(self, prog=None):
         self.parser = argparse.ArgumentParser(
-            description="Generate and compare hash digests")
+            prog=prog, description="Generate and compare hash digests")
         self.subparser = self.parser.add_subparsers(
             title="Commands", description="Available Actions", dest='command')
 
         self.add_verify_command()
         self.add_compare_command()
+        self.add_generate_command()
+        self.add_check_command()
+        self.add_index_command()
+        self.add_serve_command()
+        self.add_snapshot_commands()
+        self.add_dedupe_command()
 
     def add_verify_command(self):
         """Adds verify command and arguments to parent subparser object."""
@@ -64,22 +84,36 @@ class HashchkParser(object):
         required_group.add_argument(
             '-binary', metavar="FILENAME|PATH/FILENAME",
             help="""Generates a hash digest of of the file located at \
-            PATH/FILENAME, or just FILENAME if file is located in the CWD.""")
+            PATH/FILENAME, or just FILENAME if file is located in the CWD.  \
+            Use '-' to read the binary from stdin.""")
 
         # Hash method specifications
         algorithms_group = verify_parser.add_argument_group('Hash Methods')
         algorithms_group.add_argument(
             '-sha3', dest='sha3', action="store_true",
             help="""SHA3 will be used for hash digest generation instead of \
-            SHA2 (used for automatic hash method detection).""")
+            SHA2 (used for automatic hash method detection).  Shorthand for \
+            --family sha3.""")
+
+        algorithms_group.add_argument(
+            '--family', dest='family', default=None,
+            choices=sorted(hashchk.HASH_FAMILIES),
+            help="""Hash family preferred during automatic hash method \
+            detection (default: sha2).  Every SHA-2, SHA-3, and BLAKE2 method \
+            matching the digest length is still tried in the same read; \
+            SHAKE is only tried when chosen here.""")
 
         algorithms_group.add_argument(
             '-hf', '--hash-function', dest='hash_function', default=None,
-            choices=['md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512',
-                     'sha3_224', 'sha3_256', 'sha3_384', 'sha3_512'],
+            choices=HASH_FUNCTIONS,
             help="""Override automatic detection of the hash method and \
             explicitly define the hash method used for digest verification.""")
 
+        add_io_arguments(verify_parser)
+        add_cache_arguments(verify_parser)
+        add_tree_arguments(verify_parser)
+        add_socket_arguments(verify_parser)
+
     def add_compare_command(self):
         """Adds compare command and related arguments to parent subparser
         object."""
@@ -96,22 +130,430 @@ class HashchkParser(object):
             or, a valid path to the file containing a generated digest can be \
             included.""")
 
+    def add_generate_command(self):
+        """Adds generate command and related arguments to parent subparser
+        object."""
+
+        generate_parser = self.subparser.add_parser(
+            'generate',
+            help="""Generate one or more hash digests from a binary while \
+            only reading the binary once""")
+
+        required_group = generate_parser.add_argument_group(
+            'Required Parameters')
+        required_group.add_argument(
+            '-binary', metavar="FILENAME|PATH/FILENAME",
+            help="""Generates hash digests of the file located at \
+            PATH/FILENAME, or just FILENAME if file is located in the CWD.  \
+            Use '-' to read the binary from stdin.""")
+
+        algorithms_group = generate_parser.add_argument_group('Hash Methods')
+        algorithms_group.add_argument(
+            '-hf', '--hash-functions', dest='hash_functions', nargs='+',
+            default=['sha256'], choices=HASH_FUNCTIONS,
+            metavar='HASH_FUNCTION',
+            help="""One or more hash methods used for digest generation \
+            (default: sha256).  Choices: {}""".format(
+                ', '.join(HASH_FUNCTIONS)))
+
+        algorithms_group.add_argument(
+            '-l', '--digest-length', type=_digest_length, dest='digest_length',
+            default=None, metavar='HEX_CHARACTERS',
+            help="""Length of digests generated by shake_128 and shake_256 \
+            (default: 64 and 128 respectively).""")
+
+        add_io_arguments(generate_parser)
+        add_cache_arguments(generate_parser)
+        add_tree_arguments(generate_parser)
+        add_socket_arguments(generate_parser)
+
+    def add_check_command(self):
+        """Adds check command and related arguments to parent subparser
+        object."""
+
+        check_parser = self.subparser.add_parser(
+            'check',
+            help="""Verify every file listed in a coreutils (sha256sum) or \
+            BSD (shasum --tag) style checksum manifest""")
+
+        required_group = check_parser.add_argument_group('Required Parameters')
+        required_group.add_argument(
+            'manifest', metavar="FILENAME",
+            help="""Checksum manifest listing a digest and filename per \
+            line.  Relative filenames are resolved against the CWD.""")
+
+        pool_group = check_parser.add_argument_group('Worker Pool')
+        pool_group.add_argument(
+            '-w', '--workers', type=_positive_int, default=None,
+            help="""Number of files verified concurrently (default: number \
+            of CPUs).""")
+
+        pool_group.add_argument(
+            '--threads', action='store_true',
+            help="""Use worker threads instead of worker processes; usually \
+            faster when verification is limited by disk throughput.""")
+
+        algorithms_group = check_parser.add_argument_group('Hash Methods')
+        algorithms_group.add_argument(
+            '-sha3', dest='sha3', action="store_true",
+            help="""Prefer SHA3 over SHA2 for manifest entries that don't \
+            name their hash method.""")
+
+        algorithms_group.add_argument(
+            '-hf', '--hash-function', dest='hash_function', default=None,
+            choices=HASH_FUNCTIONS,
+            help="""Hash method of manifest entries that don't name one.  By \
+            default, every method producing digests of the entry's length is \
+            generated and whichever one matches is used.""")
+
+    def add_index_command(self):
+        """Adds index command and related arguments to parent subparser
+        object."""
+
+        index_parser = self.subparser.add_parser(
+            'index',
+            help="""Write a sidecar index of per-chunk digests for a binary, \
+            or check a binary against its index to locate corrupt byte \
+            ranges""")
+
+        required_group = index_parser.add_argument_group('Required Parameters')
+        required_group.add_argument(
+            '-binary', metavar="FILENAME|PATH/FILENAME",
+            help="""Binary the index is built from or checked against.""")
+
+        index_group = index_parser.add_argument_group('Index Options')
+        index_group.add_argument(
+            '--index-file', dest='index_file', default=None,
+            metavar='FILENAME',
+            help="""Filename of the sidecar index (default: binary filename \
+            followed by {}).""".format(INDEX_EXTENSION))
+
+        index_group.add_argument(
+            '--check', action='store_true',
+            help="""Check the binary against an existing index and report \
+            corrupt byte ranges instead of writing a new index.""")
+
+        index_group.add_argument(
+            '--ranges', nargs='+', type=_byte_range, default=None,
+            metavar='START:END',
+            help="""Used with --check; only re-check the chunks overlapping \
+            these byte ranges (END exclusive), e.g. after repairing \
+            previously reported corruption.""")
+
+        index_group.add_argument(
+            '--chunk-size', type=_positive_int, dest='chunk_size',
+            default=DEFAULT_CHUNK_SIZE, metavar='BYTES',
+            help="""Size of each indexed chunk (default: %(default)s).""")
+
+        index_group.add_argument(
+            '-hf', '--hash-function', dest='hash_function', default='sha256',
+            choices=HASH_FUNCTIONS,
+            help="""Hash method used for chunk digests (default: \
+            %(default)s).""")
+
+    def add_serve_command(self):
+        """Adds serve command and related arguments to parent subparser
+        object."""
+
+        serve_parser = self.subparser.add_parser(
+            'serve',
+            help="""Run a daemon answering verify and generate requests \
+            over a Unix domain socket, so callers don't pay for starting a \
+            new process per digest""")
+
+        daemon_group = serve_parser.add_argument_group('Daemon Options')
+        daemon_group.add_argument(
+            '--socket', default=DEFAULT_SOCKET_PATH,
+            metavar='FILENAME',
+            help="""Unix domain socket to listen on (default: \
+            %(default)s).""")
+
+        daemon_group.add_argument(
+            '-w', '--workers', type=_positive_int, default=None,
+            help="""Number of worker threads shared by every connection \
+            (default: number of CPUs).""")
+
+        cache_group = serve_parser.add_argument_group('Digest Cache')
+        cache_group.add_argument(
+            '--cache', nargs='?', const=DEFAULT_CACHE_PATH,
+            default=None, metavar='FILENAME',
+            help="""Serve unchanged files from a digest cache kept open by \
+            every worker.  If no filename is provided, the cache is stored \
+            at {}""".format(DEFAULT_CACHE_PATH))
+
+        cache_group.add_argument(
+            '--cache-size', type=_positive_int, dest='cache_size',
+            default=DEFAULT_CACHE_ENTRIES, metavar='ENTRIES',
+            help="""Maximum number of cached digests (default: \
+            %(default)s).""")
+
+    def add_snapshot_commands(self):
+        """Adds snapshot and audit commands and related arguments to parent
+        subparser object."""
+
+        snapshot_parser = self.subparser.add_parser(
+            'snapshot',
+            help="""Record the digest of every file in a directory tree, \
+            only reading files that changed since the last snapshot, and \
+            report added, removed, and modified files""")
+
+        required_group = snapshot_parser.add_argument_group(
+            'Required Parameters')
+        required_group.add_argument(
+            'database', metavar='DATABASE',
+            help="""Snapshot database; created if it doesn't exist.""")
+
+        required_group.add_argument(
+            'directory', nargs='?', default=None, metavar='DIRECTORY',
+            help="""Directory tree to snapshot (default: the directory of \
+            the last snapshot).""")
+
+        snapshot_parser.add_argument(
+            '-hf', '--hash-function', dest='hash_function', default=None,
+            choices=HASH_FUNCTIONS,
+            help="""Hash method used for file digests when the snapshot is \
+            created (default: {}).""".format(DEFAULT_HASH_METHOD))
+        add_scan_arguments(snapshot_parser)
+
+        audit_parser = self.subparser.add_parser(
+            'audit',
+            help="""Check a directory tree against its snapshot without \
+            updating the snapshot, or compare two snapshots by their root \
+            digests""")
+
+        required_group = audit_parser.add_argument_group(
+            'Required Parameters')
+        required_group.add_argument(
+            'database', metavar='DATABASE',
+            help="""Snapshot database written by the snapshot command.""")
+
+        audit_parser.add_argument(
+            '--compare', default=None, metavar='DATABASE',
+            help="""Compare against another snapshot instead of rescanning \
+            the tree; neither tree is read.""")
+        add_scan_arguments(audit_parser)
+
+    def add_dedupe_command(self):
+        """Adds dedupe command and related arguments to parent subparser
+        object."""
+
+        dedupe_parser = self.subparser.add_parser(
+            'dedupe',
+            help="""Find duplicate files, narrowing candidates by size and \
+            by the digest of their first and last few KiB before reading \
+            any file in full""")
+
+        required_group = dedupe_parser.add_argument_group(
+            'Required Parameters')
+        required_group.add_argument(
+            'paths', nargs='+', metavar='PATH',
+            help="""Files and directory trees to search.""")
+
+        dedupe_parser.add_argument(
+            '-hf', '--hash-function', dest='hash_function',
+            default=DEFAULT_HASH_METHOD, choices=HASH_FUNCTIONS,
+            help="""Hash method used to confirm duplicates (default: \
+            %(default)s).""")
+
+        dedupe_parser.add_argument(
+            '--min-size', type=int, dest='min_size', default=1,
+            metavar='BYTES',
+            help="""Ignore files smaller than BYTES (default: %(default)s, \
+            which skips empty files).""")
+
+        dedupe_parser.add_argument(
+            '-w', '--workers', type=_positive_int, default=None,
+            help="""Number of files read concurrently (default: number of \
+            CPUs).""")
+
     @property
     def args(self):
         """:obj:`NameSpace`: arguments parsed by main argparse object"""
         return self.parser.parse_args()
 
 
+def add_io_arguments(parser):
+    """Adds arguments controlling how binaries are read to a subcommand
+    parser.
+
+    Args:
+        parser (obj): Subcommand argparse object
+    """
+
+    io_group = parser.add_argument_group('Read Options')
+    io_group.add_argument(
+        '-bs', '--buffer-size', dest='buffer_size', type=_positive_int,
+        default=None, metavar='BYTES',
+        help="""Size of the blocks read into memory during digest \
+        generation.  By default, the size is tuned to the size of the \
+        binary.""")
+
+    io_group.add_argument(
+        '--metrics', action='store_true',
+        help="""Print the bytes hashed, throughput, and the time spent \
+        reading versus hashing, showing whether digest generation was bound \
+        by I/O or by CPU.""")
+
+
+def add_cache_arguments(parser):
+    """Adds digest cache arguments to a subcommand parser.
+
+    Args:
+        parser (obj): Subcommand argparse object
+    """
+
+    cache_group = parser.add_argument_group('Digest Cache')
+    cache_group.add_argument(
+        '--cache', nargs='?', const=DEFAULT_CACHE_PATH,
+        default=None, metavar='FILENAME',
+        help="""Trust digests cached for files whose device, inode, size, \
+        and modification time haven't changed, and cache newly generated \
+        digests.  If no filename is provided, the cache is stored at \
+        {}""".format(DEFAULT_CACHE_PATH))
+
+    cache_group.add_argument(
+        '--force-rehash', action='store_true', dest='force_rehash',
+        help="""Ignore cached digests and read the binary again; the cache \
+        is updated with the regenerated digests.""")
+
+    cache_group.add_argument(
+        '--cache-size', type=_positive_int, dest='cache_size',
+        default=DEFAULT_CACHE_ENTRIES, metavar='ENTRIES',
+        help="""Maximum number of cached digests; least recently used \
+        digests are evicted first (default: %(default)s).""")
+
+
+def add_tree_arguments(parser):
+    """Adds tree hash arguments to a subcommand parser.
+
+    Args:
+        parser (obj): Subcommand argparse object
+    """
+
+    tree_group = parser.add_argument_group('Tree Hashing')
+    tree_group.add_argument(
+        '--tree', action='store_true',
+        help="""Split the binary into leaves that are hashed in parallel and \
+        combined into a root digest.  Tree digests differ from regular \
+        digests; both sides must use the same hash method and leaf size.""")
+
+    tree_group.add_argument(
+        '--leaf-size', type=_positive_int, dest='leaf_size',
+        default=DEFAULT_LEAF_SIZE, metavar='BYTES',
+        help="""Size of each leaf used by --tree (default: %(default)s).""")
+
+    tree_group.add_argument(
+        '-w', '--workers', type=_positive_int, default=None,
+        help="""Number of leaves hashed concurrently by --tree (default: \
+        number of CPUs).""")
+
+
+def add_scan_arguments(parser):
+    """Adds directory scan arguments to a subcommand parser.
+
+    Args:
+        parser (obj): Subcommand argparse object
+    """
+
+    scan_group = parser.add_argument_group('Scan Options')
+    scan_group.add_argument(
+        '--full', action='store_true',
+        help="""Read every file instead of trusting recorded digests of \
+        files whose size, modification time, and inode are unchanged.""")
+
+    scan_group.add_argument(
+        '-w', '--workers', type=_positive_int, default=None,
+        help="""Number of files hashed concurrently (default: number of \
+        CPUs).""")
+
+
+def add_socket_arguments(parser):
+    """Adds arguments sending a subcommand to a `hashchk serve` daemon.
+
+    Args:
+        parser (obj): Subcommand argparse object
+    """
+
+    socket_group = parser.add_argument_group('Daemon')
+    socket_group.add_argument(
+        '--socket', nargs='?', const=DEFAULT_SOCKET_PATH,
+        default=os.environ.get(SOCKET_ENVIRONMENT_VARIABLE),
+        metavar='FILENAME',
+        help="""Have a `hashchk serve` daemon listening on FILENAME \
+        generate the digests (default: ${}, or {} if no filename is \
+        provided).  Binaries read from stdin and --tree digests are always \
+        generated locally, as is everything else if no daemon is \
+        listening.""".format(SOCKET_ENVIRONMENT_VARIABLE,
+                             DEFAULT_SOCKET_PATH))
+
+
+def _positive_int(argument):
+    """argparse type for sizes and counts that must be at least 1.
+
+    Args:
+        argument (str): Integer
+
+    Returns:
+        int: `argument`
+    """
+
+    if not argument.isdigit() or not int(argument):
+        raise argparse.ArgumentTypeError(
+            "expected a positive integer, got {!r}".format(argument))
+    return int(argument)
+
+
+def _digest_length(argument):
+    """argparse type for --digest-length.
+
+    Args:
+        argument (str): Positive, even number of hexadecimal characters
+
+    Returns:
+        int: `argument`
+    """
+
+    length = _positive_int(argument)
+    if length % 2:
+        raise argparse.ArgumentTypeError(
+            "expected an even number of hex characters, got {!r}".format(
+                argument))
+    return length
+
+
+def _byte_range(argument):
+    """argparse type for --ranges.
+
+    Args:
+        argument (str): START:END, END exclusive
+
+    Returns:
+        tuple: (START, END)
+    """
+
+    start, _, end = argument.partition(':')
+    if not (start.isdigit() and end.isdigit() and int(start) < int(end)):
+        raise argparse.ArgumentTypeError(
+            "expected START:END with START < END, got {!r}".format(argument))
+    return int(start), int(end)
+
+
 class HashchkOutput(object):
     """Class for managing methods related to different subcommands made
         available by HashchkParser.
 
     Attributes:
         args (obj:`NameSpace`): Subcommand arguments parsed by HashchkParser.
+        cache_stats (dict): Digest cache counters, or None if the digest cache
+            wasn't used.
+        metrics (dict): Read and hash timings of the last digest generation,
+            or None if the binary wasn't read.
     """
 
     def __init__(self, parsed_args):
         self.args = parsed_args
+        self.cache_stats = None
+        self.metrics = None
 
         self.dispatch_subparser()
 
@@ -120,16 +562,116 @@ class HashchkOutput(object):
         `commands` dictionary"""
 
         commands = {'verify': self.verify_digests,
-                    'compare': self.compare_digests}
+                    'compare': self.compare_digests,
+                    'generate': self.generate_digests,
+                    'check': self.check_manifest,
+                    'index': self.index_binary,
+                    'serve': self.serve,
+                    'snapshot': self.snapshot_tree,
+                    'audit': self.audit_tree,
+                    'dedupe': self.find_duplicates}
         commands[self.args.command]()
 
+    def _generate(self, hash_methods, digest_length=None, progress=None):
+        """Generates digests of the binary using the read and cache options
+        shared by the verify and generate sub-commands.
+
+        Args:
+            hash_methods (list[str]): exact names of hashlib methods used for
+                digest generation.
+            digest_length (int, optional): Length of SHAKE digests.
+            progress (callable, optional): Progress callback; see
+                hashchk.ProgressMeter.  Not called for tree digests.
+
+        Returns:
+            dict: Hash digests generated from binary keyed by hash method.
+        """
+
+        if progress is not None or self.args.metrics:
+            callback = progress
+
+            # Recorded once reading finishes; cache hits never read the binary
+            def record_metrics(meter):
+                if meter.finished:
+                    self.metrics = meter.metrics
+                if callback is not None:
+                    callback(meter)
+
+            progress = hashchk.ProgressMeter(record_metrics)
+
+        if self.args.tree:
+            import hashchk_tree
+            return hashchk_tree.tree_digests(
+                self.args.binary, hash_methods, leaf_size=self.args.leaf_size,
+                workers=self.args.workers, buffer_size=self.args.buffer_size,
+                digest_length=digest_length)
+
+        if self.args.binary == '-':
+            # Python 2 stdin is already a binary stream
+            stdin = getattr(sys.stdin, 'buffer', sys.stdin)
+            return hashchk.generate_stream_digests(
+                stdin, hash_methods, buffer_size=self.args.buffer_size,
+                digest_length=digest_length, progress=progress)
+
+        if self.args.socket:
+            digests = self._request_digests(hash_methods, digest_length)
+            if digests is not None:
+                return digests
+
+        if not self.args.cache:
+            return hashchk.generate_digests(
+                filename=self.args.binary, hash_methods=hash_methods,
+                buffer_size=self.args.buffer_size, digest_length=digest_length,
+                progress=progress)
+
+        import hashchk_cache
+        with hashchk_cache.DigestCache(
+                self.args.cache, max_entries=self.args.cache_size) as cache:
+            digests = cache.generate_digests(
+                self.args.binary, hash_methods, refresh=self.args.force_rehash,
+                buffer_size=self.args.buffer_size, digest_length=digest_length,
+                progress=progress)
+
+        self.cache_stats = cache.stats
+        return digests
+
+    def _request_digests(self, hash_methods, digest_length=None):
+        """Has the `hashchk serve` daemon listening on --socket generate
+        digests of the binary.
+
+        Args:
+            hash_methods (list[str]): exact names of hashlib methods used for
+                digest generation.
+            digest_length (int, optional): Length of SHAKE digests.
+
+        Returns:
+            dict: Hash digests keyed by hash method, or None if no daemon is
+                listening on the socket.
+        """
+
+        import socket
+        import hashchk_client
+
+        try:
+            client = hashchk_client.HashchkClient(self.args.socket)
+        except socket.error as e:
+            print(" No hashchk daemon at {} ({}); hashing locally".format(
+                self.args.socket, e), file=sys.stderr)
+            return None
+
+        with client:
+            return client.generate_digests(
+                self.args.binary, hash_methods, digest_length=digest_length,
+                buffer_size=self.args.buffer_size)
+
     def verify_digests(self):
         """Processes args parsed by verify sub-command.  Processing results
         in the comparison of a provided hash digest against one generated from a
         binary."""
 
         digest = hashchk.Digest(
-            reference_digest=self.args.digest, sha3=self.args.sha3)
+            reference_digest=self.args.digest, sha3=self.args.sha3,
+            family=self.args.family)
 
         formatting = OutputFormatting(width=len(digest.reference_digest))
         print("\n{}\n".format(
@@ -139,12 +681,33 @@ class HashchkOutput(object):
         provided_digest = digest.reference_digest
         print(" Provided :{}".format(provided_digest))
 
+        # Ambiguous digest lengths are resolved by generating every candidate
+        # in a single pass and keeping whichever one matches
+        hash_methods = ([self.args.hash_function] if self.args.hash_function
+                        else digest.candidate_methods)
+
         # stdout used to provide status message while digest is being generated
-        sys.stdout.write(' Generated: {}'.format('Calculating'.center(60)))
-        generated_digest = hashchk.generate_digest(
-            filename=self.args.binary,
-            hash_method=self.args.hash_function or digest.hash_method)
+        width = len(provided_digest)
+        sys.stdout.write(' Generated: {}'.format('Calculating'.center(width)))
+        sys.stdout.flush()
+
+        def print_progress(meter):
+            sys.stdout.write('\r Generated: {}'.format(
+                format_progress(meter).center(width)))
+            sys.stdout.flush()
+
+        generated_digests = self._generate(
+            hash_methods, digest_length=len(provided_digest),
+            progress=print_progress)
+
+        hash_method = next(
+            (method for method in hash_methods if hashchk.compare_digests(
+                provided_digest, generated_digests[method])), hash_methods[0])
+        generated_digest = generated_digests[hash_method]
         sys.stdout.write("\r Generated:{}\n".format(generated_digest))
+        print(" Method   : {}".format(hash_method))
+        self.print_cache_stats()
+        self.print_metrics()
 
         # Compare and printout results
         result = hashchk.compare_digests(provided_digest, generated_digest)
@@ -178,6 +741,288 @@ class HashchkOutput(object):
         if not result:
             formatting.print_diffs(d1=processed_digests[0], d2=processed_digests[1])
 
+    def generate_digests(self):
+        """Processes args parsed by generate sub-command.  Processing results
+        in one digest per requested hash method, all generated from a single
+        read of the binary."""
+
+        generated_digests = self._generate(
+            self.args.hash_functions, digest_length=self.args.digest_length)
+
+        padding = max(len(method) for method in self.args.hash_functions)
+        for method in self.args.hash_functions:
+            print(" {:{p}}: {}".format(
+                method, generated_digests[method], p=padding))
+        self.print_cache_stats()
+        self.print_metrics()
+
+    def print_cache_stats(self):
+        """Prints digest cache counters if the digest cache was used."""
+
+        if self.cache_stats:
+            print(" Cache    : {hits} hit(s), {misses} miss(es), "
+                  "{bytes_saved} bytes not read".format(**self.cache_stats))
+
+    def print_metrics(self):
+        """Prints read and hash timings if --metrics was passed and the binary
+        was read."""
+
+        if not (self.args.metrics and self.metrics):
+            return
+
+        metrics = self.metrics
+        elapsed = metrics['elapsed'] or float('inf')
+        bound = ('I/O' if metrics['read_seconds'] > metrics['hash_seconds']
+                 else 'CPU')
+
+        print(" Metrics  : {:,} bytes in {:.3f}s ({:.1f} MB/s)".format(
+            metrics['bytes'], metrics['elapsed'],
+            metrics['bytes'] / elapsed / 1048576))
+        print("            read {:.3f}s, hash {:.3f}s; {}-bound".format(
+            metrics['read_seconds'], metrics['hash_seconds'], bound))
+
+    def check_manifest(self):
+        """Processes args parsed by check sub-command.  Processing results in
+        every manifest entry being verified by a pool of workers, with results
+        printed as each entry completes.  Malformed lines are skipped with a
+        warning; exits with status 1 if any file failed verification."""
+
+        import hashchk_manifest
+
+        malformed = []
+        entries = hashchk_manifest.parse_manifest(
+            self.args.manifest, sha3=self.args.sha3,
+            hash_method=self.args.hash_function, errors=malformed)
+        results = hashchk_manifest.verify_manifest(
+            entries, workers=self.args.workers, threads=self.args.threads)
+
+        total = failures = 0
+        for result in results:
+            total += 1
+            if result.error:
+                failures += 1
+                status = "{}FAILED open or read{}".format(RED, RESET_COLOR)
+            elif result.hash_method:
+                status = "{}OK{}".format(GREEN, RESET_COLOR)
+            else:
+                failures += 1
+                status = "{}FAILED{}".format(RED, RESET_COLOR)
+
+            print(" {}: {}".format(result.entry.filename, status))
+
+        formatting = OutputFormatting()
+        formatting.print_comparison_results(bool(total) and not failures)
+        if failures:
+            print(" {} of {} computed checksums did NOT match\n".format(
+                failures, total))
+
+        for line_number, message in malformed:
+            print(" WARNING: {}: line {}: {}".format(
+                self.args.manifest, line_number, message), file=sys.stderr)
+
+        # Like `sha256sum -c`, a manifest without a single valid line fails
+        if failures or not total:
+            sys.exit(1)
+
+    def index_binary(self):
+        """Processes args parsed by index sub-command.  Processing results in
+        either a new sidecar index being written, or the binary being checked
+        against an existing index with any corrupt byte ranges printed out;
+        exits with status 1 if any range is corrupt."""
+
+        import hashchk_index
+
+        index_file = (self.args.index_file or
+                      hashchk_index.index_filename(self.args.binary))
+
+        if not self.args.check:
+            index = hashchk_index.build_index(
+                self.args.binary, hash_method=self.args.hash_function,
+                chunk_size=self.args.chunk_size)
+            hashchk_index.write_index(index, index_file)
+
+            print(" {}: {}".format(index['hash_method'], index['digest']))
+            print(" Index : {} chunks written to {}".format(
+                len(index['chunks']), index_file))
+            return
+
+        index = hashchk_index.load_index(index_file)
+        corrupt_ranges = hashchk_index.verify_index(
+            self.args.binary, index, ranges=self.args.ranges)
+
+        formatting = OutputFormatting()
+        formatting.print_comparison_results(not corrupt_ranges)
+        for start, end in corrupt_ranges:
+            print(" Corrupt: bytes {}-{} ({} bytes)".format(
+                start, end - 1, end - start))
+        if corrupt_ranges:
+            print()
+            sys.exit(1)
+
+    def serve(self):
+        """Processes args parsed by serve sub-command.  Processing results in
+        a daemon answering requests until interrupted."""
+
+        # Only imported by the daemon
+        import signal
+        import hashchk_server
+
+        server = hashchk_server.HashchkServer(
+            self.args.socket, workers=self.args.workers,
+            cache_path=self.args.cache, cache_size=self.args.cache_size)
+
+        # Remove the socket when stopped by a service manager too
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+        print(" Serving on {} with {} worker(s)".format(
+            server.path, server.workers))
+        sys.stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    def snapshot_tree(self):
+        """Processes args parsed by snapshot sub-command.  Processing results
+        in the snapshot database being brought up to date with the directory
+        tree, and the changes since the last snapshot being printed out."""
+
+        import hashchk_snapshot
+
+        with hashchk_snapshot.Snapshot(self.args.database) as snapshot:
+            # e.g. no directory recorded yet, or a different hash method
+            try:
+                report = snapshot.scan(
+                    self.args.directory, hash_method=self.args.hash_function,
+                    full=self.args.full, workers=self.args.workers)
+            except ValueError as e:
+                sys.exit(e)
+            hash_method = snapshot.hash_method
+
+        print_snapshot_report(report)
+        print(" {:9}: {}".format(hash_method, report.root))
+
+    def audit_tree(self):
+        """Processes args parsed by audit sub-command.  Processing results in
+        the directory tree, or a second snapshot, being compared against the
+        snapshot, with every difference printed out; exits with status 1 if
+        any difference was found."""
+
+        import hashchk_snapshot
+
+        with hashchk_snapshot.Snapshot(self.args.database) as snapshot:
+            if self.args.compare:
+                with hashchk_snapshot.Snapshot(self.args.compare) as other:
+                    only_ours, only_theirs, modified = snapshot.compare(other)
+                    roots = [snapshot.root, other.root]
+
+                for path in only_ours:
+                    print(" Only in {}: {}".format(self.args.database, path))
+                for path in only_theirs:
+                    print(" Only in {}: {}".format(self.args.compare, path))
+                for path in modified:
+                    print(" Modified : {}".format(path))
+
+                formatting = OutputFormatting()
+                formatting.print_comparison_results(roots[0] == roots[1])
+                if roots[0] != roots[1]:
+                    sys.exit(1)
+                return
+
+            try:
+                report = snapshot.scan(update=False, full=self.args.full,
+                                       workers=self.args.workers)
+            except ValueError as e:
+                sys.exit(e)
+
+        print_snapshot_report(report)
+        matched = not (report.added or report.removed or report.modified or
+                       report.errors)
+        formatting = OutputFormatting()
+        formatting.print_comparison_results(matched)
+        if not matched:
+            sys.exit(1)
+
+    def find_duplicates(self):
+        """Processes args parsed by dedupe sub-command.  Processing results in
+        every group of duplicate files being printed out, followed by the
+        space they waste."""
+
+        import hashchk_dedupe
+
+        report = hashchk_dedupe.find_duplicates(
+            self.args.paths, hash_method=self.args.hash_function,
+            min_size=self.args.min_size, workers=self.args.workers)
+
+        for group in report.groups:
+            print(" {:,} bytes x {} ({}: {})".format(
+                group.size, len(group.filenames), self.args.hash_function,
+                group.digest))
+            for filename in group.filenames:
+                print("     {}".format(filename))
+
+        for filename, message in report.errors:
+            print(" {}FAILED{}   : {} ({})".format(
+                RED, RESET_COLOR, filename, message))
+
+        print(" Files    : {} scanned, {} partially read, {} read in "
+              "full".format(report.scanned, report.partially_read,
+                            report.fully_read))
+        print(" Savings  : {:,} bytes in {} duplicate group(s)".format(
+            hashchk_dedupe.bytes_saved(report.groups), len(report.groups)))
+
+
+def print_snapshot_report(report):
+    """Prints the changes found by a snapshot scan.
+
+    Args:
+        report (SnapshotReport): Report returned by Snapshot.scan().
+    """
+
+    for label, paths in (('Added', report.added), ('Removed', report.removed),
+                         ('Modified', report.modified)):
+        for path in paths:
+            print(" {:9}: {}".format(label, path))
+
+    for path, message in report.errors:
+        print(" {}FAILED{}   : {} ({})".format(RED, RESET_COLOR, path, message))
+
+    print(" Files    : {} unchanged, {} read, {} added, {} removed, "
+          "{} modified".format(report.unchanged, report.hashed,
+                               len(report.added), len(report.removed),
+                               len(report.modified)))
+
+
+def format_progress(meter):
+    """Formats a progress line for a hashchk.ProgressMeter.
+
+    Args:
+        meter (obj:`ProgressMeter`): Meter passed to a progress callback.
+
+    Returns:
+        str: Percentage complete (when the size is known), throughput, and
+            estimated time remaining, e.g. '42.0% 512.3 MB/s ETA 0:00:07'.
+    """
+
+    parts = []
+    if meter.total_bytes:
+        parts.append('{:.1%}'.format(
+            min(meter.bytes_hashed / float(meter.total_bytes), 1)))
+    else:
+        parts.append('{:,} bytes'.format(meter.bytes_hashed))
+
+    parts.append('{:.1f} MB/s'.format(meter.rate / 1048576))
+
+    eta = meter.eta
+    if eta is not None:
+        minutes, seconds = divmod(int(eta), 60)
+        parts.append('ETA {}:{:02}:{:02}'.format(
+            minutes // 60, minutes % 60, seconds))
+
+    return ' '.join(parts)
+
 
 class OutputFormatting(object):
     """Organizational class for reusable and dynamic output messages
@@ -237,6 +1082,9 @@ class OutputFormatting(object):
                 digests apart
         """
 
+        # Only imported when digests differ
+        import difflib
+
         diffs = list(difflib.Differ().compare([d1 + '\n'], [d2 + '\n']))
         titles = identifiers or ['Digest1', 'Digest2']
 
@@ -253,6 +1101,39 @@ class OutputFormatting(object):
         print("{}\n".format(self.build_line_break(header='End')))
 
 
+def init_colors():
+    """Prepares stdout for colored output.  Windows consoles need colorama to
+    translate ANSI escape sequences, so it's only imported there; elsewhere,
+    colors are dropped unless stdout is a terminal."""
+
+    global RED, GREEN, CYAN, BRIGHT, RESET_COLOR
+
+    if os.name == 'nt':
+        import colorama
+        colorama.init(convert=True)
+    elif not sys.stdout.isatty():
+        RED = GREEN = CYAN = BRIGHT = RESET_COLOR = ''
+
+
+def main(argv=None, prog=None):
+    """Runs hashchk from the terminal.
+
+    Args:
+        argv (list[str], optional): Arguments; defaults to sys.argv[1:].
+        prog (str, optional): Program name shown in usage messages.
+    """
+
+    parser = HashchkParser(prog=prog)
+    args = parser.parser.parse_args(argv)
+
+    # Tree digests read leaves at arbitrary offsets, so stdin can't be used
+    if getattr(args, 'tree', False) and args.binary == '-':
+        parser.subparser.choices[args.command].error(
+            "--tree can't read the binary from stdin")
+
+    init_colors()
+    HashchkOutput(parsed_args=args)
+
+
 if __name__ == '__main__':
-    colorama.init(convert=True)
-    terminal = HashchkOutput(parsed_args=HashchkParser().args)
+    main()
@@ -0,0 +1,182 @@
+"""Functions for generating tree hash digests, which split a file into fixed
+size leaves that are hashed in parallel and then combined into a single root
+digest.  Tree digests let one large file be hashed on every core, but they
+are NOT interchangeable with the sequential digests produced by
+hashchk.generate_digest(); both sides of a comparison must use the same hash
+method and leaf size.
+
+Both constructions are two levels deep: one level of leaves and a root node
+computed over the concatenation of every leaf digest, in leaf order.
+
+BLAKE2 (blake2b, blake2s) uses the tree hashing parameters defined by the
+BLAKE2 specification (RFC 7693, section 2.10):
+
+    * fanout=0 (unlimited), depth=2, leaf_size=LEAF_SIZE, and
+      inner_size=DIGEST_SIZE for every node
+    * leaves use node_depth=0 and node_offset=INDEX; the last leaf also sets
+      last_node=True
+    * the root uses node_depth=1, node_offset=0, and last_node=True
+
+Every other hash method uses a Merkle construction with one byte prefixes to
+separate leaf and root nodes, as in RFC 6962:
+
+    leaf = H(0x00 || LEAF_DATA)
+    root = H(0x01 || leaf_0 || leaf_1 || ... || leaf_n-1)
+
+Empty files are hashed as a single empty leaf.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+from six.moves import range
+# -----------------------------------------------------------------------------
+
+import os
+import binascii
+import functools
+
+import hashchk
+
+DEFAULT_LEAF_SIZE = 8388608
+
+LEAF_PREFIX, ROOT_PREFIX = b'\x00', b'\x01'
+
+
+def _new_node(hash_method, leaf_size, node_offset=0, node_depth=0,
+              last_node=False):
+    """Creates the hash object for one node of the tree.
+
+    Args:
+        hash_method (str): exact name of hashlib method.
+        leaf_size (int): Size of each leaf in bytes.
+        node_offset (int, optional): Index of the node within its level.
+        node_depth (int, optional): 0 for leaves, 1 for the root.
+        last_node (bool, optional): Node is the last node of its level.
+
+    Returns:
+        obj: hashlib object with any Merkle prefix already applied.
+    """
+
+    if hash_method in ('blake2b', 'blake2s'):
+        blake2 = hashchk.hash_constructor(hash_method)
+        return blake2(
+            fanout=0, depth=2, leaf_size=leaf_size,
+            inner_size=blake2.MAX_DIGEST_SIZE, node_offset=node_offset,
+            node_depth=node_depth, last_node=last_node)
+
+    node = hashchk.hash_constructor(hash_method)()
+    node.update(ROOT_PREFIX if node_depth else LEAF_PREFIX)
+    return node
+
+
+def leaf_digests(filename, hash_methods, index, leaf_size, leaf_count,
+                 buffer_size=None):
+    """Generates the leaf digest of a single leaf for every hash method while
+    only reading the leaf once.
+
+    Args:
+        filename (str): Filename of binary file.
+        hash_methods (list[str]): exact names of hashlib methods.
+        index (int): Index of the leaf.
+        leaf_size (int): Size of each leaf in bytes.
+        leaf_count (int): Total number of leaves in the file.
+        buffer_size (int, optional): Size of blocks read into memory.
+
+    Returns:
+        dict: Raw leaf digests (bytes) keyed by hash method.
+    """
+
+    last_node = index == leaf_count - 1
+    nodes = [(method, _new_node(method, leaf_size, node_offset=index,
+                                last_node=last_node))
+             for method in hash_methods]
+
+    with open(filename, 'rb', buffering=0) as f:
+        for data in hashchk.read_range(
+                f, index * leaf_size, leaf_size, buffer_size=buffer_size):
+            for _, node in nodes:
+                node.update(data)
+
+    return dict((method, binascii.unhexlify(hashchk.hexdigest(node)))
+                for method, node in nodes)
+
+
+def root_digest(hash_method, leaves, leaf_size, digest_length=None):
+    """Combines leaf digests into the root digest of the tree.
+
+    Args:
+        hash_method (str): exact name of hashlib method.
+        leaves (list[bytes]): Raw leaf digests in leaf order.
+        leaf_size (int): Size of each leaf in bytes.
+        digest_length (int, optional): Length of the hexadecimal root digest
+            produced by SHAKE methods; leaves always use the default length.
+
+    Returns:
+        str: Hexadecimal root digest.
+    """
+
+    root = _new_node(hash_method, leaf_size, node_depth=1, last_node=True)
+    for leaf in leaves:
+        root.update(leaf)
+
+    return hashchk.hexdigest(root, digest_length)
+
+
+def tree_digests(filename, hash_methods, leaf_size=DEFAULT_LEAF_SIZE,
+                 workers=None, threads=False, buffer_size=None,
+                 digest_length=None):
+    """Generates a tree digest for each hash method, hashing leaves in
+    parallel; each leaf is only read once no matter how many hash methods are
+    requested.  The file must not change while it's being hashed.
+
+    Args:
+        filename (str): Filename of binary file.
+        hash_methods (list[str]): exact names of hashlib methods.
+        leaf_size (int, optional): Size of each leaf in bytes.
+        workers (int, optional): Size of the worker pool; defaults to the
+            number of CPUs.
+        threads (bool, optional): Use a thread pool instead of a process pool.
+        buffer_size (int, optional): Size of blocks read into memory.
+        digest_length (int, optional): Length of SHAKE root digests.
+
+    Returns:
+        dict: Hexadecimal tree digests keyed by hash method.
+    """
+
+    # Only imported once a tree digest is requested
+    import concurrent.futures
+
+    leaf_count = max(1, -(-os.path.getsize(filename) // leaf_size))
+    executor_class = (concurrent.futures.ThreadPoolExecutor if threads
+                      else concurrent.futures.ProcessPoolExecutor)
+
+    hash_leaf = functools.partial(
+        leaf_digests, filename, hash_methods, leaf_size=leaf_size,
+        leaf_count=leaf_count, buffer_size=buffer_size)
+
+    with executor_class(max_workers=workers) as executor:
+        leaves = list(executor.map(hash_leaf, range(leaf_count)))
+
+    return dict((method, root_digest(
+        method, [leaf[method] for leaf in leaves], leaf_size,
+        digest_length=digest_length))
+        for method in hash_methods)
+
+
+def tree_digest(filename, hash_method, **tree_options):
+    """
+    Args:
+        filename (str): Filename of binary file.
+        hash_method (str): exact name of hashlib method.
+        **tree_options: leaf_size, workers, threads, buffer_size, and
+            digest_length; see tree_digests().
+
+    Returns:
+        str: Hexadecimal tree digest.
+    """
+
+    return tree_digests(filename, [hash_method], **tree_options)[hash_method]
+
+
+if __name__ == '__main__':
+    pass
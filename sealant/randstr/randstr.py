@@ -6,11 +6,21 @@ Todo:
 """
 
 from __future__ import print_function
-from six.moves import range
+from six.moves import range, zip
 
+import six
+
+import os
+import array
+import bisect
+import warnings
+import fractions
 import importlib
 import string
 import random
+import itertools
+import threading
+import collections
 
 """"Cryptographically secure random numbers are generated using SystemRandom
 class.  The secrets module has a secrets.SystemRandom class, but this is just an
@@ -21,6 +31,35 @@ try:
 except ImportError:
     RAND_METHOD = random.SystemRandom()
 
+# Largest number of random bytes requested from the OS at once
+MAX_ENTROPY_REQUEST = 1048576
+
+# Default number of characters per chunk yielded by generate_chunks()
+STREAM_CHUNK_SIZE = 65536
+
+# Unique batches filling more than this fraction of the keyspace warn that
+# most draws will be duplicates.  A Fraction, so comparisons against keyspaces
+# too large for a float stay exact.
+UNIQUE_WARNING_FRACTION = fractions.Fraction(1, 2)
+
+# Named character classes that can be composed into a CharacterSet
+CHARACTER_CLASSES = collections.OrderedDict([
+    ('lowercase', string.ascii_lowercase),
+    ('uppercase', string.ascii_uppercase),
+    ('letters', string.ascii_letters),
+    ('digits', string.digits),
+    ('hexdigits', string.digits + 'abcdef'),
+    ('punctuation', string.punctuation),
+    ('space', ' '),
+])
+
+DEFAULT_CHAR_SET = '{s.ascii_letters}{s.digits}{s.punctuation} '.format(
+    s=string)
+
+# Default EntropyPool water marks in bytes
+POOL_LOW_WATER = 65536
+POOL_HIGH_WATER = 262144
+
 
 class RandomString(object):
     """Class for generating random strings based on default, or user-defined
@@ -28,23 +67,43 @@ class RandomString(object):
 
     Args:
         length (int): Desired length of randomized string.
-        shuffle (bool, optional): If True, self.char_set will be shuffled prior
-            to string generation.
+        shuffle (bool, optional): If True, self.char_set is shuffled once when
+            the instance is created.
         user_char_set (str, optional): Character set that will replace character
             set provided by self.default_char_set property.
+        entropy_pool (obj:`EntropyPool`, optional): Pool random bytes are
+            drawn from instead of requesting them from the OS per string.
+        minimums (dict, optional): Minimum number of characters from each
+            character class, keyed by CHARACTER_CLASSES name or by a string
+            of characters, e.g. {'uppercase': 1, 'digits': 1, '!@#$': 1}.
 
     Attributes:
         length (int): Length of the randomly generated string.
-        shuffle (bool): If True, self.char_set will be shuffled prior to string
-            generation.
+        shuffle (bool): If True, self.char_set was shuffled when the instance
+            was created.
         char_set (str): character set to be used as population sample for
             randomization process.
+        entropy_pool (obj:`EntropyPool`): Pool random bytes are drawn from,
+            or None to request them from the OS directly.
+        minimums (dict): Minimum number of characters from each character
+            class; see generate_compliant().
     """
 
-    def __init__(self, length=None, shuffle=False, user_char_set=None):
+    def __init__(self, length=None, shuffle=False, user_char_set=None,
+                 entropy_pool=None, minimums=None):
         self.length = length
         self.shuffle = shuffle
         self.char_set = user_char_set or self.default_char_set
+        self.entropy_pool = entropy_pool
+        self.minimums = minimums
+
+        self._sampler = None
+        self._requirements = None
+
+        # Shuffled once; shuffling per string would recompile the set every
+        # time without changing the distribution of generated strings
+        if self.shuffle:
+            self.shuffle_characters()
 
     def __call__(self):
         """Allows calling RandomString() like a function for continual random
@@ -64,28 +123,902 @@ class RandomString(object):
                 population sample defined by instance attributes
         """
 
-        if self.shuffle:
-            self.shuffle_characters()
+        if self.minimums:
+            return next(self.generate_compliant(1))
+
+        return self.sampler.sample(self.length)
+
+    def generate_chunks(self, length=None, chunk_size=STREAM_CHUNK_SIZE,
+                        workers=None):
+        """Generates one random string as a sequence of fixed size chunks, so
+        strings of any length can be written out in constant memory.
+
+        Args:
+            length (int, optional): Total length of the string; defaults to
+                self.length.
+            chunk_size (int, optional): Characters per chunk.
+            workers (int, optional): Number of worker processes; see
+                generate_many().
+
+        Yields:
+            str: Chunks of randomly generated characters; every chunk but the
+                last holds `chunk_size` characters.
+
+        Raises:
+            ValueError: self.minimums is set; required characters can't be
+                placed in a string that isn't held in memory.
+        """
+
+        if self.minimums:
+            raise ValueError("Minimum character counts aren't supported for "
+                             "chunked strings")
+
+        length = self.length if length is None else length
+        # Lazy, so terabyte strings don't hold millions of sizes in memory
+        sizes = (min(chunk_size, length - chunk_start)
+                 for chunk_start in range(0, length, chunk_size))
+
+        if workers and workers > 1:
+            chars = self.character_set.chars
+            for chunk in ordered_map(
+                    _sample, ((chars, size) for size in sizes), workers):
+                yield chunk
+        else:
+            sampler = self.sampler
+            for size in sizes:
+                yield sampler.sample(size)
+
+    def generate_many(self, count, length=None, workers=None,
+                      unique=False):
+        """Generates a batch of random strings that share one sampler and one
+        stream of entropy requests, rather than setting up and requesting
+        entropy for each string.
+
+        With `workers`, batches are generated on a process pool instead; each
+        worker draws its own entropy from the OS (never from entropy_pool),
+        and strings are still yielded in order.
+
+        With `unique`, strings already yielded by this batch are discarded
+        and redrawn.  Every string is tracked as a packed integer (see
+        PackedIntSet), so tens of millions of short codes fit in a few
+        hundred megabytes.
+
+        If self.minimums is set, strings come from generate_compliant() and
+        are always generated in this process.
+
+        Args:
+            count (int): Number of strings.
+            length (int, optional): Length of each string; defaults to
+                self.length.
+            workers (int, optional): Number of worker processes; batches are
+                generated in this process if None or 1.
+            unique (bool, optional): Never yield the same string twice.
+
+        Yields:
+            str: `count` strings of randomly generated characters; strings
+                are generated lazily, a batch at a time.
+
+        Raises:
+            ValueError: `unique` was requested with more strings than the
+                character set and length can produce.
+        """
+
+        length = self.length if length is None else length
+
+        if unique:
+            for random_str in self._generate_unique(count, length, workers):
+                yield random_str
+            return
+
+        if self.minimums:
+            for random_str in self.generate_compliant(count, length):
+                yield random_str
+            return
+
+        for batch_count, chars in self._batches(
+                _sample, count, length, workers):
+            for index in range(batch_count):
+                yield chars[index * length:(index + 1) * length]
+
+    def _generate_unique(self, count, length, workers):
+        """Generator behind generate_many(unique=True); draws batches until
+        `count` distinct strings have been yielded."""
+
+        character_set = self.character_set
+        keyspace = character_set.keyspace(length)
+        if count > keyspace:
+            raise ValueError(
+                "Can't generate {} unique strings; only {} strings of length "
+                "{} exist for this character set".format(
+                    count, keyspace, length))
+        if count > keyspace * UNIQUE_WARNING_FRACTION:
+            warnings.warn(
+                "{} unique strings fill {:.0%} of the keyspace; most draws "
+                "will be duplicates and codes will be easy to guess".format(
+                    count, float(fractions.Fraction(count, keyspace))),
+                RuntimeWarning)
+
+        encode = radix_encoder(character_set)
+        issued = PackedIntSet(expected=count)
+
+        remaining = count
+        while remaining:
+            if self.minimums:
+                candidates = self.generate_compliant(remaining, length)
+            else:
+                candidates = self.generate_many(remaining, length, workers)
+
+            for random_str in candidates:
+                if issued.add(encode(random_str)):
+                    remaining -= 1
+                    yield random_str
+
+    def generate_compliant(self, count, length=None):
+        """Generates strings that contain at least self.minimums characters
+        from each character class, constructively rather than by retrying:
+        each string is built from exactly the required number of characters
+        per class plus characters drawn from the whole character set, and is
+        then securely shuffled.  Every string costs one pass no matter how
+        strict the policy is.
+
+        Distribution: every required character is uniform over its class
+        (restricted to the character set), every other character is uniform
+        over the whole character set, and positions are uniformly permuted.
+        Every compliant string can be produced, but compliant strings are not
+        all equally likely; strings whose extra characters happen to fall in
+        a required class are slightly favoured over a uniform draw from all
+        compliant strings.
+
+        Args:
+            count (int): Number of strings.
+            length (int, optional): Length of each string; defaults to
+                self.length.
+
+        Yields:
+            str: `count` compliant strings, generated a batch at a time.
+
+        Raises:
+            ValueError: The minimums add up to more than `length`, or a class
+                has no characters in the character set.
+        """
+
+        length = self.length if length is None else length
+        requirements = self.requirements
+        required = sum(minimum for _, minimum in requirements)
+        if required > length:
+            raise ValueError("Minimum character counts add up to {}, more "
+                             "than the length {}".format(required, length))
+        requirements = requirements + [(self.character_set, length - required)]
+
+        entropy = self.sampler.entropy
+        per_batch = max(1, MAX_ENTROPY_REQUEST // max(length, 1))
+
+        for batch_start in range(0, count, per_batch):
+            batch_count = min(per_batch, count - batch_start)
+            pieces = [(class_set.sample(batch_count * minimum, entropy),
+                       minimum) for class_set, minimum in requirements]
+
+            for index in range(batch_count):
+                chars = []
+                for sample, minimum in pieces:
+                    chars.extend(sample[index * minimum:
+                                        (index + 1) * minimum])
+                secure_shuffle(chars, entropy)
+                yield ''.join(chars)
+
+    def generate_lines(self, count, length=None, workers=None, unique=False):
+        """Equivalent of generate_many() that yields whole batches of newline
+        terminated strings, ready to be written out.  Batches are joined by
+        the worker processes, so this scales with `workers` where
+        generate_many() is limited by splitting strings in this process.
+
+        Args:
+            count (int): Number of strings.
+            length (int, optional): Length of each string; defaults to
+                self.length.
+            workers (int, optional): Number of worker processes.
+            unique (bool, optional): Never yield the same string twice; lines
+                are then joined in this process, as they are when
+                self.minimums is set.
+
+        Yields:
+            str: Batches of newline terminated strings; `count` lines in
+                total.
+        """
+
+        length = self.length if length is None else length
+
+        if unique or self.minimums:
+            strings = self.generate_many(count, length, workers, unique=unique)
+            per_batch = max(1, MAX_ENTROPY_REQUEST // max(length, 1))
+            for _ in range(0, count, per_batch):
+                yield ''.join([random_str + '\n' for random_str in
+                               itertools.islice(strings, per_batch)])
+            return
+
+        for _, lines in self._batches(_sample_lines, count, length, workers):
+            yield lines
+
+    def _batches(self, function, count, length, workers):
+        """Splits `count` strings into batches of up to MAX_ENTROPY_REQUEST
+        characters and generates each one with `function`.
+
+        Args:
+            function (callable): _sample() or _sample_lines().
+            count (int): Number of strings.
+            length (int): Length of each string.
+            workers (int): Number of worker processes, or None.
+
+        Yields:
+            tuple: (number of strings, output of `function`) per batch, in
+                order.
+        """
+
+        per_batch = max(1, MAX_ENTROPY_REQUEST // max(length, 1))
+
+        # Generated lazily, and twice: once for the calls and once to pair
+        # each result with its count
+        def batch_counts():
+            return (min(per_batch, count - batch_start)
+                    for batch_start in range(0, count, per_batch))
+
+        # Workers receive plain strings and compile their own sets
+        chars = self.character_set.chars
+
+        def arguments(batch_count):
+            if function is _sample:
+                return (chars, batch_count * length)
+            return (chars, batch_count, length)
 
-        return "".join(
-            RAND_METHOD.choice(self.char_set) for _ in range(0, self.length))
+        if workers and workers > 1:
+            results = ordered_map(
+                function, (arguments(n) for n in batch_counts()), workers)
+        else:
+            sampler = self.sampler
+            results = (function(*arguments(n), sampler=sampler)
+                       for n in batch_counts())
+
+        for batch_count, result in zip(batch_counts(), results):
+            yield batch_count, result
+
+    @property
+    def sampler(self):
+        """obj:`CharacterSampler`: Sampler for the current character set;
+        rebuilt only when the character set changes."""
+
+        entropy = (os.urandom if self.entropy_pool is None
+                   else self.entropy_pool.read)
+        character_set = self.character_set
+
+        if (self._sampler is None
+                or self._sampler.character_set is not character_set
+                or self._sampler.entropy != entropy):
+            self._sampler = CharacterSampler(character_set, entropy=entropy)
+        return self._sampler
+
+    @property
+    def requirements(self):
+        """list[tuple]: self.minimums compiled against the character set by
+        compile_minimums(); recompiled only when either one changes."""
+
+        character_set = self.character_set
+        minimums = self.minimums or {}
+
+        if (self._requirements is None
+                or self._requirements[0] is not character_set
+                or self._requirements[1] != minimums):
+            self._requirements = (character_set, dict(minimums),
+                                  compile_minimums(character_set, minimums))
+        return self._requirements[2]
+
+    @property
+    def character_set(self):
+        """obj:`CharacterSet`: Compiled, deduplicated form of self.char_set;
+        compiled sets are cached and shared between instances."""
+        return CharacterSet.compile(self.char_set)
 
     def shuffle_characters(self):
         """Implementation of Python's random.shuffle(); uses SystemRandom() for
-        random number generation instead standard pseudo-RNG."""
+        random number generation instead standard pseudo-RNG.
 
-        char_list = list(self.char_set)
-        for i in range(len(char_list) - 1, 1, -1):
-            j = RAND_METHOD.randbelow(i + 1)
-            char_list[i], char_list[j] = char_list[j], char_list[i]
+        The order of the character set has no effect on the distribution of
+        generated strings; shuffling only costs a recompile of the set."""
 
+        char_list = list(self.char_set)
+        secure_shuffle(char_list)
         self.char_set = ''.join(char_list)
 
     @property
     def default_char_set(self):
         """str: concatenation of all ASCII lowercase, uppercase, and punctuation
         characters.  Also contains single character space."""
-        return '{s.ascii_letters}{s.digits}{s.punctuation} '.format(s=string)
+        return DEFAULT_CHAR_SET
+
+
+class CharacterSet(object):
+    """Immutable, precompiled set of characters that random strings are drawn
+    from.  Use CharacterSet.compile() to reuse an already compiled set.
+
+    Duplicate characters are dropped, keeping the first occurrence, so every
+    distinct character is equally likely no matter how the set was written.
+
+    Characters are drawn with rejection sampling over random bytes: with N
+    characters, only byte values below the largest multiple of N that fits
+    in a byte are kept, and each kept value selects character `value % N`.
+    Every character is therefore exactly as likely as it would be with
+    `RAND_METHOD.choice()`, but rejecting and mapping a whole block of bytes
+    takes a single bytes.translate() call, using tables built once here.
+    Sets larger than 256 characters sample two bytes at a time instead.
+
+    Args:
+        chars (str): Characters in the set.
+
+    Raises:
+        ValueError: The set is empty or has more than 65536 distinct
+            characters.
+    """
+
+    __slots__ = ('_chars', '_size', '_sample_bytes', '_limit', '_table',
+                 '_rejected', '_mapping')
+
+    _cache = {}
+    _cache_size = 256
+
+    def __init__(self, chars):
+        unique = []
+        seen = set()
+        for char in chars:
+            if char not in seen:
+                seen.add(char)
+                unique.append(char)
+
+        self._chars = ''.join(unique)
+        self._size = len(unique)
+
+        if not 0 < self._size <= 65536:
+            raise ValueError("Character set must have between 1 and 65536 "
+                             "characters, not {}".format(self._size))
+
+        self._sample_bytes = 1 if self._size <= 256 else 2
+        sample_range = 256 ** self._sample_bytes
+        self._limit = sample_range - sample_range % self._size
+
+        self._table = self._rejected = self._mapping = None
+        if self._sample_bytes == 1:
+            self._build_tables()
+
+    @classmethod
+    def compile(cls, chars):
+        """Compiles a character set, reusing a previously compiled set with
+        the same characters in the same order.
+
+        Args:
+            chars (str|list[str]|obj:`CharacterSet`): Characters in the set.
+
+        Returns:
+            obj:`CharacterSet`: Compiled character set.
+        """
+
+        if isinstance(chars, cls):
+            return chars
+        if not isinstance(chars, six.string_types):
+            chars = ''.join(chars)
+
+        compiled = cls._cache.get(chars)
+        if compiled is None:
+            if len(cls._cache) >= cls._cache_size:
+                cls._cache.clear()
+            compiled = cls._cache[chars] = cls(chars)
+        return compiled
+
+    @classmethod
+    def from_classes(cls, *names):
+        """Composes a character set from named character classes.
+
+        Args:
+            *names (str): Keys of CHARACTER_CLASSES, e.g. 'lowercase' and
+                'digits'.
+
+        Returns:
+            obj:`CharacterSet`: Characters of every class, in order.
+
+        Raises:
+            ValueError: A name isn't a known character class.
+        """
+
+        unknown = [name for name in names if name not in CHARACTER_CLASSES]
+        if unknown:
+            raise ValueError("Unknown character class(es): {}".format(
+                ', '.join(unknown)))
+
+        return cls.compile(''.join(CHARACTER_CLASSES[name] for name in names))
+
+    @property
+    def chars(self):
+        """str: Distinct characters in the set."""
+        return self._chars
+
+    def keyspace(self, length):
+        """int: Number of distinct strings of `length` characters."""
+        return self._size ** length
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._chars)
+
+    def __contains__(self, char):
+        return char in self._chars
+
+    def __eq__(self, other):
+        return isinstance(other, CharacterSet) and self._chars == other._chars
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._chars)
+
+    def __add__(self, other):
+        if isinstance(other, CharacterSet):
+            other = other.chars
+        return CharacterSet.compile(self._chars + ''.join(other))
+
+    def __str__(self):
+        return self._chars
+
+    def __repr__(self):
+        return 'CharacterSet({!r})'.format(self._chars)
+
+    def _build_tables(self):
+        """Builds the translate tables used to reject and map single bytes.
+
+        Character sets that fit in Latin-1 are mapped byte-to-byte by the
+        same translate() call that deletes rejected bytes; any other
+        character set maps the surviving bytes with str.translate().
+        """
+
+        self._rejected = bytes(bytearray(range(self._limit, 256)))
+        chars = [self._chars[value % self._size]
+                 for value in range(self._limit)]
+
+        if all(ord(char) < 256 for char in chars):
+            self._table = bytes(bytearray(
+                [ord(char) for char in chars] +
+                [0] * (256 - self._limit)))
+        else:
+            self._mapping = dict(enumerate(chars))
+
+    def _accepted(self, request, entropy):
+        """str: Characters mapped from `request` samples that survived
+        rejection; usually fewer than `request`."""
+
+        random_bytes = entropy(request * self._sample_bytes)
+
+        if self._sample_bytes == 2:
+            # Native byte order; every order is equally uniform
+            return ''.join([self._chars[value % self._size]
+                            for value in array.array('H', random_bytes)
+                            if value < self._limit])
+
+        accepted = random_bytes.translate(self._table, self._rejected)
+        if self._mapping is not None:
+            return accepted.decode('latin-1').translate(self._mapping)
+
+        # Python 2 strings are already bytes
+        return accepted if str is bytes else accepted.decode('latin-1')
+
+    def sample(self, count, entropy=os.urandom):
+        """
+        Args:
+            count (int): Number of characters.
+            entropy (callable, optional): Returns the requested number of
+                random bytes; see also EntropyPool.read().
+
+        Returns:
+            str: `count` characters drawn uniformly and independently from
+                the set.
+        """
+
+        # Samples needed on average, plus slack so one request usually
+        # suffices; requests are capped to bound memory use
+        acceptance = self._limit / float(256 ** self._sample_bytes)
+
+        chunks, remaining = [], count
+        while remaining > 0:
+            request = min(int(remaining / acceptance) + 64,
+                          MAX_ENTROPY_REQUEST // self._sample_bytes)
+            chunk = self._accepted(request, entropy)[:remaining]
+            chunks.append(chunk)
+            remaining -= len(chunk)
+
+        return ''.join(chunks)
+
+
+class CharacterSampler(object):
+    """Draws uniformly random characters from a character set in bulk, using
+    one source of entropy.
+
+    Args:
+        char_set (str|obj:`CharacterSet`): Characters sampled from; compiled
+            with CharacterSet.compile(), so duplicates are dropped.
+        entropy (callable, optional): Returns the requested number of random
+            bytes; defaults to os.urandom, see also EntropyPool.read().
+
+    Attributes:
+        character_set (obj:`CharacterSet`): Characters sampled from.
+        entropy (callable): Source of random bytes.
+
+    Raises:
+        ValueError: The character set is empty or has more than 65536
+            distinct characters.
+    """
+
+    def __init__(self, char_set, entropy=os.urandom):
+        self.character_set = CharacterSet.compile(char_set)
+        self.entropy = entropy
+
+    def sample(self, count):
+        """
+        Args:
+            count (int): Number of characters.
+
+        Returns:
+            str: `count` characters drawn uniformly and independently from
+                the character set.
+        """
+        return self.character_set.sample(count, self.entropy)
+
+
+def _sample(char_set, count, sampler=None):
+    """Process pool target; see CharacterSampler.sample()."""
+    return (sampler or CharacterSampler(char_set)).sample(count)
+
+
+def _sample_lines(char_set, count, length, sampler=None):
+    """Process pool target.
+
+    Returns:
+        str: `count` newline terminated strings of `length` characters.
+    """
+
+    chars = _sample(char_set, count * length, sampler=sampler)
+    return ''.join([chars[index * length:(index + 1) * length] + '\n'
+                    for index in range(count)])
+
+
+def _random_values(entropy, sample_bytes, request):
+    """Generator of random unsigned integers of `sample_bytes` bytes, drawn
+    from `entropy` `request` values at a time."""
+
+    while True:
+        random_bytes = entropy(request * sample_bytes)
+        if sample_bytes == 1:
+            values = bytearray(random_bytes)
+        else:
+            values = array.array('H', random_bytes)
+        for value in values:
+            yield value
+
+
+def secure_shuffle(items, entropy=None):
+    """Fisher-Yates shuffle of a list in place, using a secure source of
+    random numbers instead of the standard pseudo-RNG; every permutation is
+    equally likely.
+
+    With `entropy`, indices are drawn from a single request of random bytes
+    with the same rejection sampling as CharacterSet.sample(); otherwise
+    RAND_METHOD is called once per item.
+
+    Args:
+        items (list): List to shuffle.
+        entropy (callable, optional): Returns the requested number of random
+            bytes, e.g. os.urandom or EntropyPool.read().
+    """
+
+    count = len(items)
+    if entropy is None or count > 65536:
+        for i in range(count - 1, 0, -1):
+            j = RAND_METHOD.randbelow(i + 1)
+            items[i], items[j] = items[j], items[i]
+        return
+
+    sample_bytes = 1 if count <= 256 else 2
+    sample_range = 256 ** sample_bytes
+    # Slack so the first request usually covers every rejected sample too
+    values = _random_values(entropy, sample_bytes, count + 16)
+
+    for i in range(count - 1, 0, -1):
+        limit = sample_range - sample_range % (i + 1)
+        value = next(values)
+        while value >= limit:
+            value = next(values)
+
+        j = value % (i + 1)
+        items[i], items[j] = items[j], items[i]
+
+
+def compile_minimums(character_set, minimums):
+    """Resolves minimum character counts against a character set.
+
+    Args:
+        character_set (obj:`CharacterSet`): Characters strings are drawn from.
+        minimums (dict): Minimum counts keyed by CHARACTER_CLASSES name or by
+            a string of characters.
+
+    Returns:
+        list[tuple]: (CharacterSet, count) per class with a non-zero count;
+            each set only holds characters that are also in
+            `character_set`.
+
+    Raises:
+        ValueError: A class has no characters in `character_set`, or a count
+            is negative.
+    """
+
+    requirements = []
+    for name, minimum in sorted(minimums.items()):
+        if minimum < 0:
+            raise ValueError("Minimum for {!r} is negative".format(name))
+        if not minimum:
+            continue
+
+        class_chars = [char for char in CHARACTER_CLASSES.get(name, name)
+                       if char in character_set]
+        if not class_chars:
+            raise ValueError("Character set has no characters from {!r}"
+                             .format(name))
+        requirements.append((CharacterSet.compile(class_chars), minimum))
+
+    return requirements
+
+
+def radix_encoder(char_set):
+    """Builds a function that packs strings into integers, treating each
+    character as a digit in base len(set(char_set)).  Distinct strings of the
+    same length always pack to distinct integers.
+
+    Args:
+        char_set (str|obj:`CharacterSet`): Characters strings are drawn from.
+
+    Returns:
+        callable: Takes a string and returns its integer encoding.
+    """
+
+    digits = sorted(set(char_set))
+    radix = len(digits)
+
+    # int() parses bases up to 36 in C once characters are mapped to digits
+    if radix <= 36:
+        numerals = string.digits + string.ascii_lowercase
+        table = dict((ord(char), numerals[index])
+                     for index, char in enumerate(digits))
+
+        if radix == 1:
+            return lambda random_str: 0
+        return lambda random_str: int(random_str.translate(table), radix)
+
+    values = dict((char, index) for index, char in enumerate(digits))
+
+    def encode(random_str):
+        value = 0
+        for char in random_str:
+            value = value * radix + values[char]
+        return value
+
+    return encode
+
+
+class PackedIntSet(object):
+    """Compact set of non-negative integers below 2**64, stored as 8 byte
+    unsigned integers in sorted `array('Q')` buckets rather than as Python
+    int objects.  Buckets are chosen from the low bits of each value, so
+    random values spread evenly and each insert only shifts one small bucket.
+
+    Larger integers are folded to their low 64 bits; two such values that
+    share their low 64 bits are treated as equal, which can only cause a
+    value to be wrongly reported as already present.
+
+    Args:
+        expected (int, optional): Expected number of values; sizes the
+            bucket table for buckets of roughly 256 values.
+    """
+
+    def __init__(self, expected=0):
+        bucket_count = 1
+        while bucket_count * 256 < expected:
+            bucket_count *= 2
+
+        self._mask = bucket_count - 1
+        self._buckets = [None] * bucket_count
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, value):
+        value &= 0xFFFFFFFFFFFFFFFF
+        bucket = self._buckets[value & self._mask]
+        if bucket is None:
+            return False
+
+        index = bisect.bisect_left(bucket, value)
+        return index < len(bucket) and bucket[index] == value
+
+    def add(self, value):
+        """
+        Args:
+            value (int): Non-negative integer.
+
+        Returns:
+            bool: True if `value` was added, False if it was already present.
+        """
+
+        value &= 0xFFFFFFFFFFFFFFFF
+        bucket = self._buckets[value & self._mask]
+        if bucket is None:
+            bucket = self._buckets[value & self._mask] = array.array('Q')
+
+        index = bisect.bisect_left(bucket, value)
+        if index < len(bucket) and bucket[index] == value:
+            return False
+
+        bucket.insert(index, value)
+        self._length += 1
+        return True
+
+
+def ordered_map(function, arguments, workers):
+    """Calls a function on a process pool, yielding results in order.  At
+    most `workers` * 2 calls are pending at once, so memory use is bounded no
+    matter how many results are requested.
+
+    Args:
+        function (callable): Module level function run by the workers.
+        arguments (iterable[tuple]): Positional arguments of each call.
+        workers (int): Number of worker processes.
+
+    Yields:
+        obj: One result per call, in the order of `arguments`.
+    """
+
+    # Only imported when workers are requested
+    import concurrent.futures
+
+    arguments = iter(arguments)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = collections.deque(
+            pool.submit(function, *args)
+            for args in itertools.islice(arguments, workers * 2))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                for args in itertools.islice(arguments, 1):
+                    pending.append(pool.submit(function, *args))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class EntropyPool(object):
+    """Buffer of OS random bytes that's refilled by a background thread, so
+    drawing random bytes is usually a memory copy rather than a system call.
+
+    Whenever a read leaves fewer than `low_water` bytes buffered, the refill
+    thread tops the buffer back up to `high_water` bytes.  Reads never wait
+    on the refill thread: bytes missing from the buffer are requested from
+    the OS directly.  Bytes are handed out exactly once.
+
+    The pool is fork-safe.  A child process discards every byte buffered
+    before the fork, so parent and child never hand out the same bytes, and
+    starts its own refill thread on its first read.
+
+    Args:
+        low_water (int, optional): Buffered byte count that triggers a
+            refill.
+        high_water (int, optional): Buffered byte count a refill stops at.
+
+    Attributes:
+        low_water (int): Buffered byte count that triggers a refill.
+        high_water (int): Buffered byte count a refill stops at.
+    """
+
+    def __init__(self, low_water=POOL_LOW_WATER, high_water=POOL_HIGH_WATER):
+        if not 0 <= low_water < high_water:
+            raise ValueError("low_water must be less than high_water")
+
+        self.low_water = low_water
+        self.high_water = high_water
+        self._closed = False
+        self._reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _reset(self):
+        """Discards buffered bytes and starts a new refill thread for the
+        current process."""
+
+        self._pid = os.getpid()
+        self._buffer, self._offset = bytearray(), 0
+        self._condition = threading.Condition(threading.Lock())
+
+        self._thread = threading.Thread(target=self._refill)
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def available(self):
+        """int: Number of buffered bytes."""
+        return len(self._buffer) - self._offset
+
+    def _refill(self):
+        """Refill thread target; sleeps until the buffer drops below the low
+        water mark, then tops it up to the high water mark."""
+
+        condition = self._condition
+        while True:
+            with condition:
+                while not self._closed and self.available >= self.low_water:
+                    condition.wait()
+                if self._closed or condition is not self._condition:
+                    return
+                needed = self.high_water - self.available
+
+            # Requested outside the lock so reads aren't blocked meanwhile
+            entropy = os.urandom(min(needed, MAX_ENTROPY_REQUEST))
+            with condition:
+                if condition is self._condition:
+                    # Bytes already handed out are dropped only here, so
+                    # reads just advance an offset
+                    del self._buffer[:self._offset]
+                    self._offset = 0
+                    self._buffer.extend(entropy)
+
+    def read(self, size):
+        """
+        Args:
+            size (int): Number of random bytes.
+
+        Returns:
+            bytes: `size` random bytes.
+
+        Raises:
+            ValueError: The pool is closed.
+        """
+
+        if self._closed:
+            raise ValueError("EntropyPool is closed")
+
+        # The parent's buffer and lock are unusable after a fork; the lock
+        # may have been held by a thread that doesn't exist in the child
+        if os.getpid() != self._pid:
+            self._reset()
+
+        with self._condition:
+            offset = self._offset
+            taken = bytes(self._buffer[offset:offset + size])
+            self._offset = offset + len(taken)
+
+            if len(self._buffer) - self._offset < self.low_water:
+                self._condition.notify()
+
+        if len(taken) < size:
+            taken += os.urandom(size - len(taken))
+        return taken
+
+    def close(self):
+        """Stops the refill thread and discards buffered bytes."""
+
+        with self._condition:
+            self._closed = True
+            self._buffer, self._offset = bytearray(), 0
+            self._condition.notify()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,241 @@
+"""Classes and functions for generating diceware-style passphrases from a
+wordlist.
+
+Wordlists are memory mapped rather than read into a list, and the offset of
+every word is kept in a sidecar index of 8 byte unsigned integers (an
+`array('Q')` written to disk).  The index is built the first time a wordlist
+is used and memory mapped afterwards, so opening even a million word list
+costs a couple of system calls, and looking up a word by its index is O(1).
+
+Wordlists hold one word per line.  Blank lines are skipped, and lines with
+more than one field, such as the dice rolls of a diceware list
+("11111 abacus"), use their last field.  Repeated words are only indexed
+once, so they neither skew the choice of words nor inflate the entropy
+estimate.
+"""
+
+# ----------------------------Compatibility Imports----------------------------
+from __future__ import print_function
+from six.moves import range
+# -----------------------------------------------------------------------------
+
+import os
+import math
+import mmap
+import array
+import struct
+import tempfile
+
+from randstr import RAND_METHOD
+
+INDEX_EXTENSION = '.rsidx'
+INDEX_VERSION = 2
+
+# Index layout: HEADER_FIELDS unsigned 64-bit integers (version, wordlist
+# size, wordlist mtime_ns, word count) followed by the offset of every word
+HEADER_FIELDS = 4
+OFFSET = struct.Struct('=Q')
+
+DEFAULT_WORDS = 6
+
+
+def index_filename(filename):
+    """str: Default filename of the sidecar index for a wordlist."""
+    return filename + INDEX_EXTENSION
+
+
+def _wordlist_stamp(filename):
+    """tuple: (size, mtime_ns) identifying the current wordlist contents."""
+
+    file_stat = os.stat(filename)
+    mtime_ns = getattr(file_stat, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(file_stat.st_mtime * 1e9)
+
+    return file_stat.st_size, mtime_ns
+
+
+def build_index(words):
+    """Finds the offset of the first line holding each distinct word of a
+    wordlist; blank lines are skipped.
+
+    Args:
+        words (obj:`mmap`): Memory mapped wordlist.
+
+    Returns:
+        array: array('Q') of line offsets.
+    """
+
+    offsets = array.array('Q')
+    seen = set()
+    start, size = 0, len(words)
+
+    while start < size:
+        end = words.find(b'\n', start)
+        if end == -1:
+            end = size
+
+        fields = words[start:end].split()
+        if fields and fields[-1] not in seen:
+            seen.add(fields[-1])
+            offsets.append(start)
+        start = end + 1
+
+    return offsets
+
+
+def write_index(offsets, stamp, filename):
+    """Writes a sidecar index to a temporary file in the same directory and
+    then moves it into place, so an interrupted write never leaves a
+    truncated index behind.
+
+    Args:
+        offsets (array): array('Q') of line offsets built by build_index().
+        stamp (tuple): (size, mtime_ns) of the wordlist.
+        filename (str): Filename of sidecar file.
+    """
+
+    header = array.array('Q', (INDEX_VERSION,) + stamp + (len(offsets),))
+    fd, temporary = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(filename)),
+        prefix=os.path.basename(filename) + '.', suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            header.tofile(f)
+            offsets.tofile(f)
+        # Python 2 has no os.replace; rename replaces files atomically on
+        # POSIX there too
+        getattr(os, 'replace', os.rename)(temporary, filename)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class Wordlist(object):
+    """Memory mapped wordlist with O(1) access to every word.
+
+    The sidecar index is loaded if it matches the wordlist's size and
+    modification time, and otherwise rebuilt and written back; an index
+    that can't be written is kept in memory instead.
+
+    Args:
+        filename (str): Filename of the wordlist.
+        index_file (str, optional): Filename of the sidecar index; defaults
+            to the wordlist filename plus INDEX_EXTENSION.
+
+    Attributes:
+        filename (str): Filename of the wordlist.
+        index_file (str): Filename of the sidecar index.
+
+    Raises:
+        ValueError: The wordlist has no words.
+    """
+
+    def __init__(self, filename, index_file=None):
+        self.filename = filename
+        self.index_file = index_file or index_filename(filename)
+
+        with open(filename, 'rb') as f:
+            # Empty files can't be memory mapped
+            if not os.fstat(f.fileno()).st_size:
+                raise ValueError("Wordlist is empty: {}".format(filename))
+            self._words = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._index = self._offsets = None
+        self._load_index()
+
+        if not len(self):
+            self.close()
+            raise ValueError("Wordlist has no words: {}".format(filename))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmaps the wordlist and its index."""
+
+        self._words.close()
+        if self._index is not None:
+            self._index.close()
+
+    def _load_index(self):
+        """Maps a current sidecar index, or builds and writes a new one if
+        the index is missing, stale, or corrupt."""
+
+        stamp = _wordlist_stamp(self.filename)
+        header_size = HEADER_FIELDS * OFFSET.size
+
+        try:
+            with open(self.index_file, 'rb') as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, OSError, ValueError):
+            index = None
+
+        if index is not None:
+            # Indexes too short to hold a header are rebuilt too
+            if len(index) >= header_size:
+                header = struct.unpack_from(
+                    '={}Q'.format(HEADER_FIELDS), index)
+                if (header[:3] == (INDEX_VERSION,) + stamp and
+                        len(index) == header_size + header[3] * OFFSET.size):
+                    self._index, self._count = index, header[3]
+                    return
+            index.close()
+
+        self._offsets = build_index(self._words)
+        self._count = len(self._offsets)
+
+        try:
+            write_index(self._offsets, stamp, self.index_file)
+        except (IOError, OSError):
+            pass
+
+    def _offset(self, index):
+        """int: Offset of the word at `index`."""
+
+        if self._offsets is not None:
+            return self._offsets[index]
+        return OFFSET.unpack_from(
+            self._index, (HEADER_FIELDS + index) * OFFSET.size)[0]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """str: Word at `index`."""
+
+        if not 0 <= index < self._count:
+            raise IndexError("word index out of range")
+
+        start = self._offset(index)
+        end = self._words.find(b'\n', start)
+        line = self._words[start:end if end != -1 else len(self._words)]
+
+        return line.split()[-1].decode('utf-8')
+
+    def entropy_bits(self, words=DEFAULT_WORDS):
+        """float: Bits of entropy in a passphrase of `words` words."""
+        return words * math.log(self._count, 2)
+
+    def passphrase(self, words=DEFAULT_WORDS, separator=' '):
+        """Generates a passphrase of words chosen uniformly and independently
+        using RAND_METHOD.
+
+        Args:
+            words (int, optional): Number of words.
+            separator (str, optional): String placed between words.
+
+        Returns:
+            str: Passphrase.
+        """
+
+        return separator.join(
+            self[RAND_METHOD.randbelow(self._count)] for _ in range(words))
+
+
+if __name__ == '__main__':
+    pass
@@ -1,11 +1,5 @@
 """Classes and functions that provide terminal integration for RandomString
 methods.
-
-Todo:
-    * Look into adding switch that allows character set to be built from ASCII
-      attributes found in string module.  This would allow user to quickly
-      override default character set with basic sub-sets like 'only lowercase
-      letters', or 'all lower-case, upper-case, and digits'.
 """
 
 from __future__ import print_function
@@ -13,9 +7,9 @@ from __future__ import print_function
 import os
 import sys
 import argparse
-import pyperclip
+import six
 
-from randstr import RandomString
+from randstr import RandomString, CharacterSet, CHARACTER_CLASSES
 
 
 class RandstrParser(object):
@@ -26,19 +20,23 @@ class RandstrParser(object):
             parser arguments.
     """
 
-    def __init__(self):
-        self.parser = self.create_parser()
+    def __init__(self, prog=None):
+        self.parser = self.create_parser(prog)
 
         self.add_parser_arguments()
 
     @staticmethod
-    def create_parser():
+    def create_parser(prog=None):
         """
+        Args:
+            prog (str, optional): Program name shown in usage messages.
+
         Returns:
             :obj:`ArgumentParser`: Parent argparse object used by all parser
                 arguments.
         """
         return argparse.ArgumentParser(
+            prog=prog,
             description="Generate a cryptographically secure randomized string.",
             epilog="""\tDefault character set includes all ASCII upper and \
                    lower case letters, digits, punctuation, and a character \
@@ -50,11 +48,18 @@ class RandstrParser(object):
 
         self.parser.add_argument(
             'len', type=int, metavar='LENGTH',
-            help="""Length of the randomized string.  By default, length is \
+            help="""Length of the randomized string, or number of words \
+            with --wordlist.  By default, length is \
             limited to 1000 characters unless the --remove-limit \
             switch is provided. Values exceeding the default limit will be \
             reduced to 1000 if the --remove-limit switch is not included.""")
 
+        self.parser.add_argument(
+            '-n', '--count', type=_positive_int, default=1, metavar='COUNT',
+            help="""Number of strings to generate, written one per line.  \
+            The whole batch shares one character set setup and one stream \
+            of entropy requests (default: %(default)s).""")
+
         # OutputFormatting, clipboard, and file output options
         output_options = self.parser.add_argument_group('Output Options')
         output_options.add_argument(
@@ -78,6 +83,13 @@ class RandstrParser(object):
             additional details included in the printout.  This option \
             replaces --print if used.""")
 
+        output_options.add_argument(
+            '-st', '--stream', action='store_true',
+            help="""Generate the string in fixed size chunks that are written \
+            straight to the --file, or to stdout if no file is given, so \
+            memory use stays constant for any length.  The length limit \
+            doesn't apply, and --copy and --print are unavailable.""")
+
         # Character set and shuffle options
         randomization_options = self.parser.add_argument_group(
             'Randomization Options')
@@ -87,17 +99,61 @@ class RandstrParser(object):
             help="""Overrides default character set with characters in the \
                  provided string""")
 
+        randomization_options.add_argument(
+            '-cc', '--character-classes', nargs='+', default=None,
+            dest='classes', choices=list(CHARACTER_CLASSES), metavar='CLASS',
+            help="""Overrides default character set with named classes of \
+            characters: {}.  Combined with --character-set if both are \
+            provided.""".format(', '.join(CHARACTER_CLASSES)))
+
+        randomization_options.add_argument(
+            '-m', '--minimum', action='append', type=_minimum, default=None,
+            dest='minimums', metavar='CLASS=COUNT',
+            help="""Require at least COUNT characters from CLASS, which is \
+            either a class name accepted by --character-classes or a string \
+            of characters, e.g. -m uppercase=1 -m digits=1 -m '!@#$%%=1'.  \
+            Compliant strings are built directly rather than by retrying.  \
+            May be repeated.""")
+
         randomization_options.add_argument(
             '-s', '--shuffle', action='store_true',
             help="""Randomly shuffle character positions in character set prior
             to string generation.""")
 
+        randomization_options.add_argument(
+            '-u', '--unique', action='store_true',
+            help="""Never repeat a string within a --count batch.  Fails if \
+            the batch is larger than the number of possible strings, and \
+            warns once it fills more than half of them.""")
+
+        randomization_options.add_argument(
+            '-w', '--workers', type=_positive_int, default=None,
+            help="""Number of worker processes used to generate --count \
+            batches and --stream output; each worker draws its own entropy \
+            and output keeps its order.  By default, everything is generated \
+            in a single process.""")
+
         randomization_options.add_argument(
             '-rl', '--remove-limit', action='store_true', dest='remove_limit',
             help="""Removes the default 1000 character length limit imposed on \
             string generation.  Please note strings in excess of ten-thousand \
-            (10K) characters may cause unintended or undesirable \
-            side-effects.""")
+            (10K) characters are held in memory and may be slow to print or \
+            copy; consider --stream instead.""")
+
+        # Diceware-style passphrases
+        passphrase_options = self.parser.add_argument_group(
+            'Passphrase Options')
+        passphrase_options.add_argument(
+            '-wl', '--wordlist', default=None, metavar='FILENAME',
+            help="""Generate a passphrase of LENGTH words chosen from \
+            FILENAME, one word per line, instead of a string of characters.  \
+            An index of the wordlist is cached next to it as \
+            FILENAME.rsidx.""")
+
+        passphrase_options.add_argument(
+            '-sep', '--separator', default=' ',
+            help="""String placed between passphrase words (default: a \
+            single space).""")
 
     @property
     def args(self):
@@ -117,7 +173,23 @@ class RandstrOutput(object):
 
     def __init__(self, parsed_args):
         self.args = parsed_args
-        self.generated_string = self._generated_string
+
+        # Streamed strings are never held in memory
+        self.generated_string = (
+            None if self.args.stream else self._generated_string)
+
+    @property
+    def _string_generator(self):
+        """obj:`RandomString`: generator configured by parsed arguments."""
+        char_set = self.args.characters
+        if self.args.classes:
+            char_set = (CharacterSet.from_classes(*self.args.classes) +
+                        (char_set or '')).chars
+
+        return RandomString(
+            length=self.args.len, shuffle=self.args.shuffle,
+            user_char_set=char_set,
+            minimums=dict(self.args.minimums or ()))
 
     @property
     def _generated_string(self):
@@ -126,17 +198,53 @@ class RandstrOutput(object):
         if not self.args.remove_limit:
             self.args.len = self.args.len if self.args.len <= 1000 else 1000
 
-        string_generator = RandomString(
-            length=self.args.len, shuffle=self.args.shuffle,
-            user_char_set=self.args.characters)
+        if self.args.wordlist:
+            return '\n'.join(self._passphrases)
+
+        string_generator = self._string_generator
 
+        if self.args.count > 1:
+            return '\n'.join(string_generator.generate_many(
+                self.args.count, workers=self.args.workers,
+                unique=self.args.unique))
         return string_generator()
 
+    @property
+    def _generated_chunks(self):
+        """generator: randomly generated output in fixed size chunks; strings
+        from --count are written one per line."""
+
+        if self.args.wordlist:
+            if self.args.count <= 1:
+                return self._passphrases
+            return (passphrase + '\n' for passphrase in self._passphrases)
+
+        string_generator = self._string_generator
+
+        if self.args.count <= 1:
+            return string_generator.generate_chunks(workers=self.args.workers)
+        return string_generator.generate_lines(
+            self.args.count, workers=self.args.workers,
+            unique=self.args.unique)
+
+    @property
+    def _passphrases(self):
+        """generator: --count passphrases of LENGTH words from --wordlist."""
+
+        from randstr_passphrase import Wordlist
+
+        with Wordlist(self.args.wordlist) as wordlist:
+            for _ in range(self.args.count):
+                yield wordlist.passphrase(
+                    self.args.len, separator=self.args.separator)
+
     def process_parsed_args(self):
         """Dispatches output control based on whether or not the --raw-output
-        switch was provided to the argparser."""
+        or --stream switches were provided to the argparser."""
 
-        if self.args.raw_output:
+        if self.args.stream:
+            self.stream_output()
+        elif self.args.raw_output:
             self.print_raw_output()
         else:
             self.print_formatted_output()
@@ -152,14 +260,38 @@ class RandstrOutput(object):
                 random_str=self.generated_string, filename=self.args.file)
 
         if self.args.copy:
-            pyperclip.copy(self.generated_string)
+            _copy(self.generated_string)
+
+    def stream_output(self):
+        """Writes randomly generated output chunk by chunk to the --file, or
+        to stdout if no file was provided, without holding it in memory."""
+
+        if self.args.copy or self.args.print:
+            sys.exit("--copy and --print can't be used with --stream")
+
+        if not self.args.file:
+            for chunk in self._generated_chunks:
+                sys.stdout.write(chunk)
+            return
+
+        file_reference = _write_file(
+            random_str=self._generated_chunks, filename=self.args.file)
+
+        if not self.args.raw_output:
+            print("\nOutput written to: {}".format(file_reference))
 
     def print_formatted_output(self):
         """Displays randomly generated string with additional information like
         visual delimiters and status messages."""
 
-        print("\n{}Length: {}{}".format(
-            '---------------------------------', len(self.generated_string),
+        if self.args.count > 1:
+            header = 'Count: {} x Length: {}'.format(
+                self.args.count, self.args.len)
+        else:
+            header = 'Length: {}'.format(len(self.generated_string))
+
+        print("\n{}{}{}".format(
+            '---------------------------------', header,
             '---------------------------------'))
 
         if self.args.print:
@@ -172,7 +304,7 @@ class RandstrOutput(object):
             print("\nOutput written to: {}".format(file_reference))
 
         if self.args.copy:
-            pyperclip.copy(self.generated_string)
+            _copy(self.generated_string)
             print("\nOutput String copied to clipboard")
 
         print("\n{}{}".format(
@@ -184,7 +316,8 @@ def _write_file(random_str, filename):
     """Utility function for writing randomly generated strings to a file.
 
     Args:
-        random_str (str)
+        random_str (str|iterable[str]): string, or chunks of a string that
+            are written as they're generated
         filename (str)
 
     Returns:
@@ -197,11 +330,55 @@ def _write_file(random_str, filename):
         filename += '.txt'
 
     with open(filename, 'w') as f:
-        f.write(random_str)
+        if isinstance(random_str, six.string_types):
+            f.write(random_str)
+        else:
+            f.writelines(random_str)
 
     return os.path.abspath(filename)
 
 
+def _positive_int(argument):
+    """argparse type for --count and --workers.
+
+    Args:
+        argument (str): Integer of at least 1
+
+    Returns:
+        int: `argument`
+    """
+
+    if not argument.isdigit() or not int(argument):
+        raise argparse.ArgumentTypeError(
+            "expected a positive integer, got {!r}".format(argument))
+    return int(argument)
+
+
+def _minimum(argument):
+    """argparse type for --minimum.
+
+    Args:
+        argument (str): CLASS=COUNT
+
+    Returns:
+        tuple: (CLASS, COUNT)
+    """
+
+    name, _, count = argument.rpartition('=')
+    if not name or not count.isdigit():
+        raise argparse.ArgumentTypeError(
+            "expected CLASS=COUNT, got {!r}".format(argument))
+    return name, int(count)
+
+
+def _copy(random_str):
+    """Copies a string to the clipboard; pyperclip is only imported when
+    --copy is used."""
+
+    import pyperclip
+    pyperclip.copy(random_str)
+
+
 def _generate_filename():
     """Generates handle used by the .txt file that will hold generated string.
 
@@ -216,6 +393,22 @@ def _generate_filename():
     return "randstr_{}.txt".format(count)
 
 
+def main(argv=None, prog=None):
+    """Runs randstr from the terminal.
+
+    Args:
+        argv (list[str], optional): Arguments; defaults to sys.argv[1:].
+        prog (str, optional): Program name shown in usage messages.
+    """
+
+    # e.g. --unique batches larger than the keyspace
+    try:
+        terminal_output = RandstrOutput(
+            RandstrParser(prog=prog).parser.parse_args(argv))
+        terminal_output.process_parsed_args()
+    except ValueError as e:
+        sys.exit(e)
+
+
 if __name__ == '__main__':
-    terminal_output = RandstrOutput(RandstrParser().args)
-    terminal_output.process_parsed_args()
+    main()
@@ -0,0 +1,250 @@
+"""Throughput benchmarks for sealant's hashchk and randstr modules.
+
+Results are written as JSON so runs from different commits can be compared:
+
+    python benchmarks.py --output before.json
+    python benchmarks.py --output after.json --compare before.json
+
+Benchmarks run entirely locally.  Binary files are generated in /dev/shm when
+it's available so disk speed doesn't skew hashing throughput; a sparse file is
+included to show the cost of hashing holes.  Every measurement is the best of
+several repeats.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+sys.path.insert(0, os.path.abspath('../sealant/randstr'))
+import hashchk
+import randstr
+
+MB = 1048576
+
+# Python 2 lacks perf_counter
+TIMER = getattr(time, 'perf_counter', time.time)
+
+DIGEST_METHODS = ['md5', 'sha1', 'sha256', 'sha512', 'sha3_256', 'blake2b',
+                  'blake2s']
+BUFFER_SIZES = [4096, 65536, 1048576, None]
+FILE_SIZES = [MB, 64 * MB]
+
+STRING_LENGTHS = [100, 10000, 1000000]
+CHAR_SETS = {'digits': '0123456789',
+             'alphanumeric': 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTU'
+                             'VWXYZ0123456789',
+             'default': None}
+
+CLI_SCRIPTS = ['../sealant/hashchk/hashchk_terminal.py',
+               '../sealant/randstr/randstr_terminal.py']
+
+
+def best_time(function, repeat):
+    """float: Fastest of `repeat` wall clock timings of function()."""
+
+    timings = []
+    for _ in range(repeat):
+        start = TIMER()
+        function()
+        timings.append(TIMER() - start)
+
+    return min(timings)
+
+
+def _benchmark_directory():
+    """str: Temporary directory, on tmpfs if available."""
+    shm = '/dev/shm'
+    return tempfile.mkdtemp(dir=shm if os.path.isdir(shm) else None)
+
+
+def benchmark_digests(file_sizes, repeat):
+    """Measures generate_digest throughput per hash method, buffer size, and
+    file size.
+
+    Args:
+        file_sizes (list[int]): Sizes of generated binary files in bytes.
+        repeat (int): Number of timings per measurement.
+
+    Returns:
+        list[dict]: One result per measurement.
+    """
+
+    results = []
+    directory = _benchmark_directory()
+    try:
+        files = []
+        for size in file_sizes:
+            filename = os.path.join(directory, 'random_{}.bin'.format(size))
+            with open(filename, 'wb') as f:
+                for _ in range(0, size, MB):
+                    f.write(os.urandom(min(MB, size)))
+            files.append(('random', size, filename))
+
+        sparse = os.path.join(directory, 'sparse.bin')
+        with open(sparse, 'wb') as f:
+            f.truncate(max(file_sizes))
+        files.append(('sparse', max(file_sizes), sparse))
+
+        for kind, size, filename in files:
+            for method in DIGEST_METHODS:
+                if not hasattr(hashlib, method):
+                    continue
+
+                for buffer_size in BUFFER_SIZES:
+                    seconds = best_time(lambda: hashchk.generate_digest(
+                        filename, method, buffer_size=buffer_size), repeat)
+                    results.append({
+                        'name': 'generate_digest', 'file': kind,
+                        'file_size': size, 'hash_method': method,
+                        'buffer_size': buffer_size or 'tuned',
+                        'seconds': seconds, 'mb_per_second': size / MB /
+                        seconds})
+    finally:
+        shutil.rmtree(directory)
+
+    return results
+
+
+def benchmark_random_strings(lengths, repeat):
+    """Measures RandomString throughput per string length and character set.
+
+    Args:
+        lengths (list[int]): Lengths of generated strings.
+        repeat (int): Number of timings per measurement.
+
+    Returns:
+        list[dict]: One result per measurement.
+    """
+
+    results = []
+    for length in lengths:
+        for name, char_set in sorted(CHAR_SETS.items()):
+            generator = randstr.RandomString(
+                length=length, user_char_set=char_set)
+            seconds = best_time(generator, repeat)
+            results.append({
+                'name': 'random_string', 'length': length,
+                'char_set': name, 'char_set_size': len(generator.char_set),
+                'seconds': seconds, 'chars_per_second': length / seconds})
+
+    return results
+
+
+def benchmark_startup(repeat):
+    """Measures interpreter startup plus import time of each CLI script by
+    running its --help output.
+
+    Args:
+        repeat (int): Number of timings per measurement.
+
+    Returns:
+        list[dict]: One result per script.
+    """
+
+    results = []
+    with open(os.devnull, 'w') as devnull:
+        for script in CLI_SCRIPTS:
+            directory, name = os.path.split(os.path.abspath(script))
+            seconds = best_time(lambda: subprocess.check_call(
+                [sys.executable, name, '-h'], cwd=directory, stdout=devnull),
+                repeat)
+            results.append({'name': 'cli_startup', 'script': name,
+                            'seconds': seconds})
+
+    return results
+
+
+def _git_commit():
+    """str: Commit benchmarks were run against, or None outside a git
+    checkout."""
+
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.STDOUT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _result_key(result):
+    """tuple: Parameters identifying a measurement across runs."""
+    return tuple(sorted((key, str(value)) for key, value in result.items()
+                        if key not in ('seconds', 'mb_per_second',
+                                       'chars_per_second')))
+
+
+def compare_results(previous, current):
+    """Prints the change in time of every measurement present in both runs.
+
+    Args:
+        previous (dict): Earlier benchmark output.
+        current (dict): Later benchmark output.
+    """
+
+    baseline = dict((_result_key(result), result)
+                    for result in previous['results'])
+
+    print("{:>8}  {}".format('change', 'measurement'))
+    for result in current['results']:
+        before = baseline.get(_result_key(result))
+        if before:
+            change = result['seconds'] / before['seconds'] - 1
+            print("{:>+7.1%}  {}".format(change, ', '.join(
+                '{}={}'.format(*item) for item in _result_key(result))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--quick', action='store_true',
+        help="Smaller files, shorter strings, and fewer repeats.")
+    parser.add_argument(
+        '--repeat', type=int, default=None,
+        help="Timings per measurement (default: 5, or 2 with --quick).")
+    parser.add_argument(
+        '-o', '--output', default=None, metavar='FILENAME',
+        help="Write JSON results to FILENAME instead of stdout.")
+    parser.add_argument(
+        '--compare', default=None, metavar='FILENAME',
+        help="Earlier JSON results to compare this run against.")
+    args = parser.parse_args()
+
+    repeat = args.repeat or (2 if args.quick else 5)
+    file_sizes = FILE_SIZES[:1] if args.quick else FILE_SIZES
+    lengths = STRING_LENGTHS[:2] if args.quick else STRING_LENGTHS
+
+    output = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'results': (benchmark_digests(file_sizes, repeat) +
+                    benchmark_random_strings(lengths, repeat) +
+                    benchmark_startup(repeat)),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=1)
+    else:
+        json.dump(output, sys.stdout, indent=1)
+        print()
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare_results(json.load(f), output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""unittests for sealant's hashchk_async coroutines"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import hashlib
+import threading
+
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk_async
+
+
+class AsyncDigestTests(unittest.TestCase):
+    """Tests for asynchronous digest generation"""
+
+    def setUp(self):
+        """Writes binary files and creates the event loop used by tests"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.loop = asyncio.new_event_loop()
+
+        self.references = {}
+        for number in range(10):
+            contents = os.urandom(10000)
+            filename = os.path.join(self.test_dir, 'binary_{}.bin'.format(
+                number))
+            with open(filename, 'wb') as f:
+                f.write(contents)
+            self.references[filename] = hashlib.sha256(contents).hexdigest()
+
+    def tearDown(self):
+        """Closes event loop and removes temporary directory"""
+
+        self.loop.close()
+        shutil.rmtree(self.test_dir)
+
+    def gather(self, filenames, **kwargs):
+        """list: every DigestResult yielded by agather_digests"""
+
+        async def collect():
+            return [result async for result in hashchk_async.agather_digests(
+                filenames, ['sha256'], **kwargs)]
+
+        return self.loop.run_until_complete(collect())
+
+    def test_agenerate_digest(self):
+        """Verify coroutine returns the same digest as hashlib"""
+
+        filename, reference = next(iter(self.references.items()))
+        generated = self.loop.run_until_complete(
+            hashchk_async.agenerate_digest(filename, 'sha256'))
+        self.assertEqual(reference, generated)
+
+    def test_digest_length(self):
+        """Verify SHAKE digests are generated at the requested length"""
+
+        filename = next(iter(self.references))
+        with open(filename, 'rb') as f:
+            reference = hashlib.shake_128(f.read()).hexdigest(48)
+
+        generated = self.loop.run_until_complete(
+            hashchk_async.agenerate_digest(filename, 'shake_128',
+                                           digest_length=96))
+        self.assertEqual(reference, generated)
+
+    def test_agather_digests(self):
+        """Verify every file is hashed and missing files report errors"""
+
+        missing = os.path.join(self.test_dir, 'missing.bin')
+        results = self.gather(list(self.references) + [missing], limit=3)
+
+        self.assertEqual(11, len(results))
+        for result in results:
+            if result.filename == missing:
+                self.assertIsNotNone(result.error)
+            else:
+                self.assertEqual(self.references[result.filename],
+                                 result.digests['sha256'])
+
+    def test_concurrency_limit(self):
+        """Verify no more than `limit` files are in flight at once"""
+
+        lock = threading.Lock()
+        counters = {'active': 0, 'peak': 0}
+        original = hashchk_async._generate_digests
+
+        def tracked(*args, **kwargs):
+            with lock:
+                counters['active'] += 1
+                counters['peak'] = max(counters['peak'], counters['active'])
+            time.sleep(0.01)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with lock:
+                    counters['active'] -= 1
+
+        hashchk_async._generate_digests = tracked
+        try:
+            results = self.gather(list(self.references), limit=2)
+        finally:
+            hashchk_async._generate_digests = original
+
+        self.assertEqual(10, len(results))
+        self.assertLessEqual(counters['peak'], 2)
+
+    def test_cancellation(self):
+        """Verify closing the generator early cancels files in flight"""
+
+        filenames = sorted(self.references)
+        original = hashchk_async._generate_digests
+
+        def delayed(filename, *args, **kwargs):
+            if filename != filenames[0]:
+                time.sleep(0.2)
+            return original(filename, *args, **kwargs)
+
+        async def first_result():
+            results = hashchk_async.agather_digests(
+                filenames, ['sha256'], limit=4)
+            result = await results.__anext__()
+
+            tasks = asyncio.all_tasks() - {asyncio.current_task()}
+            await results.aclose()
+            await asyncio.sleep(0)
+            return result, tasks
+
+        hashchk_async._generate_digests = delayed
+        try:
+            result, tasks = self.loop.run_until_complete(first_result())
+        finally:
+            hashchk_async._generate_digests = original
+
+        self.assertEqual(filenames[0], result.filename)
+        self.assertEqual(4, len(tasks))
+        self.assertTrue(all(task.cancelled() for task in tasks))
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_async Methods\n')
+    unittest.main(buffer=True)
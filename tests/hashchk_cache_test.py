@@ -0,0 +1,140 @@
+"""unittests for sealant's hashchk_cache.DigestCache class"""
+
+import os
+import sys
+import shutil
+import hashlib
+
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk
+import hashchk_cache
+
+
+class DigestCacheTests(unittest.TestCase):
+    """Tests for cache hits, misses, invalidation, and eviction"""
+
+    def setUp(self):
+        """Writes binary files and opens a cache in a temporary directory"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.cache = hashchk_cache.DigestCache(
+            os.path.join(self.test_dir, 'cache', 'digests.sqlite'),
+            max_entries=4)
+
+        self.binaries = []
+        for number in range(4):
+            filename = os.path.join(self.test_dir, 'binary_{}.bin'.format(
+                number))
+            with open(filename, 'wb') as f:
+                f.write(os.urandom(5000))
+            self.binaries.append(filename)
+
+    def tearDown(self):
+        """Closes cache and removes temporary directory"""
+
+        self.cache.close()
+        shutil.rmtree(self.test_dir)
+
+    def cached_rows(self):
+        """int: number of digests stored in the cache database"""
+        return self.cache.connection.execute(
+            "SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def test_hits_and_misses(self):
+        """Verify a second lookup of an unchanged file is served from the
+        cache"""
+
+        binary = self.binaries[0]
+        first = hashchk.generate_digests(binary, ['md5', 'sha256'],
+                                         cache=self.cache)
+        second = hashchk.generate_digests(binary, ['md5', 'sha256'],
+                                          cache=self.cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual({'hits': 2, 'misses': 2, 'bytes_saved': 5000},
+                         self.cache.stats)
+
+    def test_partial_hit(self):
+        """Verify only uncached hash methods are generated"""
+
+        binary = self.binaries[0]
+        self.cache.generate_digests(binary, ['md5'])
+        digests = self.cache.generate_digests(binary, ['md5', 'sha1'])
+
+        with open(binary, 'rb') as f:
+            contents = f.read()
+        self.assertEqual(hashlib.sha1(contents).hexdigest(), digests['sha1'])
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(0, self.cache.bytes_saved)
+
+    def test_modified_file(self):
+        """Verify modifying a file invalidates its cached digests"""
+
+        binary = self.binaries[0]
+        original = self.cache.generate_digests(binary, ['sha256'])
+
+        with open(binary, 'ab') as f:
+            f.write(b'modified')
+        stat = os.stat(binary)
+        os.utime(binary, (stat.st_atime, stat.st_mtime + 10))
+
+        modified = self.cache.generate_digests(binary, ['sha256'])
+        self.assertNotEqual(original, modified)
+        self.assertEqual(0, self.cache.hits)
+
+    def test_refresh(self):
+        """Verify refresh ignores cached digests"""
+
+        self.cache.generate_digests(self.binaries[0], ['sha256'])
+        self.cache.generate_digests(self.binaries[0], ['sha256'], refresh=True)
+        self.assertEqual(0, self.cache.hits)
+
+    def test_lru_eviction(self):
+        """Verify least recently used digests are evicted once the cache is
+        full"""
+
+        for binary in self.binaries:
+            self.cache.generate_digests(binary, ['md5'])
+
+        # Marks binary_0 as recently used so binary_1 is evicted instead
+        self.cache.generate_digests(self.binaries[0], ['md5'])
+        self.cache.generate_digests(self.binaries[0], ['sha1'])
+
+        self.assertEqual(4, self.cached_rows())
+        key = hashchk_cache.file_key(self.binaries[1])
+        self.assertIsNone(self.cache.lookup(key, 'md5'))
+        key = hashchk_cache.file_key(self.binaries[0])
+        self.assertIsNotNone(self.cache.lookup(key, 'md5'))
+
+    def test_replaced_digests_not_counted(self):
+        """Verify regenerated digests replace their cached row rather than
+        counting towards the limit"""
+
+        for binary in self.binaries:
+            self.cache.generate_digests(binary, ['md5'])
+        for _ in range(3):
+            self.cache.generate_digests(self.binaries[0], ['md5'],
+                                        refresh=True)
+
+        self.assertEqual(4, self.cached_rows())
+        for binary in self.binaries:
+            key = hashchk_cache.file_key(binary)
+            self.assertIsNotNone(self.cache.lookup(key, 'md5'))
+
+    def test_persistence(self):
+        """Verify cached digests survive reopening the cache"""
+
+        self.cache.generate_digests(self.binaries[0], ['md5'])
+        self.cache.close()
+
+        self.cache = hashchk_cache.DigestCache(self.cache.path)
+        self.cache.generate_digests(self.binaries[0], ['md5'])
+        self.assertEqual(1, self.cache.hits)
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_cache Methods\n')
+    unittest.main(buffer=True)
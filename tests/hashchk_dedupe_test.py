@@ -0,0 +1,126 @@
+"""unittests for sealant's hashchk_dedupe module"""
+
+import os
+import sys
+import shutil
+import hashlib
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk_dedupe
+
+
+class FindDuplicatesTests(unittest.TestCase):
+    """Tests for staged duplicate detection"""
+
+    def setUp(self):
+        """Creates a temporary directory for test files"""
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Removes temporary directory and any files written to it"""
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path, data):
+        """str: Filename of `data` written to `path` below the test
+        directory"""
+
+        filename = os.path.join(self.test_dir, path)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return filename
+
+    def test_duplicate_groups(self):
+        """Verify duplicates are grouped and savings are counted once per
+        redundant copy"""
+
+        data = os.urandom(100000)
+        copies = [self.write(path, data) for path in
+                  ('a/one.bin', 'b/two.bin', 'b/c/three.bin')]
+        small = [self.write(path, b'small') for path in ('a/s', 'b/s')]
+        self.write('unique.bin', os.urandom(100000))
+
+        report = hashchk_dedupe.find_duplicates([self.test_dir], workers=2)
+
+        self.assertEqual([sorted(copies), sorted(small)],
+                         [group.filenames for group in report.groups])
+        self.assertEqual(hashlib.sha256(data).hexdigest(),
+                         report.groups[0].digest)
+        self.assertEqual(hashlib.sha256(b'small').hexdigest(),
+                         report.groups[1].digest)
+        self.assertEqual(200000 + 5,
+                         hashchk_dedupe.bytes_saved(report.groups))
+
+    def test_stages(self):
+        """Verify unique sizes are never opened and files with differing
+        ends are never read in full"""
+
+        head_differs = os.urandom(100000)
+        self.write('head_1', head_differs)
+        self.write('head_2', b'x' + head_differs[1:])
+        self.write('unique', os.urandom(50000))
+
+        middle = bytearray(os.urandom(100000))
+        self.write('middle_1', bytes(middle))
+        middle[50000] ^= 1
+        self.write('middle_2', bytes(middle))
+
+        report = hashchk_dedupe.find_duplicates([self.test_dir])
+
+        self.assertEqual([], report.groups)
+        self.assertEqual(5, report.scanned)
+        self.assertEqual(4, report.partially_read)
+        self.assertEqual(2, report.fully_read)
+
+    def test_partial_digest(self):
+        """Verify partial digests cover both ends of large files and all of
+        small files"""
+
+        small = self.write('small', b'z' * 2 * hashchk_dedupe.PARTIAL_SIZE)
+        self.assertEqual(
+            hashlib.sha256(b'z' * 2 * hashchk_dedupe.PARTIAL_SIZE).hexdigest(),
+            hashchk_dedupe.partial_digest(small, os.path.getsize(small)))
+
+        data = os.urandom(3 * hashchk_dedupe.PARTIAL_SIZE)
+        large = self.write('large', data)
+        self.assertEqual(
+            hashlib.sha256(data[:hashchk_dedupe.PARTIAL_SIZE] +
+                           data[-hashchk_dedupe.PARTIAL_SIZE:]).hexdigest(),
+            hashchk_dedupe.partial_digest(large, len(data)))
+
+    def test_hard_links_and_empty_files(self):
+        """Verify hard links and empty files aren't reported"""
+
+        original = self.write('original', b'linked')
+        if hasattr(os, 'link'):
+            os.link(original, os.path.join(self.test_dir, 'link'))
+        self.write('empty_1', b'')
+        self.write('empty_2', b'')
+
+        report = hashchk_dedupe.find_duplicates([self.test_dir])
+        self.assertEqual([], report.groups)
+        self.assertEqual(1, report.scanned)
+
+        report = hashchk_dedupe.find_duplicates([self.test_dir], min_size=0)
+        self.assertEqual(1, len(report.groups))
+
+    def test_files_and_errors(self):
+        """Verify filenames can be passed directly and missing files are
+        reported"""
+
+        first = self.write('first', b'same')
+        second = self.write('second', b'same')
+        missing = os.path.join(self.test_dir, 'missing')
+
+        report = hashchk_dedupe.find_duplicates([first, second, missing])
+        self.assertEqual([[first, second]],
+                         [group.filenames for group in report.groups])
+        self.assertEqual([missing], [error[0] for error in report.errors])
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_dedupe Methods\n')
+    unittest.main(buffer=True)
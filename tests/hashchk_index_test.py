@@ -0,0 +1,110 @@
+"""unittests for sealant's hashchk_index chunk digest indexes"""
+
+import os
+import sys
+import shutil
+import hashlib
+
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk_index
+
+
+class ChunkIndexTests(unittest.TestCase):
+    """Tests for building indexes and locating corrupt byte ranges"""
+
+    def setUp(self):
+        """Writes a binary of ten and a half chunks and indexes it"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.chunk_size = 1000
+        self.contents = os.urandom(self.chunk_size * 10 + 500)
+
+        self.binary = os.path.join(self.test_dir, 'binary.bin')
+        with open(self.binary, 'wb') as f:
+            f.write(self.contents)
+
+        self.index = hashchk_index.build_index(
+            self.binary, chunk_size=self.chunk_size, buffer_size=768)
+
+    def tearDown(self):
+        """Removes temporary directory and any files written to it"""
+        shutil.rmtree(self.test_dir)
+
+    def corrupt(self, *offsets):
+        """Flips one byte at each offset of the binary"""
+
+        with open(self.binary, 'r+b') as f:
+            for offset in offsets:
+                f.seek(offset)
+                f.write(bytes([self.contents[offset] ^ 0xff]))
+
+    def test_build_index(self):
+        """Verify file and chunk digests match hashlib digests"""
+
+        self.assertEqual(hashlib.sha256(self.contents).hexdigest(),
+                         self.index['digest'])
+        self.assertEqual(11, len(self.index['chunks']))
+        self.assertEqual(
+            hashlib.sha256(self.contents[10000:]).hexdigest(),
+            self.index['chunks'][-1])
+
+    def test_invalid_chunk_size(self):
+        """Verify chunk sizes below 1 raise ValueError"""
+
+        for chunk_size in (0, -1):
+            with self.subTest(chunk_size=chunk_size):
+                with self.assertRaises(ValueError):
+                    hashchk_index.build_index(self.binary,
+                                              chunk_size=chunk_size)
+
+    def test_sidecar_round_trip(self):
+        """Verify indexes survive being written to and loaded from disk"""
+
+        filename = hashchk_index.index_filename(self.binary)
+        hashchk_index.write_index(self.index, filename)
+        self.assertEqual(self.index, hashchk_index.load_index(filename))
+
+    def test_intact_file(self):
+        """Verify an unmodified file has no corrupt ranges"""
+        self.assertEqual([], hashchk_index.verify_index(
+            self.binary, self.index))
+
+    def test_corrupt_ranges(self):
+        """Verify corrupt chunks are reported, with adjacent chunks merged and
+        the last chunk clipped to the file size"""
+
+        self.corrupt(1500, 2999, 3000, 10499)
+        self.assertEqual([(1000, 4000), (10000, 10500)],
+                         hashchk_index.verify_index(self.binary, self.index))
+
+    def test_partial_recheck(self):
+        """Verify only chunks overlapping the requested ranges are checked"""
+
+        self.corrupt(1500, 7500)
+        self.assertEqual([(1000, 2000)], hashchk_index.verify_index(
+            self.binary, self.index, ranges=[(1200, 1300), (5000, 5001)]))
+
+    def test_chunks_in_ranges(self):
+        """Verify ranges map to every overlapping chunk, ignoring ranges past
+        the end of the indexed file"""
+
+        chunks = hashchk_index.chunks_in_ranges(
+            self.index, [(999, 1001), (5000, 6000), (20000, 30000)])
+        self.assertEqual([0, 1, 5], chunks)
+
+    def test_truncated_file(self):
+        """Verify bytes removed from the end of the file are reported"""
+
+        with open(self.binary, 'r+b') as f:
+            f.truncate(5500)
+
+        self.assertEqual([(5000, 10500)],
+                         hashchk_index.verify_index(self.binary, self.index))
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_index Methods\n')
+    unittest.main(buffer=True)
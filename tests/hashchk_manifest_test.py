@@ -0,0 +1,148 @@
+"""unittests for sealant's hashchk_manifest parsing and verification"""
+
+import os
+import sys
+import shutil
+import hashlib
+
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk_manifest
+
+
+class ManifestParsingTests(unittest.TestCase):
+    """Tests for parsing coreutils and BSD style manifest lines"""
+
+    def setUp(self):
+        """Defines reference digest used by manifest lines"""
+        self.digest = hashlib.sha256(b'sealant').hexdigest()
+
+    def test_coreutils_line(self):
+        """Verify text and binary mode coreutils lines are parsed and list
+        every candidate of the digest length"""
+
+        for line in ['{}  file.bin\n', '{} *file.bin\n']:
+            with self.subTest(line=line):
+                entry = hashchk_manifest.parse_line(line.format(self.digest))
+                self.assertEqual('file.bin', entry.filename)
+                self.assertEqual(self.digest, entry.digest)
+                self.assertEqual(['sha256', 'sha3_256', 'blake2s'],
+                                 entry.hash_methods)
+
+    def test_bsd_line(self):
+        """Verify BSD tagged lines use the tagged hash method"""
+
+        line = 'SHA3-256 (dir/file name.bin) = {}\n'.format(self.digest)
+        entry = hashchk_manifest.parse_line(line)
+
+        self.assertEqual('dir/file name.bin', entry.filename)
+        self.assertEqual(['sha3_256'], entry.hash_methods)
+
+    def test_escaped_filename(self):
+        """Verify escaped coreutils filenames are unescaped"""
+
+        line = '\\{}  new\\nline\\\\name\n'.format(self.digest)
+        entry = hashchk_manifest.parse_line(line)
+        self.assertEqual('new\nline\\name', entry.filename)
+
+    def test_pinned_hash_method(self):
+        """Verify a pinned hash method replaces the candidates of coreutils
+        lines, but not the method named by BSD lines"""
+
+        entry = hashchk_manifest.parse_line(
+            '{}  file.bin\n'.format(self.digest), hash_method='sha256')
+        self.assertEqual(['sha256'], entry.hash_methods)
+
+        entry = hashchk_manifest.parse_line(
+            'SHA3-256 (file.bin) = {}\n'.format(self.digest),
+            hash_method='sha256')
+        self.assertEqual(['sha3_256'], entry.hash_methods)
+
+    def test_blank_and_comment_lines(self):
+        """Verify blank and comment lines are skipped"""
+
+        for line in ['\n', '   \n', '# comment\n']:
+            with self.subTest(line=line):
+                self.assertIsNone(hashchk_manifest.parse_line(line))
+
+    def test_malformed_line(self):
+        """Verify malformed lines and unknown hash methods raise ValueError"""
+
+        for line in ['not a digest line', 'NOPE (file) = abcd']:
+            with self.subTest(line=line):
+                with self.assertRaises(ValueError):
+                    hashchk_manifest.parse_line(line)
+
+
+class ManifestVerificationTests(unittest.TestCase):
+    """Tests for concurrent verification of manifest entries"""
+
+    def setUp(self):
+        """Writes binaries and a manifest with one corrupt and one missing
+        entry"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.manifest = os.path.join(self.test_dir, 'SHA256SUMS')
+
+        with open(self.manifest, 'w') as manifest:
+            for number in range(10):
+                contents = os.urandom(1000 + number)
+                filename = 'binary_{}.bin'.format(number)
+                with open(os.path.join(self.test_dir, filename), 'wb') as f:
+                    f.write(contents if number else contents[1:])
+
+                manifest.write('{}  {}\n'.format(
+                    hashlib.sha256(contents).hexdigest(), filename))
+            manifest.write('{}  missing.bin\n'.format('0' * 64))
+
+    def tearDown(self):
+        """Removes temporary directory and any files written to it"""
+        shutil.rmtree(self.test_dir)
+
+    def verify(self, threads):
+        """dict: verification results keyed by entry filename"""
+
+        entries = hashchk_manifest.parse_manifest(
+            self.manifest, root=self.test_dir)
+        results = hashchk_manifest.verify_manifest(
+            entries, workers=2, threads=threads)
+        return dict((os.path.basename(result.entry.filename), result)
+                    for result in results)
+
+    def test_malformed_lines_skipped(self):
+        """Verify malformed lines are skipped and reported when an errors
+        list is provided, and raise ValueError otherwise"""
+
+        with open(self.manifest, 'a') as manifest:
+            manifest.write('not a digest line\n')
+
+        errors = []
+        entries = list(hashchk_manifest.parse_manifest(
+            self.manifest, errors=errors))
+        self.assertEqual(11, len(entries))
+        self.assertEqual([12], [line_number for line_number, _ in errors])
+
+        with self.assertRaises(ValueError):
+            list(hashchk_manifest.parse_manifest(self.manifest))
+
+    def test_verify_manifest(self):
+        """Verify matching, corrupt, and missing entries are reported for
+        both thread and process pools"""
+
+        for threads in [True, False]:
+            with self.subTest(threads=threads):
+                results = self.verify(threads)
+
+                self.assertEqual(11, len(results))
+                self.assertIsNone(results['binary_0.bin'].hash_method)
+                self.assertIsNotNone(results['missing.bin'].error)
+                for number in range(1, 10):
+                    result = results['binary_{}.bin'.format(number)]
+                    self.assertEqual('sha256', result.hash_method)
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_manifest Methods\n')
+    unittest.main(buffer=True)
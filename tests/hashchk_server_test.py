@@ -0,0 +1,173 @@
+"""unittests for sealant's hashchk_server daemon and hashchk_client"""
+
+import os
+import sys
+import json
+import socket
+import shutil
+import hashlib
+import unittest
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk_cache
+import hashchk_client
+import hashchk_server
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix domain sockets only")
+class HashchkServerTests(unittest.TestCase):
+    """Tests for requests answered by a daemon running in a thread"""
+
+    def setUp(self):
+        """Writes a binary and starts a daemon with a digest cache"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.binary = os.path.join(self.test_dir, 'test.bin')
+        self.data = os.urandom(50000)
+        with open(self.binary, 'wb') as f:
+            f.write(self.data)
+
+        self.path = os.path.join(self.test_dir, 'hashchk.sock')
+        self.server = hashchk_server.HashchkServer(
+            self.path, workers=2,
+            cache_path=os.path.join(self.test_dir, 'cache.sqlite'))
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       kwargs={'poll_interval': 0.05})
+        self.thread.start()
+
+    def tearDown(self):
+        """Stops the daemon and removes temporary directory"""
+
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.test_dir)
+
+    def test_generate(self):
+        """Verify generated digests match hashlib"""
+
+        with hashchk_client.HashchkClient(self.path) as client:
+            digests = client.generate_digests(self.binary, ['md5', 'sha256'])
+
+        self.assertEqual({'md5': hashlib.md5(self.data).hexdigest(),
+                          'sha256': hashlib.sha256(self.data).hexdigest()},
+                         digests)
+
+    def test_verify(self):
+        """Verify matching and mismatched reference digests"""
+
+        sha512 = hashlib.sha512(self.data).hexdigest()
+        with hashchk_client.HashchkClient(self.path) as client:
+            result = client.verify_digest(self.binary, sha512)
+            self.assertTrue(result['match'])
+            self.assertEqual('sha512', result['hash_method'])
+
+            result = client.verify_digest(self.binary, '0' * 64)
+            self.assertFalse(result['match'])
+            self.assertEqual(hashlib.sha256(self.data).hexdigest(),
+                             result['generated_digest'])
+
+    def test_pipelined(self):
+        """Verify pipelined responses are matched to their requests"""
+
+        methods = ['md5', 'sha1', 'sha256', 'sha512'] * 5
+        with hashchk_client.HashchkClient(self.path) as client:
+            responses = client.request([
+                {'command': 'generate', 'binary': self.binary,
+                 'hash_functions': [method]} for method in methods])
+
+        for method, response in zip(methods, responses):
+            self.assertEqual(hashlib.new(method, self.data).hexdigest(),
+                             response['digests'][method])
+
+    def test_pipelined_beyond_socket_buffer(self):
+        """Verify more pipelined requests than the socket buffers hold are
+        answered instead of deadlocking"""
+
+        requests = [{'command': 'ping', 'padding': 'x' * 100}] * 20000
+        with hashchk_client.HashchkClient(self.path, timeout=30) as client:
+            responses = client.request(requests)
+
+        self.assertEqual(len(requests), len(responses))
+        self.assertFalse(any('error' in response for response in responses))
+
+    def test_unexpected_error(self):
+        """Verify unexpected exceptions are still answered"""
+
+        with hashchk_client.HashchkClient(self.path, timeout=30) as client:
+            response, = client.request([{
+                'command': 'generate', 'binary': self.binary,
+                'buffer_size': 10 ** 20}])
+            self.assertEqual(hashchk_client.SERVER_ERROR,
+                             response['error_type'])
+
+            with self.assertRaises(IOError):
+                hashchk_client.HashchkClient.check_response(response)
+            self.assertTrue(client.ping())
+
+    def test_warm_cache(self):
+        """Verify repeated requests are answered by the worker's cache"""
+
+        with hashchk_client.HashchkClient(self.path) as client:
+            for _ in range(3):
+                client.generate_digests(self.binary, ['sha256'])
+
+        with hashchk_cache.DigestCache(self.server.cache_path) as cache:
+            key = hashchk_cache.file_key(self.binary)
+            self.assertEqual(hashlib.sha256(self.data).hexdigest(),
+                             cache.lookup(key, 'sha256'))
+
+    def test_errors(self):
+        """Verify failed requests are answered rather than dropping the
+        connection"""
+
+        with hashchk_client.HashchkClient(self.path) as client:
+            with self.assertRaises(IOError):
+                client.generate_digests(
+                    os.path.join(self.test_dir, 'missing'), ['sha256'])
+
+            for request in ({'command': 'unknown'},
+                            {'command': 'generate', 'binary': 'relative'},
+                            {'command': 'generate', 'binary': self.binary,
+                             'hash_functions': ['bogus']},
+                            {'command': 'verify', 'binary': self.binary}):
+                with self.subTest(request=request):
+                    response, = client.request([request])
+                    self.assertEqual(hashchk_client.REQUEST_ERROR,
+                                     response['error_type'])
+
+            self.assertTrue(client.ping())
+
+    def test_malformed_line(self):
+        """Verify lines that aren't JSON objects are answered with an
+        error"""
+
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(self.path)
+        connection.sendall(b'not json\n[1, 2]\n')
+        connection.shutdown(socket.SHUT_WR)
+
+        with connection.makefile('rb') as responses:
+            lines = responses.read().splitlines()
+        connection.close()
+
+        self.assertEqual(2, len(lines))
+        for line in lines:
+            self.assertEqual(hashchk_client.REQUEST_ERROR,
+                             json.loads(line.decode())['error_type'])
+
+    def test_socket_in_use(self):
+        """Verify a second daemon refuses a live socket, and the socket is
+        private to the current user"""
+
+        with self.assertRaises(IOError):
+            hashchk_server.HashchkServer(self.path, workers=1)
+
+        self.assertEqual(0o600, os.stat(self.path).st_mode & 0o777)
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_server Methods\n')
+    unittest.main(buffer=True)
@@ -0,0 +1,203 @@
+"""unittests for sealant's hashchk_snapshot module"""
+
+import os
+import sys
+import shutil
+import hashlib
+import binascii
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk_snapshot
+
+
+class SnapshotTests(unittest.TestCase):
+    """Tests for snapshots, incremental rescans, and Merkle roots"""
+
+    def setUp(self):
+        """Writes a small directory tree and opens a snapshot of it"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.tree = os.path.join(self.test_dir, 'tree')
+        self.write('a.bin', b'alpha')
+        self.write('sub/b.bin', b'bravo')
+        self.write('sub/deeper/c.bin', b'charlie')
+
+        self.snapshot = hashchk_snapshot.Snapshot(
+            os.path.join(self.test_dir, 'snapshot.sqlite'))
+
+    def tearDown(self):
+        """Closes snapshot and removes temporary directory"""
+
+        self.snapshot.close()
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path, data, tree=None):
+        """Writes `data` to `path` below the tree"""
+
+        filename = os.path.join(tree or self.tree, path)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, 'wb') as f:
+            f.write(data)
+
+    def test_initial_scan(self):
+        """Verify every file is recorded with its digest"""
+
+        report = self.snapshot.scan(self.tree)
+
+        self.assertEqual(['a.bin', 'sub/b.bin', 'sub/deeper/c.bin'],
+                         report.added)
+        self.assertEqual(3, report.hashed)
+        self.assertEqual(report.root, self.snapshot.root)
+        self.assertEqual('sha256', self.snapshot.hash_method)
+        self.assertEqual(
+            [hashlib.sha256(data).hexdigest()
+             for data in (b'alpha', b'bravo', b'charlie')],
+            [entry.digest for entry in self.snapshot.entries()])
+
+    def test_incremental_rescan(self):
+        """Verify a rescan only reads changed files and reports changes"""
+
+        self.snapshot.scan(self.tree)
+        unchanged = self.snapshot.scan()
+        self.assertEqual((0, 3), (unchanged.hashed, unchanged.unchanged))
+        self.assertEqual(unchanged.root, self.snapshot.root)
+
+        self.write('a.bin', b'ALPHA!')
+        self.write('new.bin', b'delta')
+        os.remove(os.path.join(self.tree, 'sub', 'b.bin'))
+
+        # Touched but unchanged files are read but not reported
+        os.utime(os.path.join(self.tree, 'sub', 'deeper', 'c.bin'), (1, 1))
+
+        report = self.snapshot.scan()
+        self.assertEqual(['new.bin'], report.added)
+        self.assertEqual(['sub/b.bin'], report.removed)
+        self.assertEqual(['a.bin'], report.modified)
+        self.assertEqual((3, 1), (report.hashed, report.unchanged))
+        self.assertNotEqual(unchanged.root, report.root)
+
+        self.assertEqual(['a.bin', 'new.bin', 'sub/deeper/c.bin'],
+                         [entry.path.decode() for entry in
+                          self.snapshot.entries()])
+        self.assertEqual(0, self.snapshot.scan().hashed)
+
+    def test_unreadable_file_kept(self):
+        """Verify recorded files that can't be read are reported as errors,
+        keep their entry, and aren't reported as removed"""
+
+        first = self.snapshot.scan(self.tree)
+        hash_file = hashchk_snapshot._hash_file
+
+        def failing_hash_file(filename, *args):
+            if filename.endswith('c.bin'):
+                return None, IOError("Permission denied")
+            return hash_file(filename, *args)
+
+        hashchk_snapshot._hash_file = failing_hash_file
+        try:
+            report = self.snapshot.scan(full=True)
+        finally:
+            hashchk_snapshot._hash_file = hash_file
+
+        self.assertEqual(['sub/deeper/c.bin'],
+                         [path for path, _ in report.errors])
+        self.assertEqual([], report.removed)
+        self.assertEqual((3, 2), (report.hashed, report.unchanged))
+        self.assertEqual(first.root, report.root)
+        self.assertEqual(3, len(list(self.snapshot.entries())))
+
+    def test_audit(self):
+        """Verify scans without updating leave the snapshot unchanged, and a
+        full scan finds changes hidden by restored stat metadata"""
+
+        self.snapshot.scan(self.tree)
+        root = self.snapshot.root
+
+        filename = os.path.join(self.tree, 'a.bin')
+        file_stat = os.stat(filename)
+        self.write('a.bin', b'ALPHA')
+        os.utime(filename, (file_stat.st_atime, file_stat.st_mtime))
+
+        report = self.snapshot.scan(update=False, full=True)
+        self.assertEqual(['a.bin'], report.modified)
+        self.assertEqual(root, self.snapshot.root)
+        self.assertEqual(['a.bin'],
+                         self.snapshot.scan(update=False, full=True).modified)
+
+    def test_identical_trees(self):
+        """Verify copies of a tree share a root, and compare() lists the
+        differences between snapshots"""
+
+        copy = os.path.join(self.test_dir, 'copy')
+        shutil.copytree(self.tree, copy)
+        self.snapshot.scan(self.tree)
+
+        other = hashchk_snapshot.Snapshot(
+            os.path.join(self.test_dir, 'other.sqlite'))
+        try:
+            other.scan(copy)
+            self.assertEqual(self.snapshot.root, other.root)
+            self.assertEqual(([], [], []), self.snapshot.compare(other))
+
+            self.write('sub/b.bin', b'BRAVO', tree=copy)
+            self.write('extra.bin', b'echo', tree=copy)
+            other.scan()
+            self.assertNotEqual(self.snapshot.root, other.root)
+            self.assertEqual(([], ['extra.bin'], ['sub/b.bin']),
+                             self.snapshot.compare(other))
+        finally:
+            other.close()
+
+    def test_renamed_file_changes_root(self):
+        """Verify paths are part of the root, not just contents"""
+
+        self.snapshot.scan(self.tree)
+        root = self.snapshot.root
+
+        os.rename(os.path.join(self.tree, 'a.bin'),
+                  os.path.join(self.tree, 'z.bin'))
+        report = self.snapshot.scan()
+        self.assertEqual((['z.bin'], ['a.bin']),
+                         (report.added, report.removed))
+        self.assertNotEqual(root, report.root)
+
+    def test_hash_method_mismatch(self):
+        """Verify a snapshot refuses to mix hash methods"""
+
+        self.snapshot.scan(self.tree, hash_method='sha512')
+        with self.assertRaises(ValueError):
+            self.snapshot.scan(hash_method='sha256')
+
+    def test_database_inside_tree(self):
+        """Verify a snapshot database stored inside its tree isn't
+        recorded"""
+
+        with hashchk_snapshot.Snapshot(
+                os.path.join(self.tree, 'snapshot.sqlite')) as snapshot:
+            report = snapshot.scan(self.tree)
+            self.assertEqual(3, len(report.added))
+            self.assertEqual([], snapshot.scan().added)
+
+    def test_merkle_root(self):
+        """Verify the Merkle root construction documented in the module"""
+
+        def node(*parts):
+            return hashlib.sha256(b''.join(parts)).digest()
+
+        leaves = [node(b'\x00', bytes(bytearray([number]))) for number in
+                  range(3)]
+        expected = node(b'\x01', node(b'\x01', leaves[0], leaves[1]),
+                        leaves[2])
+
+        self.assertEqual(binascii.hexlify(expected).decode(),
+                         hashchk_snapshot.merkle_root('sha256', leaves))
+        self.assertEqual(hashlib.sha256(b'\x01').hexdigest(),
+                         hashchk_snapshot.merkle_root('sha256', []))
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_snapshot Methods\n')
+    unittest.main(buffer=True)
@@ -0,0 +1,291 @@
+"""unittests for sealant's hashchk_terminal subcommands and their exit codes"""
+
+import io
+import os
+import sys
+import shutil
+import hashlib
+
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk_terminal
+
+
+class HashchkTerminalTestCase(unittest.TestCase):
+    """Base test case that runs hashchk_terminal.main() against binaries in a
+    temporary directory"""
+
+    def setUp(self):
+        """Writes the binary used by every subcommand"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.contents = os.urandom(100000)
+        self.binary = self.write('binary.bin', self.contents)
+        self.digest = hashlib.sha256(self.contents).hexdigest()
+
+    def tearDown(self):
+        """Removes temporary directory and any files written to it"""
+        shutil.rmtree(self.test_dir)
+
+    def write(self, path, data):
+        """str: Filename of `data` written to `path` below the test
+        directory"""
+
+        filename = os.path.join(self.test_dir, path)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return filename
+
+    def run_hashchk(self, *args):
+        """Runs hashchk with `args`, capturing its output.
+
+        Returns:
+            tuple: (exit code, stdout, stderr)
+        """
+
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = io.StringIO(), io.StringIO()
+        try:
+            hashchk_terminal.main(list(args))
+            code = 0
+        except SystemExit as e:
+            code = e.code or 0
+            if not isinstance(code, int):
+                # Printed by the interpreter when the exit isn't caught
+                sys.stderr.write('{}\n'.format(code))
+                code = 1
+        finally:
+            output = sys.stdout.getvalue(), sys.stderr.getvalue()
+            sys.stdout, sys.stderr = stdout, stderr
+
+        return (code,) + output
+
+    def assert_rejected(self, *args):
+        """Checks argparse rejects `args` with a usage error."""
+
+        code, _, stderr = self.run_hashchk(*args)
+        self.assertEqual(2, code)
+        self.assertIn('error', stderr)
+
+
+class GenerateTests(HashchkTerminalTestCase):
+    """Tests for the generate subcommand"""
+
+    def test_generate(self):
+        """Verify digests are printed and the command succeeds"""
+
+        code, stdout, _ = self.run_hashchk(
+            'generate', '-binary', self.binary, '-hf', 'sha256', 'md5')
+
+        self.assertEqual(0, code)
+        self.assertIn(self.digest, stdout)
+        self.assertIn(hashlib.md5(self.contents).hexdigest(), stdout)
+
+    def test_rejected_arguments(self):
+        """Verify unknown methods and tree digests of stdin are rejected"""
+
+        self.assert_rejected('generate', '-binary', self.binary, '-hf', 'x')
+        self.assert_rejected('generate', '-binary', '-', '--tree')
+
+    def test_digest_length(self):
+        """Verify SHAKE digests honour even lengths and reject zero, odd, and
+        non-integer lengths"""
+
+        code, stdout, _ = self.run_hashchk('generate', '-binary', self.binary,
+                                           '-hf', 'shake_128', '-l', '16')
+        self.assertEqual(0, code)
+        self.assertIn(hashlib.shake_128(self.contents).hexdigest(8), stdout)
+
+        for length in ('0', '15', '-4', 'x'):
+            with self.subTest(length=length):
+                self.assert_rejected('generate', '-binary', self.binary,
+                                     '-hf', 'shake_128', '-l', length)
+
+
+class PositiveArgumentTests(HashchkTerminalTestCase):
+    """Tests for options that only accept positive integers"""
+
+    def test_rejected_values(self):
+        """Verify leaf sizes, worker counts, cache sizes, and buffer sizes
+        below 1 are rejected for every subcommand taking them"""
+
+        database = os.path.join(self.test_dir, 'snapshot.sqlite')
+        commands = [
+            ('generate', '-binary', self.binary, '--tree', '--leaf-size'),
+            ('generate', '-binary', self.binary, '--tree', '-w'),
+            ('generate', '-binary', self.binary, '--cache-size'),
+            ('verify', '-digest', self.digest, '-binary', self.binary, '-w'),
+            ('check', 'SHA256SUMS', '-w'),
+            ('serve', '-w'), ('serve', '--cache-size'),
+            ('snapshot', database, self.test_dir, '-w'),
+            ('audit', database, '-w'),
+            ('dedupe', self.test_dir, '-w'),
+            ('generate', '-binary', self.binary, '-bs')]
+
+        for command in commands:
+            for value in ('0', '-2'):
+                with self.subTest(command=command, value=value):
+                    self.assert_rejected(*command + (value,))
+
+
+class CheckTests(HashchkTerminalTestCase):
+    """Tests for the check subcommand"""
+
+    def check(self, *lines):
+        """tuple: Result of checking a manifest holding `lines`"""
+
+        manifest = self.write('SHA256SUMS', ''.join(
+            line + '\n' for line in lines).encode())
+        return self.run_hashchk('check', manifest, '--threads')
+
+    def test_matching_manifest(self):
+        """Verify a manifest of matching files succeeds"""
+
+        code, stdout, _ = self.check('{}  {}'.format(self.digest, self.binary))
+        self.assertEqual(0, code)
+        self.assertIn('OK', stdout)
+
+    def test_failures_exit_nonzero(self):
+        """Verify mismatched and missing files exit with status 1"""
+
+        missing = os.path.join(self.test_dir, 'missing.bin')
+        for line in ('{}  {}'.format('0' * 64, self.binary),
+                     '{}  {}'.format(self.digest, missing)):
+            with self.subTest(line=line):
+                self.assertEqual(1, self.check(line)[0])
+
+    def test_malformed_lines_skipped(self):
+        """Verify malformed lines are reported without failing the check"""
+
+        code, _, stderr = self.check(
+            'not a digest line', '{}  {}'.format(self.digest, self.binary))
+        self.assertEqual(0, code)
+        self.assertIn('line 1', stderr)
+
+
+class IndexTests(HashchkTerminalTestCase):
+    """Tests for the index subcommand"""
+
+    def test_index_and_check(self):
+        """Verify an index is written and an intact binary passes"""
+
+        self.assertEqual(0, self.run_hashchk(
+            'index', '-binary', self.binary, '--chunk-size', '4096')[0])
+        code, stdout, _ = self.run_hashchk(
+            'index', '-binary', self.binary, '--check')
+
+        self.assertEqual(0, code)
+        self.assertIn('SUCCESS', stdout)
+
+    def test_corruption_exits_nonzero(self):
+        """Verify a binary with corrupt chunks exits with status 1"""
+
+        self.run_hashchk('index', '-binary', self.binary,
+                         '--chunk-size', '4096')
+        with open(self.binary, 'r+b') as f:
+            f.seek(5000)
+            f.write(b'\0' * 10)
+
+        code, stdout, _ = self.run_hashchk(
+            'index', '-binary', self.binary, '--check')
+        self.assertEqual(1, code)
+        self.assertIn('Corrupt: bytes 4096-8191', stdout)
+
+    def test_rejected_chunk_sizes(self):
+        """Verify chunk sizes below 1 are rejected rather than hanging"""
+
+        for chunk_size in ('0', '-1', 'x'):
+            with self.subTest(chunk_size=chunk_size):
+                self.assert_rejected('index', '-binary', self.binary,
+                                     '--chunk-size', chunk_size)
+
+    def test_rejected_ranges(self):
+        """Verify malformed --ranges are rejected"""
+
+        for byte_range in ('abc', '10:5', '5'):
+            with self.subTest(byte_range=byte_range):
+                self.assert_rejected('index', '-binary', self.binary,
+                                     '--check', '--ranges', byte_range)
+
+
+class SnapshotTests(HashchkTerminalTestCase):
+    """Tests for the snapshot and audit subcommands"""
+
+    def setUp(self):
+        """Adds a database filename beside the snapshotted tree"""
+
+        HashchkTerminalTestCase.setUp(self)
+        self.tree = os.path.dirname(self.binary)
+        self.database = os.path.join(
+            tempfile.mkdtemp(dir=self.test_dir), 'snapshot.sqlite')
+
+    def test_snapshot_and_audit(self):
+        """Verify an unchanged tree passes its audit"""
+
+        code, stdout, _ = self.run_hashchk(
+            'snapshot', self.database, self.tree)
+        self.assertEqual(0, code)
+        self.assertIn('binary.bin', stdout)
+
+        code, stdout, _ = self.run_hashchk('audit', self.database)
+        self.assertEqual(0, code)
+        self.assertIn('SUCCESS', stdout)
+
+    def test_differences_exit_nonzero(self):
+        """Verify added, modified, and removed files fail the audit, as do
+        differing snapshots"""
+
+        self.run_hashchk('snapshot', self.database, self.tree)
+        other = os.path.join(self.test_dir, 'other.sqlite')
+        self.run_hashchk('snapshot', other, self.tree)
+
+        changes = [lambda: self.write('added.bin', b'added'),
+                   lambda: self.write('binary.bin', b'modified'),
+                   lambda: os.remove(self.binary)]
+        for change in changes:
+            change()
+            with self.subTest(change=change):
+                code, _, _ = self.run_hashchk('audit', self.database)
+                self.assertEqual(1, code)
+
+        self.run_hashchk('snapshot', other)
+        self.assertEqual(1, self.run_hashchk(
+            'audit', self.database, '--compare', other)[0])
+
+    def test_scan_errors_reported(self):
+        """Verify a snapshot without a directory, or with a different hash
+        method, exits with a message instead of a traceback"""
+
+        code, _, stderr = self.run_hashchk('snapshot', self.database)
+        self.assertEqual(1, code)
+        self.assertIn('No directory', stderr)
+
+        self.run_hashchk('snapshot', self.database, self.tree)
+        code, _, stderr = self.run_hashchk(
+            'snapshot', self.database, '-hf', 'md5')
+        self.assertEqual(1, code)
+        self.assertIn('sha256', stderr)
+
+
+class DedupeTests(HashchkTerminalTestCase):
+    """Tests for the dedupe subcommand"""
+
+    def test_duplicates_reported(self):
+        """Verify duplicate files are listed with the space they waste"""
+
+        duplicate = self.write('copy/binary.bin', self.contents)
+        code, stdout, _ = self.run_hashchk('dedupe', self.test_dir)
+
+        self.assertEqual(0, code)
+        self.assertIn(duplicate, stdout)
+        self.assertIn('{:,} bytes in 1 duplicate group'.format(
+            len(self.contents)), stdout)
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_terminal subcommands\n')
+    unittest.main(buffer=True)
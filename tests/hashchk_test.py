@@ -0,0 +1,408 @@
+"""unittests for sealant's hashchk functions and Digest class"""
+
+import io
+import os
+import sys
+import shutil
+import hashlib
+import threading
+
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk
+
+
+class HashchkTestCase(unittest.TestCase):
+    """Base test case that provides a temporary binary file"""
+
+    def setUp(self):
+        """Writes binary file used as digest generation source"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.contents = os.urandom(200000)
+
+        self.binary = os.path.join(self.test_dir, 'binary.bin')
+        with open(self.binary, 'wb') as f:
+            f.write(self.contents)
+
+    def tearDown(self):
+        """Removes temporary directory and any files written to it"""
+        shutil.rmtree(self.test_dir)
+
+    def reference(self, hash_method, contents=None):
+        """str: digest generated directly through hashlib for comparison"""
+        data = self.contents if contents is None else contents
+        return getattr(hashlib, hash_method)(data).hexdigest()
+
+
+class DigestTests(HashchkTestCase):
+    """Tests for hash method detection performed by hashchk.Digest"""
+
+    def test_hash_method_detection(self):
+        """Verify digest length maps to the expected SHA-2 method"""
+
+        for method in ['md5', 'sha1', 'sha224', 'sha256', 'sha384', 'sha512']:
+            with self.subTest(method=method):
+                digest = hashchk.Digest(self.reference(method))
+                self.assertEqual(method, digest.hash_method)
+
+    def test_sha3_detection(self):
+        """Verify sha3 switch maps digest length to SHA-3 methods"""
+
+        digest = hashchk.Digest(self.reference('sha3_256'), sha3=True)
+        self.assertEqual('sha3_256', digest.hash_method)
+
+    def test_ambiguous_candidates(self):
+        """Verify digest lengths shared by several families list every
+        candidate, with the preferred family first"""
+
+        reference = self.reference('sha256')
+        expected = {None: ['sha256', 'sha3_256', 'blake2s'],
+                    'sha3': ['sha3_256', 'sha256', 'blake2s'],
+                    'blake2': ['blake2s', 'sha256', 'sha3_256'],
+                    'shake': ['shake_128', 'sha256', 'sha3_256', 'blake2s']}
+
+        for family, candidates in expected.items():
+            with self.subTest(family=family):
+                digest = hashchk.Digest(reference, family=family)
+                self.assertEqual(candidates, digest.candidate_methods)
+
+        digest = hashchk.Digest(reference, sha3=True)
+        self.assertEqual(expected['sha3'], digest.candidate_methods)
+
+    def test_blake2_detection(self):
+        """Verify blake2 family maps digest lengths to BLAKE2 methods"""
+
+        for method in ['blake2s', 'blake2b']:
+            with self.subTest(method=method):
+                digest = hashchk.Digest(self.reference(method),
+                                        family='blake2')
+                self.assertEqual(method, digest.hash_method)
+
+    def test_unambiguous_candidates(self):
+        """Verify digests only produced by one method have a single
+        candidate"""
+
+        digest = hashchk.Digest(self.reference('md5'))
+        self.assertEqual(['md5'], digest.candidate_methods)
+
+    def test_digest_from_file(self):
+        """Verify reference digest is read from a coreutils style file"""
+
+        reference = self.reference('sha256')
+        filename = os.path.join(self.test_dir, 'binary.sha256')
+        with open(filename, 'w') as f:
+            f.write('{} binary.bin\n'.format(reference))
+
+        self.assertEqual(reference, hashchk.Digest(filename).reference_digest)
+
+
+class GenerateDigestTests(HashchkTestCase):
+    """Tests for hashchk.generate_digest and hashchk.generate_digests"""
+
+    def test_generate_digest(self):
+        """Verify generated digest matches hashlib digest"""
+
+        generated = hashchk.generate_digest(self.binary, 'sha256')
+        self.assertEqual(self.reference('sha256'), generated)
+
+    def test_generate_digests(self):
+        """Verify every requested hash method is generated in one call"""
+
+        methods = ['md5', 'sha256', 'sha3_256', 'blake2b', 'blake2s']
+        generated = hashchk.generate_digests(self.binary, methods)
+
+        self.assertEqual(set(methods), set(generated))
+        for method in methods:
+            with self.subTest(method=method):
+                self.assertEqual(self.reference(method), generated[method])
+
+    def test_variable_length_digests(self):
+        """Verify SHAKE digests default to their conventional length and
+        honor requested lengths"""
+
+        generated = hashchk.generate_digests(
+            self.binary, ['shake_128', 'shake_256'])
+        for method, length in [('shake_128', 32), ('shake_256', 64)]:
+            with self.subTest(method=method):
+                reference = getattr(hashlib, method)(self.contents)
+                self.assertEqual(reference.hexdigest(length),
+                                 generated[method])
+
+        generated = hashchk.generate_digest(
+            self.binary, 'shake_256', digest_length=20)
+        self.assertEqual(hashlib.shake_256(self.contents).hexdigest(10),
+                         generated)
+
+    def test_read_options(self):
+        """Verify buffer sizes and memory mapping don't affect the digest,
+        including buffer sizes that don't evenly divide the file"""
+
+        reference = self.reference('sha256')
+        for use_mmap in [True, False]:
+            for buffer_size in [1, 4095, 65536, 1048576]:
+                with self.subTest(use_mmap=use_mmap, buffer_size=buffer_size):
+                    generated = hashchk.generate_digest(
+                        self.binary, 'sha256', buffer_size=buffer_size,
+                        use_mmap=use_mmap)
+                    self.assertEqual(reference, generated)
+
+    def test_tuned_buffer_size(self):
+        """Verify tuned buffer sizes stay within their bounds"""
+
+        for size in [0, 1, 65536, 10 ** 6, 10 ** 12]:
+            with self.subTest(size=size):
+                os.truncate(self.binary, size)
+                buffer_size = hashchk.tune_buffer_size(os.stat(self.binary))
+
+                self.assertGreaterEqual(buffer_size, hashchk.MIN_BUFFER_SIZE)
+                self.assertLessEqual(buffer_size, hashchk.MAX_BUFFER_SIZE)
+
+    def test_empty_file(self):
+        """Verify empty files produce the digest of an empty byte string"""
+
+        filename = os.path.join(self.test_dir, 'empty.bin')
+        open(filename, 'wb').close()
+
+        for use_mmap in [True, False]:
+            with self.subTest(use_mmap=use_mmap):
+                generated = hashchk.generate_digest(
+                    filename, 'sha1', use_mmap=use_mmap)
+                self.assertEqual(self.reference('sha1', b''), generated)
+
+    def test_read_range(self):
+        """Verify read_range reads only the requested section, stopping early
+        at EOF"""
+
+        for offset, length in [(0, 10), (1000, 70000), (199990, 100)]:
+            with self.subTest(offset=offset, length=length):
+                with open(self.binary, 'rb') as f:
+                    section = b''.join(bytes(block) for block in
+                                       hashchk.read_range(f, offset, length,
+                                                          buffer_size=4096))
+                self.assertEqual(self.contents[offset:offset + length],
+                                 section)
+
+
+class GenerateStreamDigestTests(HashchkTestCase):
+    """Tests for hashchk.generate_stream_digests"""
+
+    def test_partly_consumed_file(self):
+        """Verify files are hashed from their current position whether or
+        not they're memory mapped"""
+
+        for use_mmap in (False, True):
+            with self.subTest(use_mmap=use_mmap):
+                with open(self.binary, 'rb', buffering=0) as f:
+                    f.read(12345)
+                    generated = hashchk.generate_stream_digests(
+                        f, ['sha256'], use_mmap=use_mmap)
+                    self.assertEqual(len(self.contents), f.tell())
+
+                self.assertEqual(
+                    self.reference('sha256', self.contents[12345:]),
+                    generated['sha256'])
+
+    def test_file_object(self):
+        """Verify file objects without a file descriptor are hashed"""
+
+        generated = hashchk.generate_stream_digests(
+            io.BytesIO(self.contents), ['sha256'], buffer_size=1000)
+        self.assertEqual(self.reference('sha256'), generated['sha256'])
+
+    def test_iterable(self):
+        """Verify iterables of buffers are hashed"""
+
+        chunks = (self.contents[i:i + 999]
+                  for i in range(0, len(self.contents), 999))
+        generated = hashchk.generate_stream_digests(chunks, ['md5', 'sha1'])
+
+        self.assertEqual(self.reference('md5'), generated['md5'])
+        self.assertEqual(self.reference('sha1'), generated['sha1'])
+
+    def test_pipe(self):
+        """Verify pipes are read until the writer closes them"""
+
+        read_fd, write_fd = os.pipe()
+
+        def writer():
+            with os.fdopen(write_fd, 'wb') as f:
+                f.write(self.contents)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        with os.fdopen(read_fd, 'rb') as f:
+            generated = hashchk.generate_stream_digests(f, ['sha256'])
+        thread.join()
+
+        self.assertEqual(self.reference('sha256'), generated['sha256'])
+
+
+class ProgressMeterTests(HashchkTestCase):
+    """Tests for hashchk.ProgressMeter and progress callbacks"""
+
+    def test_callable(self):
+        """Verify bare callables are wrapped and told when hashing finishes"""
+
+        meters = []
+        generated = hashchk.generate_digest(
+            self.binary, 'sha256', buffer_size=65536, progress=meters.append)
+
+        self.assertEqual(self.reference('sha256'), generated)
+        self.assertTrue(meters[-1].finished)
+        self.assertEqual(len(self.contents), meters[-1].bytes_hashed)
+        self.assertEqual(len(self.contents), meters[-1].total_bytes)
+
+    def test_interval_bytes(self):
+        """Verify callbacks are rate limited by bytes hashed"""
+
+        hashed = []
+        meter = hashchk.ProgressMeter(
+            lambda m: hashed.append(m.bytes_hashed), interval_bytes=50000)
+        hashchk.generate_digest(
+            self.binary, 'md5', buffer_size=10000, progress=meter)
+
+        self.assertEqual([50000, 100000, 150000, 200000, 200000], hashed)
+
+    def test_metrics(self):
+        """Verify metrics account for every byte of a stream"""
+
+        meter = hashchk.ProgressMeter(lambda m: None)
+        hashchk.generate_stream_digests(
+            io.BytesIO(self.contents), ['sha1'], buffer_size=4096,
+            progress=meter)
+
+        metrics = meter.metrics
+        self.assertEqual(len(self.contents), metrics['bytes'])
+        self.assertIsNone(metrics['total_bytes'])
+        self.assertGreaterEqual(metrics['elapsed'],
+                                metrics['read_seconds'] +
+                                metrics['hash_seconds'])
+
+
+class CountingReader(io.RawIOBase):
+    """Unbuffered file wrapper counting the bytes actually read"""
+
+    def __init__(self, f):
+        self.f = f
+        self.bytes_read = 0
+
+    def fileno(self):
+        return self.f.fileno()
+
+    def readable(self):
+        return True
+
+    def seek(self, offset, whence=0):
+        return self.f.seek(offset, whence)
+
+    def readinto(self, buffer):
+        read_size = self.f.readinto(buffer)
+        self.bytes_read += read_size
+        return read_size
+
+
+@unittest.skipUnless(hashchk.SPARSE_SUPPORTED, "SEEK_DATA not supported")
+class SparseReadTests(HashchkTestCase):
+    """Tests for reading sparse files without reading their holes"""
+
+    SIZE = 64 * 1048576
+
+    def setUp(self):
+        """Writes a sparse file with data at its start, middle, and end"""
+
+        super(SparseReadTests, self).setUp()
+
+        self.sparse = os.path.join(self.test_dir, 'sparse.bin')
+        self.data = [(0, os.urandom(5000)), (self.SIZE // 2, os.urandom(70000)),
+                     (self.SIZE - 3000, os.urandom(3000))]
+        with open(self.sparse, 'wb') as f:
+            f.truncate(self.SIZE)
+            for offset, data in self.data:
+                f.seek(offset)
+                f.write(data)
+
+        if not hashchk.is_sparse(os.stat(self.sparse)):
+            self.skipTest("file system doesn't support sparse files")
+
+    def sparse_contents(self):
+        """bytes: every byte of the sparse file, holes included"""
+
+        contents = bytearray(self.SIZE)
+        for offset, data in self.data:
+            contents[offset:offset + len(data)] = data
+        return bytes(contents)
+
+    def test_identical_digests(self):
+        """Verify sparse reads produce the digests of a full read"""
+
+        contents = self.sparse_contents()
+        for use_mmap in (False, True):
+            with self.subTest(use_mmap=use_mmap):
+                generated = hashchk.generate_digests(
+                    self.sparse, ['sha256', 'blake2b'], use_mmap=use_mmap)
+                self.assertEqual(self.reference('sha256', contents),
+                                 generated['sha256'])
+                self.assertEqual(self.reference('blake2b', contents),
+                                 generated['blake2b'])
+
+    def test_holes_not_read(self):
+        """Verify only data extents are read from disk"""
+
+        with open(self.sparse, 'rb', buffering=0) as f:
+            reader = CountingReader(f)
+            generated = hashchk.generate_stream_digests(reader, ['md5'])
+
+        self.assertEqual(self.reference('md5', self.sparse_contents()),
+                         generated['md5'])
+        self.assertGreaterEqual(reader.bytes_read,
+                                sum(len(data) for _, data in self.data))
+        self.assertLess(reader.bytes_read, self.SIZE // 8)
+
+    def test_partly_consumed_file(self):
+        """Verify sparse files are hashed from their current position"""
+
+        contents = self.sparse_contents()
+        for offset in (1000, self.SIZE // 4, self.SIZE - 1000):
+            with self.subTest(offset=offset):
+                with open(self.sparse, 'rb', buffering=0) as f:
+                    f.seek(offset)
+                    generated = hashchk.generate_stream_digests(
+                        f, ['sha256'])
+                    self.assertEqual(self.SIZE, f.tell())
+
+                self.assertEqual(self.reference('sha256', contents[offset:]),
+                                 generated['sha256'])
+
+    def test_data_extents(self):
+        """Verify data extents cover every written byte and the file offset
+        is left untouched"""
+
+        with open(self.sparse, 'rb', buffering=0) as f:
+            f.seek(123)
+            extents = list(hashchk.data_extents(f.fileno(), self.SIZE))
+            self.assertEqual(123, f.tell())
+
+        for offset, data in self.data:
+            self.assertTrue(any(start <= offset and
+                                offset + len(data) <= end
+                                for start, end in extents))
+        self.assertLessEqual(extents[-1][1], self.SIZE)
+
+    def test_sparse_disabled(self):
+        """Verify sparse=False reads holes like any other data"""
+
+        with open(self.sparse, 'rb', buffering=0) as f:
+            reader = CountingReader(f)
+            size = sum(len(block) for block in hashchk.read_blocks(
+                reader, use_mmap=False, sparse=False))
+
+        self.assertEqual(self.SIZE, size)
+        self.assertEqual(self.SIZE, reader.bytes_read)
+
+
+if __name__ == '__main__':
+    print('Testing hashchk Methods\n')
+    unittest.main(buffer=True)
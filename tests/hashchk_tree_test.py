@@ -0,0 +1,104 @@
+"""unittests for sealant's hashchk_tree tree hash digests"""
+
+import os
+import sys
+import shutil
+import hashlib
+
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+import hashchk_tree
+
+
+class TreeDigestTests(unittest.TestCase):
+    """Tests for Merkle and BLAKE2 tree digests"""
+
+    def setUp(self):
+        """Writes binary file split into three leaves, the last one short"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.leaf_size = 4096
+        self.contents = os.urandom(self.leaf_size * 2 + 100)
+
+        self.binary = os.path.join(self.test_dir, 'binary.bin')
+        with open(self.binary, 'wb') as f:
+            f.write(self.contents)
+
+    def tearDown(self):
+        """Removes temporary directory and any files written to it"""
+        shutil.rmtree(self.test_dir)
+
+    def leaves(self):
+        """list[bytes]: contents of each leaf"""
+        return [self.contents[i:i + self.leaf_size]
+                for i in range(0, len(self.contents), self.leaf_size)]
+
+    def test_merkle_construction(self):
+        """Verify Merkle digests follow the documented construction"""
+
+        leaves = [hashlib.sha256(b'\x00' + leaf).digest()
+                  for leaf in self.leaves()]
+        reference = hashlib.sha256(b'\x01' + b''.join(leaves)).hexdigest()
+
+        generated = hashchk_tree.tree_digest(
+            self.binary, 'sha256', leaf_size=self.leaf_size, workers=2)
+        self.assertEqual(reference, generated)
+
+    def test_blake2_construction(self):
+        """Verify BLAKE2 digests use the native tree parameters"""
+
+        leaves = self.leaves()
+        params = dict(fanout=0, depth=2, leaf_size=self.leaf_size,
+                      inner_size=64)
+
+        digests = [hashlib.blake2b(
+            leaf, node_offset=index, node_depth=0,
+            last_node=index == len(leaves) - 1, **params).digest()
+            for index, leaf in enumerate(leaves)]
+        reference = hashlib.blake2b(
+            b''.join(digests), node_offset=0, node_depth=1, last_node=True,
+            **params).hexdigest()
+
+        generated = hashchk_tree.tree_digest(
+            self.binary, 'blake2b', leaf_size=self.leaf_size, threads=True)
+        self.assertEqual(reference, generated)
+
+    def test_worker_independence(self):
+        """Verify digests don't depend on the number or kind of workers"""
+
+        digests = set()
+        for workers in [1, 3]:
+            for threads in [True, False]:
+                digests.add(hashchk_tree.tree_digest(
+                    self.binary, 'md5', leaf_size=self.leaf_size,
+                    workers=workers, threads=threads))
+
+        self.assertEqual(1, len(digests))
+
+    def test_leaf_size_dependence(self):
+        """Verify different leaf sizes produce different digests"""
+
+        first, second = (hashchk_tree.tree_digest(
+            self.binary, 'sha1', leaf_size=size, threads=True)
+            for size in [self.leaf_size, self.leaf_size * 2])
+        self.assertNotEqual(first, second)
+
+    def test_multiple_methods(self):
+        """Verify several hash methods match their individual digests"""
+
+        generated = hashchk_tree.tree_digests(
+            self.binary, ['sha256', 'blake2s'], leaf_size=self.leaf_size,
+            threads=True)
+
+        for method in ['sha256', 'blake2s']:
+            with self.subTest(method=method):
+                self.assertEqual(generated[method], hashchk_tree.tree_digest(
+                    self.binary, method, leaf_size=self.leaf_size,
+                    threads=True))
+
+
+if __name__ == '__main__':
+    print('Testing hashchk_tree Methods\n')
+    unittest.main(buffer=True)
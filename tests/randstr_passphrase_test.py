@@ -0,0 +1,135 @@
+"""unittests for sealant's randstr_passphrase module"""
+
+import os
+import sys
+import math
+import time
+import shutil
+import unittest
+import tempfile
+
+sys.path.insert(0, os.path.abspath('../sealant/randstr'))
+import randstr_passphrase
+
+
+class WordlistTests(unittest.TestCase):
+    """Tests for memory mapped wordlists and their sidecar indexes"""
+
+    def setUp(self):
+        """Writes a small diceware-style wordlist"""
+
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.words = ['apple', 'banana', 'cherry', 'damson', u'éclair']
+
+        self.filename = os.path.join(self.test_dir, 'words.txt')
+        with open(self.filename, 'wb') as f:
+            f.write(b'11111 apple\n\n11112 banana\ncherry\n  \n')
+            f.write(u'damson\néclair'.encode('utf-8'))
+
+    def tearDown(self):
+        """Removes temporary directory and any files written to it"""
+        shutil.rmtree(self.test_dir)
+
+    def test_words(self):
+        """Verify blank lines are skipped and the last field of each line is
+        the word"""
+
+        with randstr_passphrase.Wordlist(self.filename) as wordlist:
+            self.assertEqual(self.words, [wordlist[i]
+                                          for i in range(len(wordlist))])
+
+            with self.assertRaises(IndexError):
+                wordlist[len(self.words)]
+
+    def test_index_written_and_reused(self):
+        """Verify the sidecar index is written once and then loaded"""
+
+        index_file = randstr_passphrase.index_filename(self.filename)
+        randstr_passphrase.Wordlist(self.filename).close()
+        self.assertTrue(os.path.exists(index_file))
+
+        with randstr_passphrase.Wordlist(self.filename) as wordlist:
+            self.assertIsNotNone(wordlist._index)
+            self.assertEqual(self.words[-1], wordlist[len(wordlist) - 1])
+
+    def test_index_written_atomically(self):
+        """Verify indexes are moved into place without leaving temporary
+        files behind"""
+
+        randstr_passphrase.Wordlist(self.filename).close()
+        self.assertEqual(
+            sorted(['words.txt', 'words.txt' +
+                    randstr_passphrase.INDEX_EXTENSION]),
+            sorted(os.listdir(self.test_dir)))
+
+    def test_stale_index(self):
+        """Verify an index is rebuilt once its wordlist changes"""
+
+        randstr_passphrase.Wordlist(self.filename).close()
+
+        with open(self.filename, 'ab') as f:
+            f.write(b'\nfig\n')
+        later = time.time() + 10
+        os.utime(self.filename, (later, later))
+
+        with randstr_passphrase.Wordlist(self.filename) as wordlist:
+            self.assertEqual(len(self.words) + 1, len(wordlist))
+            self.assertEqual('fig', wordlist[len(wordlist) - 1])
+
+    def test_corrupt_index(self):
+        """Verify truncated indexes are rebuilt rather than raising"""
+
+        index_file = randstr_passphrase.index_filename(self.filename)
+        randstr_passphrase.Wordlist(self.filename).close()
+        with open(index_file, 'rb') as f:
+            index = f.read()
+
+        for size in (1, 31, len(index) - 8):
+            with open(index_file, 'wb') as f:
+                f.write(index[:size])
+
+            with self.subTest(size=size):
+                with randstr_passphrase.Wordlist(self.filename) as wordlist:
+                    self.assertEqual(self.words, [
+                        wordlist[i] for i in range(len(wordlist))])
+
+                with open(index_file, 'rb') as f:
+                    self.assertEqual(index, f.read())
+
+    def test_duplicate_words(self):
+        """Verify repeated words are indexed once and don't add entropy"""
+
+        with open(self.filename, 'ab') as f:
+            f.write(b'\n11113 apple\nbanana\napple\n')
+
+        with randstr_passphrase.Wordlist(self.filename) as wordlist:
+            self.assertEqual(self.words, [wordlist[i]
+                                          for i in range(len(wordlist))])
+            self.assertAlmostEqual(6 * math.log(5, 2),
+                                   wordlist.entropy_bits(words=6))
+
+    def test_passphrase(self):
+        """Verify passphrases hold the requested number of listed words"""
+
+        with randstr_passphrase.Wordlist(self.filename) as wordlist:
+            passphrase = wordlist.passphrase(words=8, separator='-')
+            self.assertEqual(8, len(passphrase.split('-')))
+            self.assertTrue(set(self.words).issuperset(passphrase.split('-')))
+            self.assertAlmostEqual(8 * math.log(5, 2),
+                                   wordlist.entropy_bits(words=8))
+
+    def test_empty_wordlist(self):
+        """Verify wordlists without words are refused"""
+
+        for contents in (b'', b'\n \n'):
+            with open(self.filename, 'wb') as f:
+                f.write(contents)
+
+            with self.subTest(contents=contents):
+                with self.assertRaises(ValueError):
+                    randstr_passphrase.Wordlist(self.filename)
+
+
+if __name__ == '__main__':
+    print('Testing randstr_passphrase Methods\n')
+    unittest.main(buffer=True)
@@ -65,6 +65,47 @@ class RandstrParserTests(unittest.TestCase):
             with self.subTest(arg=arg):
                 self.assertIsNot(self.parser.parse_args(arg), None)
 
+    def test_count_argument(self):
+        """Tests count defaults to one and accepts both switches"""
+
+        self.assertEqual(1, self.parser.parse_args([self.str_len]).count)
+        for switch in ('-n', '--count'):
+            with self.subTest(switch=switch):
+                args = self.parser.parse_args([self.str_len, switch, '5'])
+                self.assertEqual(5, args.count)
+
+    def test_positive_arguments(self):
+        """Tests counts and worker counts below 1 are rejected"""
+
+        for switch in ('-n', '--count', '-w', '--workers'):
+            for invalid in ('0', '-1', 'x'):
+                with self.subTest(switch=switch, invalid=invalid):
+                    with self.assertRaises(SystemExit):
+                        self.parser.parse_args(
+                            [self.str_len, switch, invalid])
+
+    def test_character_classes_argument(self):
+        """Tests character classes are parsed and validated"""
+
+        args = self.parser.parse_args(
+            [self.str_len, '-cc', 'lowercase', 'digits'])
+        self.assertEqual(['lowercase', 'digits'], args.classes)
+
+        with self.assertRaises(SystemExit):
+            self.parser.parse_args([self.str_len, '-cc', 'emoji'])
+
+    def test_minimum_argument(self):
+        """Tests minimums are parsed as (class, count) pairs"""
+
+        args = self.parser.parse_args(
+            [self.str_len, '-m', 'digits=2', '--minimum', '!=@=1'])
+        self.assertEqual([('digits', 2), ('!=@', 1)], args.minimums)
+
+        for invalid in ('digits', 'digits=x', '=2'):
+            with self.subTest(invalid=invalid):
+                with self.assertRaises(SystemExit):
+                    self.parser.parse_args([self.str_len, '-m', invalid])
+
     def test_boolean_switches(self):
         """Sub-tests for simple switches that store as True when included as an
         argument."""
@@ -138,6 +179,77 @@ class RandstrOutputFiles(unittest.TestCase):
 
         self.assertIn(random_string, output)
 
+    def test_count_file_write(self):
+        """Test that --count writes one string per line"""
+
+        args = self.parser.parse_args(
+            [self.str_len, '--count', '25', '--file', '--raw-output'])
+        self.randstr_output(args).process_parsed_args()
+
+        with open(os.path.join(self.test_dir, args.file), 'r') as f:
+            lines = f.read().split('\n')
+
+        self.assertEqual(25, len(lines))
+        self.assertEqual({int(self.str_len)}, set(len(l) for l in lines))
+
+    def test_stream_file_write(self):
+        """Test that --stream writes strings longer than a chunk, and longer
+        than the default limit, to file"""
+
+        args = self.parser.parse_args(['150000', '--stream', '-f', 'out.txt'])
+        self.randstr_output(args).process_parsed_args()
+
+        with open('out.txt', 'r') as f:
+            self.assertEqual(150000, len(f.read()))
+        self.assertIn('out.txt', sys.stdout.getvalue())
+
+    def test_stream_stdout(self):
+        """Test that --stream without --file writes only the string to
+        stdout, one string per line with --count"""
+
+        args = self.parser.parse_args([self.str_len, '--stream', '-n', '3'])
+        self.randstr_output(args).process_parsed_args()
+
+        lines = sys.stdout.getvalue().splitlines()
+        self.assertEqual([int(self.str_len)] * 3, [len(l) for l in lines])
+
+    def test_stream_workers(self):
+        """Test that --workers splits a --count batch across processes while
+        writing every string"""
+
+        args = self.parser.parse_args(
+            ['8', '-n', '300000', '-w', '2', '--stream', '-f', 'out.txt'])
+        self.randstr_output(args).process_parsed_args()
+
+        with open('out.txt', 'r') as f:
+            lengths = set(len(line) for line in f.read().splitlines())
+        self.assertEqual({8}, lengths)
+
+    def test_character_classes_output(self):
+        """Test that --character-classes combine with --character-set"""
+
+        args = self.parser.parse_args(
+            ['500', '-cc', 'digits', '-cs', 'xy', '--raw-output'])
+        self.randstr_output(args).process_parsed_args()
+
+        output = sys.stdout.getvalue()
+        self.assertTrue(set(string.digits + 'xy').issuperset(output))
+
+    def test_wordlist_output(self):
+        """Test that --wordlist generates passphrases of LENGTH words"""
+
+        with open('words.txt', 'w') as f:
+            f.write('alpha\nbravo\ncharlie\n')
+
+        args = self.parser.parse_args(
+            ['4', '-wl', 'words.txt', '-sep', '.', '-n', '3', '-ro'])
+        self.randstr_output(args).process_parsed_args()
+
+        for passphrase in sys.stdout.getvalue().split('\n'):
+            words = passphrase.split('.')
+            self.assertEqual(4, len(words))
+            self.assertTrue({'alpha', 'bravo', 'charlie'}.issuperset(words))
+
     def test_default_filename_iteration(self):
         """Verifies that generated filenames created when --file is provided
         without a user-defined filename are unique in respect to
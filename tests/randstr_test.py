@@ -6,8 +6,12 @@ Todo:
 """
 import os
 import sys
+import string
+import time
 import unittest
 import random
+import warnings
+import collections
 
 sys.path.insert(0, os.path.abspath('../sealant/randstr'))  # Ughh
 import randstr
@@ -69,6 +73,19 @@ class RandomStringGenerationTests(unittest.TestCase):
         # noinspection PyCompatibility
         self.assertCountEqual(shuffled_set, self.original_chars)
 
+    def test_shuffle_once(self):
+        """Verify shuffle=True shuffles the character set once, not per
+        generated string"""
+
+        generator = randstr.RandomString(length=10, shuffle=True)
+        shuffled_set = generator.char_set
+        self.assertCountEqual(shuffled_set, self.original_chars)
+
+        for _ in range(5):
+            generator()
+        list(generator.generate_chunks(100, chunk_size=10))
+        self.assertEqual(shuffled_set, generator.char_set)
+
     def test_undefined_length(self):
         """Test that value of None is returned when no length is provided to
         RandomString()"""
@@ -77,6 +94,405 @@ class RandomStringGenerationTests(unittest.TestCase):
         self.randstr_generator.length = None
         self.assertIsNone(self.randstr_generator())
 
+    def test_generate_many(self):
+        """Verify batches hold the requested number of strings, each of the
+        requested length, including batches spanning several entropy
+        requests"""
+
+        length = self.randstr_length
+        count = randstr.MAX_ENTROPY_REQUEST // length + 10
+        generated = list(self.randstr_generator.generate_many(count))
+
+        self.assertEqual(count, len(generated))
+        self.assertEqual({length}, set(len(s) for s in generated))
+        self.assertTrue(set(self.original_chars).issuperset(
+            ''.join(generated)))
+
+    def test_generate_chunks(self):
+        """Verify chunks are full sized except the last, and add up to the
+        requested length"""
+
+        chunks = list(self.randstr_generator.generate_chunks(
+            length=2500, chunk_size=1000))
+        self.assertEqual([1000, 1000, 500], [len(c) for c in chunks])
+
+    def test_generate_lines(self):
+        """Verify line batches add up to the requested number of newline
+        terminated strings"""
+
+        lines = ''.join(self.randstr_generator.generate_lines(
+            1000, length=7)).split('\n')
+        self.assertEqual('', lines.pop())
+        self.assertEqual([7] * 1000, [len(line) for line in lines])
+
+    def test_parallel_generation(self):
+        """Verify worker processes produce the same shape of output as a
+        single process"""
+
+        count = randstr.MAX_ENTROPY_REQUEST // 16 * 3 + 5
+        generated = list(self.randstr_generator.generate_many(
+            count, length=16, workers=2))
+        self.assertEqual(count, len(generated))
+        self.assertEqual({16}, set(len(s) for s in generated))
+
+        chunks = list(self.randstr_generator.generate_chunks(
+            length=2500, chunk_size=1000, workers=2))
+        self.assertEqual([1000, 1000, 500], [len(c) for c in chunks])
+
+    def test_generate_unique(self):
+        """Verify unique batches never repeat a string, even when they use
+        the whole keyspace"""
+
+        generator = randstr.RandomString(length=3, user_char_set='abc')
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            generated = list(generator.generate_many(27, unique=True))
+
+        self.assertEqual(27, len(set(generated)))
+        self.assertEqual(RuntimeWarning, caught[0].category)
+
+        lines = ''.join(generator.generate_lines(10, unique=True))
+        self.assertEqual(10, len(set(lines.splitlines())))
+
+    def test_generate_unique_long(self):
+        """Verify keyspaces too large for a float don't overflow"""
+
+        generator = randstr.RandomString(length=200)
+        generated = list(generator.generate_many(3, unique=True))
+        self.assertEqual(3, len(set(generated)))
+        self.assertEqual([200] * 3, [len(s) for s in generated])
+
+    def test_generate_unique_keyspace(self):
+        """Verify unique batches larger than the keyspace are refused"""
+
+        generator = randstr.RandomString(length=2, user_char_set='aab')
+        with self.assertRaises(ValueError):
+            list(generator.generate_many(5, unique=True))
+
+    def test_generate_many_length(self):
+        """Verify the length argument overrides the instance length"""
+
+        generated = list(self.randstr_generator.generate_many(5, length=3))
+        self.assertEqual([3] * 5, [len(s) for s in generated])
+
+
+class CharacterSamplerTests(unittest.TestCase):
+    """Tests for bulk character sampling"""
+
+    def test_sample_length(self):
+        """Verify exactly the requested number of characters is returned,
+        including lengths spanning several entropy requests"""
+
+        sampler = randstr.CharacterSampler('abc')
+        for count in (0, 1, 1000, randstr.MAX_ENTROPY_REQUEST * 2 + 1):
+            with self.subTest(count=count):
+                self.assertEqual(count, len(sampler.sample(count)))
+
+    def test_uniform_distribution(self):
+        """Verify characters are equally likely when the character set size
+        doesn't divide 256, so rejection sampling is required"""
+
+        count, char_set = 300000, 'abcdefg'
+        counts = collections.Counter(
+            randstr.CharacterSampler(char_set).sample(count))
+
+        # Expected count is ~42857 with a standard deviation of ~191
+        expected = count / len(char_set)
+        self.assertEqual(set(char_set), set(counts))
+        for char in char_set:
+            with self.subTest(char=char):
+                self.assertLess(abs(counts[char] - expected), expected * 0.05)
+
+    def test_wide_char_sets(self):
+        """Verify non Latin-1 and larger than 256 character sets only produce
+        characters from the set"""
+
+        wide = ''.join(chr(code) for code in range(0x3b1, 0x3c9))
+        large = ''.join(chr(code) for code in range(0x100, 0x400))
+
+        for char_set in (wide, large):
+            with self.subTest(size=len(char_set)):
+                generated = randstr.CharacterSampler(char_set).sample(5000)
+                self.assertEqual(5000, len(generated))
+                self.assertTrue(set(char_set).issuperset(generated))
+
+    def test_empty_char_set(self):
+        """Verify empty character sets are rejected"""
+
+        with self.assertRaises(ValueError):
+            randstr.CharacterSampler('')
+
+
+class PolicyTests(unittest.TestCase):
+    """Tests for minimum character counts per class"""
+
+    def setUp(self):
+        """Defines a short password policy"""
+        self.minimums = {'uppercase': 1, 'digits': 2, '!@#': 1}
+        self.generator = randstr.RandomString(
+            length=6, minimums=self.minimums)
+
+    def assertCompliant(self, random_str):
+        """Asserts a string meets self.minimums"""
+
+        self.assertEqual(6, len(random_str))
+        self.assertGreaterEqual(
+            sum(c in string.ascii_uppercase for c in random_str), 1)
+        self.assertGreaterEqual(sum(c in string.digits for c in random_str), 2)
+        self.assertGreaterEqual(sum(c in '!@#' for c in random_str), 1)
+
+    def test_single_string(self):
+        """Verify calling the generator produces compliant strings"""
+
+        for _ in range(200):
+            self.assertCompliant(self.generator())
+
+    def test_batches(self):
+        """Verify batches, line batches, and unique batches are compliant"""
+
+        for random_str in self.generator.generate_many(500):
+            self.assertCompliant(random_str)
+        for random_str in ''.join(
+                self.generator.generate_lines(100)).splitlines():
+            self.assertCompliant(random_str)
+
+        unique = list(self.generator.generate_many(300, unique=True))
+        self.assertEqual(300, len(set(unique)))
+
+    def test_required_positions(self):
+        """Verify required characters land in every position"""
+
+        positions = set()
+        for random_str in self.generator.generate_many(500):
+            positions.update(i for i, c in enumerate(random_str) if c in '!@#')
+        self.assertEqual(set(range(6)), positions)
+
+    def test_requirements_cached(self):
+        """Verify minimums are compiled once, and again once the policy or
+        character set changes"""
+
+        requirements = self.generator.requirements
+        self.generator()
+        self.assertIs(requirements, self.generator.requirements)
+
+        self.generator.minimums = dict(self.minimums, lowercase=1)
+        self.assertEqual(4, len(self.generator.requirements))
+
+        self.generator.minimums = self.minimums
+        self.generator.char_set = 'ABC123!'
+        self.assertEqual([1, 3, 3], sorted(
+            len(class_set) for class_set, _ in self.generator.requirements))
+
+    def test_invalid_minimums(self):
+        """Verify impossible policies are refused"""
+
+        policies = [{'uppercase': 7}, {'lowercase': 1, '~': 1},
+                    {'digits': -1}]
+        for minimums in policies:
+            generator = randstr.RandomString(
+                length=6, user_char_set='abc123', minimums=minimums)
+            with self.subTest(minimums=minimums):
+                with self.assertRaises(ValueError):
+                    generator()
+
+    def test_secure_shuffle(self):
+        """Verify shuffles keep every item and reach every position"""
+
+        first = collections.Counter()
+        for _ in range(300):
+            items = list('abc')
+            randstr.secure_shuffle(items)
+            self.assertEqual(['a', 'b', 'c'], sorted(items))
+            first[items[0]] += 1
+
+        self.assertEqual({'a', 'b', 'c'}, set(first))
+
+    def test_secure_shuffle_entropy(self):
+        """Verify shuffles drawing from an entropy source keep every item,
+        reach every permutation, and make one request per shuffle"""
+
+        requests = []
+
+        def entropy(size):
+            requests.append(size)
+            return os.urandom(size)
+
+        permutations = set()
+        for _ in range(300):
+            items = list('abc')
+            randstr.secure_shuffle(items, entropy)
+            self.assertEqual(['a', 'b', 'c'], sorted(items))
+            permutations.add(''.join(items))
+
+        self.assertEqual(6, len(permutations))
+        self.assertEqual(300, len(requests))
+
+        # Lists longer than 256 items draw two bytes per index
+        items = list(range(1000))
+        randstr.secure_shuffle(items, entropy)
+        self.assertEqual(list(range(1000)), sorted(items))
+        self.assertNotEqual(list(range(1000)), items)
+
+
+class CharacterSetTests(unittest.TestCase):
+    """Tests for precompiled character sets"""
+
+    def test_dedupe(self):
+        """Verify duplicates are dropped in first occurrence order, so they
+        no longer skew the distribution"""
+
+        character_set = randstr.CharacterSet('abcabcaaad')
+        self.assertEqual('abcd', character_set.chars)
+        self.assertEqual(4, len(character_set))
+
+        counts = collections.Counter(character_set.sample(40000))
+        self.assertLess(abs(counts['a'] - counts['d']), 1000)
+
+    def test_compile_cache(self):
+        """Verify compiled sets are reused, and compiled sets pass through"""
+
+        compiled = randstr.CharacterSet.compile('xyz')
+        self.assertIs(compiled, randstr.CharacterSet.compile('xyz'))
+        self.assertIs(compiled, randstr.CharacterSet.compile(compiled))
+        self.assertIs(compiled, randstr.CharacterSet.compile(['x', 'y', 'z']))
+
+    def test_immutable(self):
+        """Verify compiled sets can't be modified"""
+
+        with self.assertRaises(AttributeError):
+            randstr.CharacterSet('abc').chars = 'xyz'
+
+    def test_from_classes(self):
+        """Verify named classes compose in order, and can be extended"""
+
+        composed = randstr.CharacterSet.from_classes('digits', 'lowercase')
+        self.assertEqual(string.digits + string.ascii_lowercase,
+                         composed.chars)
+        self.assertEqual(string.digits + 'abcdef!',
+                         (randstr.CharacterSet.from_classes(
+                             'digits', 'hexdigits') + '!').chars)
+
+        with self.assertRaises(ValueError):
+            randstr.CharacterSet.from_classes('digits', 'emoji')
+
+    def test_random_string_character_set(self):
+        """Verify RandomString compiles its character set once and shares
+        it"""
+
+        first = randstr.RandomString(length=10, user_char_set='aabb')
+        second = randstr.RandomString(length=10, user_char_set='aabb')
+
+        self.assertIs(first.character_set, second.character_set)
+        self.assertEqual('ab', first.character_set.chars)
+
+
+class UniqueTrackingTests(unittest.TestCase):
+    """Tests for packed tracking of issued strings"""
+
+    def test_radix_encoder(self):
+        """Verify distinct strings pack to distinct integers for small and
+        large radixes"""
+
+        for char_set in ('01', string.ascii_lowercase, string.printable):
+            with self.subTest(radix=len(char_set)):
+                encode = randstr.radix_encoder(char_set)
+                strings = set(''.join(random.choice(char_set)
+                                      for _ in range(6))
+                              for _ in range(2000))
+                self.assertEqual(len(strings),
+                                 len(set(encode(s) for s in strings)))
+                self.assertEqual(0, encode(sorted(char_set)[0] * 6))
+
+    def test_packed_int_set(self):
+        """Verify membership, duplicate detection, and folding of values
+        wider than 64 bits"""
+
+        values = random.sample(range(2 ** 40), 5000)
+        packed = randstr.PackedIntSet(expected=len(values))
+
+        self.assertTrue(all(packed.add(value) for value in values))
+        self.assertFalse(any(packed.add(value) for value in values))
+        self.assertEqual(5000, len(packed))
+        self.assertIn(values[0], packed)
+        self.assertIn(values[0] + 2 ** 64, packed)
+        self.assertNotIn(2 ** 41, packed)
+
+
+class EntropyPoolTests(unittest.TestCase):
+    """Tests for the background refilled entropy pool"""
+
+    def setUp(self):
+        """Creates a small pool so tests drain it quickly"""
+        self.pool = randstr.EntropyPool(low_water=1024, high_water=4096)
+
+    def tearDown(self):
+        """Stops the refill thread"""
+        self.pool.close()
+
+    def wait_for_refill(self):
+        """Waits up to a few seconds for the pool to reach its high water
+        mark"""
+
+        deadline = time.time() + 5
+        while self.pool.available < self.pool.high_water:
+            self.assertLess(time.time(), deadline, "pool never refilled")
+            time.sleep(0.01)
+
+    def test_read_sizes(self):
+        """Verify reads return exactly the requested number of bytes,
+        including reads larger than the pool"""
+
+        self.wait_for_refill()
+        for size in (0, 1, 100, 4096, 10000):
+            with self.subTest(size=size):
+                self.assertEqual(size, len(self.pool.read(size)))
+
+    def test_refill(self):
+        """Verify the pool is topped back up after dropping below the low
+        water mark"""
+
+        self.wait_for_refill()
+        self.pool.read(3500)
+        self.wait_for_refill()
+
+    def test_random_string(self):
+        """Verify RandomString draws from the pool"""
+
+        self.wait_for_refill()
+        generator = randstr.RandomString(length=100, entropy_pool=self.pool)
+        self.assertEqual(100, len(generator()))
+        self.assertLess(self.pool.available, self.pool.high_water)
+
+    def test_closed(self):
+        """Verify closed pools refuse reads"""
+
+        self.pool.close()
+        with self.assertRaises(ValueError):
+            self.pool.read(1)
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "requires os.fork")
+    def test_fork(self):
+        """Verify a forked child never hands out bytes buffered before the
+        fork"""
+
+        self.wait_for_refill()
+        read_fd, write_fd = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.write(write_fd, self.pool.read(64))
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd, 'rb') as f:
+            child_bytes = f.read()
+        os.waitpid(pid, 0)
+
+        self.assertEqual(64, len(child_bytes))
+        self.assertNotEqual(self.pool.read(64), child_bytes)
+
 
 if __name__ == '__main__':
     print('Testing randstr Methods\n')
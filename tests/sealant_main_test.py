@@ -0,0 +1,146 @@
+"""unittests for `python -m sealant` and the import time of each tool"""
+
+import os
+import sys
+import shutil
+import unittest
+import tempfile
+import subprocess
+
+# Optional dependencies that must only be imported by the options using them
+DEFERRED_MODULES = ['pyperclip', 'colorama', 'difflib', 'sqlite3',
+                    'concurrent.futures', 'multiprocessing', 'socket', 'json']
+
+# About three times the measured import time of either terminal module, so a
+# new eager import of a subcommand's modules trips it; override on slow
+# machines
+IMPORT_BUDGET_MS = float(os.environ.get('SEALANT_IMPORT_BUDGET_MS', 80))
+
+REPO_ROOT = os.path.abspath('..')
+
+sys.path.insert(0, os.path.abspath('../sealant/hashchk'))
+
+
+def import_times(*args):
+    """Runs `python -X importtime -m sealant` and parses its report.
+
+    Returns:
+        dict: Cumulative import time in microseconds of every module.
+    """
+
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-m', 'sealant'] + list(args),
+        cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode:
+        raise AssertionError(stderr.decode())
+
+    times = {}
+    for line in stderr.decode().splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if fields[1].strip().isdigit():
+            times[fields[2].strip()] = int(fields[1])
+
+    return times
+
+
+@unittest.skipUnless(sys.version_info >= (3, 7), "-X importtime needs 3.7+")
+class ImportTimeTests(unittest.TestCase):
+    """Regression tests for the import cost of short commands"""
+
+    def setUp(self):
+        self.test_dir = os.path.abspath(tempfile.mkdtemp())
+        self.filename = os.path.join(self.test_dir, 'test.bin')
+        with open(self.filename, 'wb') as f:
+            f.write(b'sealant')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def assert_fast_import(self, times, terminal_module):
+        """Checks deferred modules weren't imported and the tool's terminal
+        module imported within IMPORT_BUDGET_MS."""
+
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, times)
+
+        self.assertIn(terminal_module, times)
+        self.assertLess(times[terminal_module] / 1000.0, IMPORT_BUDGET_MS)
+
+    def test_randstr(self):
+        """Verify a raw string doesn't import clipboard or pool modules"""
+        self.assert_fast_import(import_times('randstr', '10', '-ro'),
+                                'randstr_terminal')
+
+    def test_hashchk(self):
+        """Verify generating a digest doesn't import colorama, difflib,
+        sqlite3, sockets, or process pools"""
+        self.assert_fast_import(
+            import_times('hashchk', 'generate', '-binary', self.filename),
+            'hashchk_terminal')
+
+
+class TerminalDefaultsTests(unittest.TestCase):
+    """Tests for the defaults hashchk_terminal repeats to avoid imports"""
+
+    def test_defaults(self):
+        """Verify repeated defaults match the modules they're taken from"""
+
+        import hashchk_terminal
+        import hashchk_cache
+        import hashchk_client
+        import hashchk_dedupe
+        import hashchk_index
+        import hashchk_snapshot
+        import hashchk_tree
+
+        pairs = [
+            (hashchk_cache.DEFAULT_CACHE_PATH,
+             hashchk_terminal.DEFAULT_CACHE_PATH),
+            (hashchk_cache.DEFAULT_MAX_ENTRIES,
+             hashchk_terminal.DEFAULT_CACHE_ENTRIES),
+            (hashchk_client.DEFAULT_SOCKET_PATH,
+             hashchk_terminal.DEFAULT_SOCKET_PATH),
+            (hashchk_client.SOCKET_ENVIRONMENT_VARIABLE,
+             hashchk_terminal.SOCKET_ENVIRONMENT_VARIABLE),
+            (hashchk_index.INDEX_EXTENSION, hashchk_terminal.INDEX_EXTENSION),
+            (hashchk_index.DEFAULT_CHUNK_SIZE,
+             hashchk_terminal.DEFAULT_CHUNK_SIZE),
+            (hashchk_tree.DEFAULT_LEAF_SIZE,
+             hashchk_terminal.DEFAULT_LEAF_SIZE),
+            (hashchk_snapshot.DEFAULT_HASH_METHOD,
+             hashchk_terminal.DEFAULT_HASH_METHOD),
+            (hashchk_dedupe.DEFAULT_HASH_METHOD,
+             hashchk_terminal.DEFAULT_HASH_METHOD)]
+        for expected, repeated in pairs:
+            self.assertEqual(expected, repeated)
+
+
+class DispatchTests(unittest.TestCase):
+    """Tests for dispatching `python -m sealant TOOL`"""
+
+    def test_unknown_tool(self):
+        """Verify unknown tools exit with usage"""
+
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'sealant', 'nothing'], cwd=REPO_ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, stderr = process.communicate()
+
+        self.assertEqual(2, process.returncode)
+        self.assertIn(b'usage', stderr)
+
+    def test_randstr(self):
+        """Verify arguments are passed through to the tool"""
+
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'sealant', 'randstr', '12', '-ro'],
+            cwd=REPO_ROOT)
+        self.assertEqual(12, len(output.decode().rstrip('\n')))
+
+
+if __name__ == '__main__':
+    print('Testing python -m sealant\n')
+    unittest.main(buffer=True)